@@ -0,0 +1,182 @@
+import os
+import sys
+import numpy as np
+from torch_geometric.data import Dataset
+from tqdm import tqdm
+from instance_io import INSTANCE_SUFFIX, get_target_costs, read_instance
+from tsp_graph import build_graph_arrays, assemble_graph, get_optimal_cost, get_instance_target_costs
+from tsp_solvers import HELD_KARP_MAX_N
+# Graph arrays are packed with the shards of the SAT datasets. The SAT directory is searched last, so the modules of this
+# directory (e.g. dataset) keep precedence
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "sat"))
+from shards import ShardReader, ShardWriter
+from manifest import EDGE_OFFSET_PREFIX, NODE_OFFSET_PREFIX, NUM_EDGES_PREFIX, NUM_NODES_PREFIX, edge_type_to_key, key_to_edge_type
+
+INDEX_FILE = "index.npz"
+SHARD_SIZE = 10000
+
+
+def find_instances(directory):
+    """
+        Binary instances (see instance_io) of a directory and of its
+        sub-directories, e.g. the shard directories of instance_generator.py
+        --sharded, sorted by path
+    """
+    paths = []
+    for root, _, files in os.walk(directory):
+        paths.extend(os.path.join(root, name) for name in files if name.endswith(INSTANCE_SUFFIX))
+    return sorted(paths)
+
+def write_index(directory, index):
+    """
+        Writes the index of the processed instances atomically, after their
+        shards, so an interrupted run leaves no valid dataset behind
+    """
+    tmp_path = os.path.join(directory, INDEX_FILE + ".tmp")
+    with open(tmp_path, "wb") as f:
+        np.savez(f, **index)
+    os.replace(tmp_path, os.path.join(directory, INDEX_FILE))
+
+
+class DecisionTspDataset(Dataset):
+    """
+        Decision TSP dataset: "is there a tour of cost at most C?". Every
+        instance gives two graphs (see tsp_graph.build_graph_arrays), one per
+        target cost around its optimal cost: graph 2i (NO, label 0) asks for a
+        tour of cost at most cost*(1-deviation) and graph 2i+1 (YES, label 1)
+        for cost*(1+deviation). Raw instances are the binary .tsp.npz files
+        written by instance_generator.py with -format binary or both (TSPLIB
+        .graph files, the default format, are not read), with their tour, in
+        root/raw and its sub-directories. Target costs stored by the generator
+        are used unless a deviation is given. Instances whose tour may not be
+        optimal (exact=False, see instance_generator.is_exact) have unreliable
+        NO labels; both of their graphs are left out unless exact_only is False.
+
+        Processing builds the graph arrays of every instance once and packs
+        them in shards of SHARD_SIZE instances in root/processed (see
+        shards.ShardWriter). INDEX_FILE holds the shard and offsets of every
+        instance, with its costs, source and exact flag. The two decision
+        graphs of an instance share these arrays and only differ by the
+        target cost, which is set when a graph is loaded, so the deviation can
+        change without processing the dataset again. Delete the processed
+        directory after changing the raw instances
+    """
+    def __init__(self, root, deviation=None, exact_only=True, transform=None, pre_transform=None):
+        """
+            Args:
+                root (str): dataset directory, holding the raw directory
+                deviation (float, optional): relative distance of the target
+                    costs to the optimal cost. Defaults to the target costs
+                    stored with the instances, or to 0.02 for instances
+                    without them.
+                exact_only (bool): leave out the instances whose tour may
+                    not be optimal. Raises a ValueError if that leaves out
+                    every instance, e.g. instances of more than
+                    HELD_KARP_MAX_N nodes solved without Concorde
+        """
+        self.deviation = deviation
+        super(DecisionTspDataset, self).__init__(root, transform=transform, pre_transform=pre_transform)
+        with np.load(os.path.join(self.processed_dir, INDEX_FILE), allow_pickle=False) as f:
+            self.index = {key: f[key] for key in f.files}
+        self.node_types = [t.decode() for t in self.index["node_types"]]
+        self.edge_types = [key_to_edge_type(t.decode()) for t in self.index["edge_types"]]
+        self.shard_reader = ShardReader(self.processed_dir)
+        # Instances of the dataset, by position in the index
+        if exact_only:
+            self.instances = np.flatnonzero(self.index["exact"])
+            if len(self.index["exact"]) and not len(self.instances):
+                raise ValueError(
+                    f"None of the {len(self.index['exact'])} instances of {self.raw_dir} has a tour known to be optimal (see "
+                    f"instance_generator.is_exact), so exact_only leaves the dataset empty. Generate them with Concorde or with "
+                    f"-nmax {HELD_KARP_MAX_N} or less, or pass exact_only=False if their NO labels may be wrong")
+        else:
+            self.instances = np.arange(len(self.index["costs"]))
+
+    @property
+    def raw_file_names(self):
+        return []
+
+    @property
+    def processed_file_names(self):
+        return [INDEX_FILE]
+
+    def download(self):
+        pass
+
+    def process(self):
+        writer = ShardWriter(self.processed_dir, SHARD_SIZE, prefix="pack")
+        index = {"shards": [], "costs": [], "target_costs": [], "sources": [], "exact": []}
+        locations = []
+        node_types, edge_types = [], []
+        for filepath in tqdm(find_instances(self.raw_dir)):
+            instance = read_instance(filepath)
+            features, edges = build_graph_arrays(instance)
+            edges = {edge_type: edge_index.astype(np.int32) for edge_type, edge_index in edges.items()}
+            shard_name, offsets = writer.add_arrays(features, edges)
+            for node_type, x in features.items():
+                offsets[NUM_NODES_PREFIX + node_type] = len(x)
+            for edge_type, edge_index in edges.items():
+                offsets[NUM_EDGES_PREFIX + edge_type_to_key(edge_type)] = edge_index.shape[1]
+            node_types.extend(t for t in features if t not in node_types)
+            edge_types.extend(t for t in edges if t not in edge_types)
+            locations.append(offsets)
+            index["shards"].append(shard_name)
+            index["costs"].append(get_optimal_cost(instance))
+            index["target_costs"].append(get_instance_target_costs(instance))
+            index["sources"].append(os.path.relpath(filepath, self.raw_dir))
+            index["exact"].append(instance.get("exact", True))
+        writer.close()
+
+        index = {
+            "shards": np.array(index["shards"], dtype=np.bytes_),
+            "costs": np.array(index["costs"], dtype=np.float64),
+            "target_costs": np.array(index["target_costs"], dtype=np.float64).reshape(-1, 2),
+            "sources": np.array(index["sources"], dtype=np.bytes_),
+            "exact": np.array(index["exact"], dtype=bool),
+            "node_types": np.array(node_types, dtype=np.bytes_),
+            "edge_types": np.array([edge_type_to_key(t) for t in edge_types], dtype=np.bytes_),
+        }
+        for key in sorted({key for offsets in locations for key in offsets}):
+            index[key] = np.array([offsets.get(key, 0) for offsets in locations], dtype=np.int64)
+        write_index(self.processed_dir, index)
+
+    def get_arrays(self, instance):
+        """
+            features and edges of an instance, like tsp_graph.build_graph_arrays,
+            read from its shard
+        """
+        nodes = {t: (self.index[NODE_OFFSET_PREFIX + t][instance], self.index[NUM_NODES_PREFIX + t][instance]) for t in self.node_types}
+        edges = {}
+        for edge_type in self.edge_types:
+            key = edge_type_to_key(edge_type)
+            edges[edge_type] = (self.index[EDGE_OFFSET_PREFIX + key][instance], self.index[NUM_EDGES_PREFIX + key][instance])
+        features, edges, _ = self.shard_reader.get_arrays(self.index["shards"][instance].decode(), nodes, edges)
+        return features, edges
+
+    def len(self):
+        return 2*len(self.instances)
+
+    def get(self, idx):
+        position, label = divmod(idx, 2)
+        instance = self.instances[position]
+        features, edges = self.get_arrays(instance)
+        if self.deviation is None:
+            target_cost = self.index["target_costs"][instance, label]
+        else:
+            target_cost = get_target_costs(self.index["costs"][instance], self.deviation)[label]
+        return assemble_graph(features, edges, target_cost, label)
+
+    @property
+    def labels(self):
+        """
+            Label of every graph of the dataset (or of the current subset)
+        """
+        return np.asarray(self.indices(), dtype=np.int64) % 2
+
+    @property
+    def costs(self):
+        """
+            Optimal cost of the instance of every graph of the dataset (or of
+            the current subset)
+        """
+        return self.index["costs"][self.instances[np.asarray(self.indices(), dtype=np.int64) // 2]]
@@ -1,29 +1,85 @@
 
-import sys, os, argparse, time, datetime
+import sys, os, argparse, time, datetime, math, tempfile, multiprocessing, warnings
+from functools import partial
 import numpy as np
 import random
-import networkx as nx
-from concorde.tsp import TSPSolver
+from tsp_solvers import HELD_KARP_MAX_N, SOLVERS, penalized_weights
+from instance_io import DEFAULT_DEVIATION, INSTANCE_SUFFIX, write_instance
+try:
+    from concorde.tsp import TSPSolver
+except ImportError:
+    # Concorde is optional; the built-in solvers need nothing but Numpy
+    TSPSolver = None
 # import subprocess
 
+SOLVER_CHOICES = ('auto', 'concorde') + tuple(SOLVERS)
 
 
-def solve(Ma, Mw):
+def resolve_solver(solver):
+    return ('builtin' if TSPSolver is None else 'concorde') if solver == 'auto' else solver
+
+def is_exact(solver, n, time_limit=None):
+    """
+        Whether 'solver' (see solve) is guaranteed to return an optimal tour
+        of an instance of n nodes: Concorde without a time limit, Held-Karp,
+        and 'builtin' up to HELD_KARP_MAX_N nodes. The NO label of an
+        instance is only exact if its tour is optimal (see
+        instance_io.get_target_costs)
+    """
+    solver = resolve_solver(solver)
+    if solver == 'concorde':
+        return time_limit is None
+    return solver == 'held_karp' or (solver == 'builtin' and n <= HELD_KARP_MAX_N)
+
+def solve(Ma, Mw, scratch_dir='.', solver='auto', time_limit=None, initial_tour=None):
+    """
+        Solves a TSP instance, returning an optimal (or, for the local search,
+        good) tour using only existing edges, or None if there is none
+
+        'solver' is 'concorde', one of the built-in solvers of tsp_solvers
+        ('builtin' is exact up to HELD_KARP_MAX_N nodes, then uses local
+        search), or 'auto' for Concorde when it is installed and 'builtin'
+        otherwise. Solvers stop after 'time_limit' seconds, if given, except
+        Held-Karp which is bounded by the instance size. 'initial_tour', a
+        known Hamiltonian tour, guarantees that the local search finds one too
+    """
+    solver = resolve_solver(solver)
+    if solver == 'concorde':
+        tour = solve_concorde(Ma, Mw, scratch_dir, time_limit)
+    elif solver in SOLVERS:
+        # Inexistent edges get large weights, like with Concorde
+        tour = SOLVERS[solver](penalized_weights(Ma, Mw), time_limit, initial_tour)
+    else:
+        raise ValueError('Unknown solver {}; expected one of {}'.format(solver, SOLVER_CHOICES))
+
+    if any([ Ma[i,j] == 0 for (i,j) in zip(tour, tour[1:]+tour[:1]) ]):
+        return None
+    else:
+        return tour
+
+def solve_concorde(Ma, Mw, scratch_dir='.', time_limit=None):
     """
         Invokes Concorde to solve a TSP instance
 
         Uses Python's Redirector library to prevent Concorde from printing
         unsufferably verbose messages
+
+        The instance is handed to Concorde through a file in 'scratch_dir',
+        which must not be shared with another running generator
     """
     # STDOUT = 1
     # STDERR = 2
 
+    if TSPSolver is None:
+        raise ImportError('Concorde is not installed (see setup.md); use one of the built-in solvers instead')
+
     # Write graph on a temporary file
-    write_graph(Ma, Mw, filepath='tmp', int_weights=True)
+    tsp_file = os.path.join(scratch_dir, 'tmp')
+    write_graph(Ma, Mw, filepath=tsp_file, int_weights=True)
     # Solve TSP on graph
-    solver = TSPSolver.from_tspfile('tmp')
+    solver = TSPSolver.from_tspfile(tsp_file)
     # Get solution
-    solution = solver.solve(verbose=False)
+    solution = solver.solve(time_bound=-1 if time_limit is None else time_limit, verbose=False)
 
     """
         Concorde solves only symmetric TSP instances. To circumvent this, we
@@ -38,51 +94,56 @@ def solve(Ma, Mw):
         OBS. in this case the maximum weight 1 is multiplied by 'bins' because
         we are converting from floating point to integers
     """
-    if any([ Ma[i,j] == 0 for (i,j) in zip(list(solution.tour),list(solution.tour)[1:]+list(solution.tour)[:1]) ]):
-        return None
-    else:
-        return list(solution.tour)
+    return [int(x) for x in solution.tour]
+
+def metric_closure(Mw):
+    """
+        Replaces every weight by the length of the shortest path between its
+        endpoints (Floyd-Warshall), one intermediate node at a time over the
+        whole matrix
+    """
+    D = Mw.copy()
+    np.fill_diagonal(D, 0)
+    for k in range(D.shape[0]):
+        np.minimum(D, D[:,k,None] + D[None,k,:], out=D)
+    return D
 
-def create_graph(n, connectivity, distances='euc_2D', metric=True):
+def create_graph(n, connectivity, distances='euc_2D', metric=True, scratch_dir='.', solver='auto', time_limit=None):
+    """
+        Random instance with a Hamiltonian tour planted in it, and its solution
+
+        Returns Ma (upper triangle), Mw, the route, the node coordinates (for
+        euc_2D distances, None otherwise) and whether the route is known to be
+        optimal (see is_exact). If the solver returns no Hamiltonian tour (e.g.
+        Concorde stopped by its time limit), the planted tour is used instead
+        and is not exact
+    """
 
     # Init adjacency and weight matrices
     Ma = np.zeros((n,n))
     Mw = np.zeros((n,n))
+    # Pairs i<j in row-major order, the order in which they are sampled
+    rows, cols = np.triu_indices(n, 1)
 
     # Define adjacencies
-    for i in range(n):
-        Ma[i,i] = 0
-        for j in range(i+1,n):
-            Ma[i,j] = Ma[j,i] = int(np.random.rand() < connectivity)
+    Ma[rows,cols] = np.random.rand(len(rows)) < connectivity
+    Ma[cols,rows] = Ma[rows,cols]
 
     # Define weights
     nodes = None
     if distances == 'euc_2D':
         # Select 'n' points in the √2/2 × √2/2 square uniformly at random
         nodes = np.random.rand(n,2)
-        for i in range(n):
-            for j in range(i+1,n):
-                Mw[i,j] = Mw[j,i] = np.sqrt(sum((nodes[i,:]-nodes[j,:])**2))
+        Mw = np.sqrt(((nodes[:,None,:] - nodes[None,:,:])**2).sum(axis=2))
 
     elif distances == 'random':
         # Init all weights uniformly at random
-        for i in range(n):
-            for j in range(i+1,n):
-                Mw[j,i] = Mw[i,j] = np.random.rand()
+        Mw[rows,cols] = np.random.rand(len(rows))
+        Mw[cols,rows] = Mw[rows,cols]
 
     # Enforce metric property, if requested
     if metric and distances != 'euc_2D':
-        # Create networkx graph G
-        G = nx.Graph()
-        G.add_nodes_from(range(n))
-        G.add_edges_from([ (i,j,{'weight':Mw[i,j]}) for i in range(n) for j in range(n) ])
-
-        for i in range(n):
-            for j in range(n):
-                if i != j:
-                    Mw[i,j] = nx.shortest_path_length(G,source=i,target=j,weight='weight')
-                else:
-                    Mw[i,j] = 0
+        Mw = metric_closure(Mw)
 
     # Connect a random sequence of nodes in order to guarantee the existence of a Hamiltonian tour
     permutation = list(np.random.permutation(n))
@@ -90,59 +151,152 @@ def create_graph(n, connectivity, distances='euc_2D', metric=True):
         Ma[i,j] = Ma[j,i] = 1
 
     # Solve
-    route = solve(Ma,Mw)
+    route = solve(Ma,Mw,scratch_dir,solver,time_limit,initial_tour=permutation)
+    exact = route is not None and is_exact(solver, n, time_limit)
     if route is None:
-        raise Exception('Unsolvable')
-    
-    return np.triu(Ma), Mw, route, nodes
+        route = [int(x) for x in permutation]
 
-def create_dataset(path, nmin, nmax, conn_min=1, conn_max=1, samples=1000, distances='euc_2D', metric=True):
+    return np.triu(Ma), Mw, route, nodes, exact
 
+def get_shard_seeds(seed, shard):
+    """
+        Seeds of Python's and Numpy's generators for a shard, derived from
+        'seed' and the shard index, so that samples only depend on 'seed' and
+        'shard_size', whatever the number of workers
+    """
+    py_seed, np_seed = np.random.SeedSequence(seed, spawn_key=(shard,)).generate_state(2)
+    return int(py_seed), int(np_seed)
+
+def get_shard_dir(path, shard, sharded):
+    return os.path.join(path, 'shard_{:05d}'.format(shard)) if sharded else path
+
+def create_shard(path, nmin, nmax, conn_min, conn_max, samples, distances, metric, seed, shard_size, sharded, solver, time_limit, output_format, deviation, shard):
+    """
+        Creates samples shard*shard_size to (shard+1)*shard_size-1, named after
+        their index, as binary instances (see instance_io), TSPLIB text files
+        (.graph) or both, depending on 'output_format'. Binary instances also
+        store the target costs of their NO and YES decision instances,
+        'deviation' below and above the cost of the tour (see
+        instance_io.get_target_costs), so one solver call labels a pair, and
+        whether the tour is optimal (see is_exact)
+
+        Concorde runs in the current directory, with its input in a scratch
+        directory of its own
+
+        Returns the number of created samples and how many of them have an
+        exact tour
+    """
+    py_seed, np_seed = get_shard_seeds(seed, shard)
+    random.seed(py_seed)
+    np.random.seed(np_seed)
+    shard_dir = get_shard_dir(path, shard, sharded)
+    os.makedirs(shard_dir, exist_ok=True)
+
+    start, end = shard*shard_size, min((shard+1)*shard_size, samples)
+    num_exact = 0
+    with tempfile.TemporaryDirectory(prefix='tsp_scratch_') as scratch_dir:
+        for i in range(start, end):
+            n = random.randint(nmin,nmax)
+            # Create graph
+            Ma,Mw,route,nodes,exact = create_graph(n, np.random.uniform(conn_min,conn_max), distances=distances, metric=metric, scratch_dir=scratch_dir, solver=solver, time_limit=time_limit)
+
+            num_exact += exact
+
+            # Write graph to file
+            if output_format in ('binary', 'both'):
+                write_instance("{}/{}{}".format(shard_dir,i,INSTANCE_SUFFIX), Ma, Mw, route=route, nodes=nodes, deviation=deviation, exact=exact)
+            if output_format in ('tsplib', 'both'):
+                write_graph(Ma,Mw, filepath="{}/{}.graph".format(shard_dir,i), route=route)
+    return end - start, num_exact
+
+def init_worker(scratch_root):
+    """
+        Moves every worker to its own directory, since Concorde writes its
+        intermediate files to the current directory
+    """
+    os.chdir(tempfile.mkdtemp(prefix='tsp_worker_', dir=scratch_root))
+
+def create_dataset(path, nmin, nmax, conn_min=1, conn_max=1, samples=1000, distances='euc_2D', metric=True,
+                   seed=None, num_workers=1, shard_size=1000, sharded=False, solver='auto', time_limit=None,
+                   output_format='tsplib', deviation=DEFAULT_DEVIATION):
+    """
+        Creates 'samples' instances in shards of 'shard_size' samples, each
+        with its own seeds (see get_shard_seeds). With num_workers > 1, shards
+        are created by a pool of processes, each running Concorde in its own
+        temporary directory. With 'sharded', every shard is written to its own
+        sub-directory of 'path'. See solve for 'solver' and 'time_limit' and
+        create_shard for 'output_format' and 'deviation'
+
+        Warns when some tours may not be optimal (see is_exact): their NO
+        labels may be wrong, so these instances are flagged and left out by
+        DecisionTspDataset
+    """
+    if not is_exact(solver, nmax, time_limit):
+        warnings.warn(
+            'Solver {} with time limit {} is not exact for instances of up to {} nodes: their tours may not be optimal, so their NO '
+            'labels may be wrong. These instances are written with exact=False and left out by DecisionTspDataset. Install Concorde '
+            'or use -nmax {} to solve all of them exactly'.format(resolve_solver(solver), time_limit, nmax, HELD_KARP_MAX_N),
+            stacklevel=2)
+    path = os.path.abspath(path)
     if not os.path.exists(path):
         os.makedirs(path)
 
     start_time = time.time()
+    num_shards = math.ceil(samples/shard_size)
+    task = partial(create_shard, path, nmin, nmax, conn_min, conn_max, samples, distances, metric, seed, shard_size, sharded, solver, time_limit, output_format, deviation)
 
-    for i in range(samples):
-        n = random.randint(nmin,nmax)
-        # Create graph
-        Ma,Mw,route,nodes = create_graph(n, np.random.uniform(conn_min,conn_max), distances=distances, metric=metric)
-
-        # Write graph to file
-        write_graph(Ma,Mw, filepath="{}/{}.graph".format(path,i), route=route)
-
+    def report(done):
         # Report progress
-        if (i-1) % (samples//20) == 0:
-            elapsed_time = time.time() - start_time
-            remaining_time = (samples-i)*elapsed_time/(i+1)
-            print('Dataset creation {}% Complete. Remaining time at this rate: {}'.format(int(100*i/samples), str(datetime.timedelta(seconds=remaining_time))), flush=True)
+        elapsed_time = time.time() - start_time
+        remaining_time = (samples-done)*elapsed_time/done
+        print('Dataset creation {}% Complete. Remaining time at this rate: {}'.format(int(100*done/samples), str(datetime.timedelta(seconds=remaining_time))), flush=True)
+
+    done = num_exact = 0
+    if num_workers > 1:
+        with tempfile.TemporaryDirectory(prefix='tsp_workers_') as scratch_root:
+            with multiprocessing.Pool(num_workers, initializer=init_worker, initargs=(scratch_root,)) as pool:
+                for shard_samples, shard_exact in pool.imap_unordered(task, range(num_shards)):
+                    done += shard_samples
+                    num_exact += shard_exact
+                    report(done)
+    else:
+        for shard in range(num_shards):
+            shard_samples, shard_exact = task(shard)
+            done += shard_samples
+            num_exact += shard_exact
+            report(done)
+    if num_exact < done:
+        warnings.warn('{} of {} instances have a tour that may not be optimal (exact=False)'.format(done-num_exact, done))
 
 def write_graph(Ma, Mw, filepath, route=None, int_weights=False, bins=10**6):
-    with open(filepath,"w") as out:
+    """
+        Writes an instance in TSPLIB text format, as read by Concorde. Lines
+        are formatted a whole row at a time; see instance_io.write_instance
+        for the compact binary format
+    """
+    n = Ma.shape[0]
+    sources, targets = np.nonzero(Ma)
+    # Matrix cells as text; inexistent edges get a placeholder weight
+    if int_weights:
+        cells = np.where(Ma == 1, (bins*Mw).astype(np.int64).astype(str), str(n*bins+1))
+    else:
+        cells = np.where(Ma == 1, Mw.astype(str), '0')
 
-        n, m = Ma.shape[0], len(np.nonzero(Ma)[0])
+    with open(filepath,"w") as out:
         out.write('TYPE : TSP\n')
         out.write('DIMENSION: {n}\n'.format(n = n))
         out.write('EDGE_DATA_FORMAT: EDGE_LIST\n')
         out.write('EDGE_WEIGHT_TYPE: EXPLICIT\n')
         out.write('EDGE_WEIGHT_FORMAT: FULL_MATRIX \n')
-        
+
         # List edges in the (generally not complete) graph
         out.write('EDGE_DATA_SECTION:\n')
-        for (i,j) in zip(list(np.nonzero(Ma))[0], list(np.nonzero(Ma))[1]):
-            out.write("{} {}\n".format(i,j))
+        out.write(''.join('{} {}\n'.format(i,j) for (i,j) in zip(sources.tolist(), targets.tolist())))
         out.write('-1\n')
 
         # Write edge weights as a complete matrix
         out.write('EDGE_WEIGHT_SECTION:\n')
-        for i in range(n):
-            for j in range(n):
-                if Ma[i,j] == 1:
-                    out.write(str( int(bins*Mw[i,j]) if int_weights else Mw[i,j]))
-                else:
-                    out.write(str(n*bins+1 if int_weights else 0))
-                out.write(' ')
-            out.write('\n')
+        out.write(''.join(' '.join(row) + ' \n' for row in cells.tolist()))
 
         if route is not None:
             # Write route
@@ -165,6 +319,13 @@ if __name__ == '__main__':
     parser.add_argument('-cmin', default=1, type=float, help='Min. connectivity')
     parser.add_argument('-cmax', default=1, type=float, help='Max. connectivity')
     parser.add_argument('-bins', default=10**6, help='Quantize edge weights in how many bins?')
+    parser.add_argument('-workers', default=1, type=int, help='How many processes create shards in parallel?')
+    parser.add_argument('-shard_size', default=1000, type=int, help='How many samples per shard? Every shard has its own seeds')
+    parser.add_argument('-solver', default='auto', choices=SOLVER_CHOICES, help='Which TSP solver? (auto uses Concorde if installed, builtin otherwise)')
+    parser.add_argument('-time_limit', default=None, type=float, help='Time limit of the solver per instance, in seconds')
+    parser.add_argument('-format', default='tsplib', choices=('binary', 'tsplib', 'both'), help='Write instances as binary .tsp.npz files (read by DecisionTspDataset), TSPLIB .graph files or both?')
+    parser.add_argument('-deviation', default=DEFAULT_DEVIATION, type=float, help='Relative deviation of the NO/YES target costs from the optimal cost')
+    parser.add_argument('--sharded', action='store_true', help='Write every shard to its own sub-directory of the save path?')
 
     # Parse arguments from command line
     args = parser.parse_args()
@@ -174,5 +335,15 @@ if __name__ == '__main__':
         vars(args)['path'],
         vars(args)['nmin'], vars(args)['nmax'],
         vars(args)['cmin'], vars(args)['cmax'],
-        samples=vars(args)['samples']
+        samples=vars(args)['samples'],
+        distances=vars(args)['distances'],
+        metric=vars(args)['metric'],
+        seed=vars(args)['seed'],
+        num_workers=vars(args)['workers'],
+        shard_size=vars(args)['shard_size'],
+        sharded=vars(args)['sharded'],
+        solver=vars(args)['solver'],
+        time_limit=vars(args)['time_limit'],
+        output_format=vars(args)['format'],
+        deviation=vars(args)['deviation']
     )
\ No newline at end of file
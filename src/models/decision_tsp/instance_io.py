@@ -0,0 +1,131 @@
+import os, mmap, zipfile
+import numpy as np
+
+INSTANCE_SUFFIX = '.tsp.npz'
+# Deviation of the target costs from the optimal cost in decision instances
+DEFAULT_DEVIATION = 0.02
+
+
+def get_target_costs(cost, deviation=DEFAULT_DEVIATION):
+    """
+        Target costs of the two decision instances derived from an optimal
+        cost: no tour costs at most cost*(1-deviation) (NO, label 0), and there
+        is one that costs at most cost*(1+deviation) (YES, label 1). Labels
+        are only exact if the tour is optimal (not guaranteed by the local
+        search of tsp_solvers; see the 'exact' flag of write_instance)
+    """
+    return cost*(1-deviation), cost*(1+deviation)
+
+def write_instance(filepath, Ma, Mw, route=None, nodes=None, deviation=None, exact=None):
+    """
+        Writes an instance as an uncompressed .npz file with arrays:
+        - n: number of nodes
+        - edges: int32 array of shape (m,2), existing edges (i,j) with i<j,
+          in row-major order
+        - weights: float64 array of the n(n-1)/2 weights Mw[i,j], i<j, in
+          row-major order (Mw is symmetric, with a zero diagonal)
+        - route: int32 tour, if given
+        - nodes: float64 coordinates of shape (n,2), if given (euc_2D)
+        - cost and target_costs: float64 cost of the route and the target
+          costs of its NO and YES decision instances (see get_target_costs),
+          if a route and a deviation are given. Both decision instances share
+          the matrices of the file
+        - exact: bool, whether the route is known to be optimal, if given.
+          Instances without it are assumed exact
+
+        The file is written atomically
+    """
+    n = Ma.shape[0]
+    rows, cols = np.triu_indices(n, 1)
+    existing = Ma[rows,cols] != 0
+    arrays = {
+        'n': np.array(n, dtype=np.int64),
+        'edges': np.stack((rows[existing], cols[existing]), axis=1).astype(np.int32),
+        'weights': np.ascontiguousarray(Mw[rows,cols], dtype=np.float64),
+    }
+    if route is not None:
+        arrays['route'] = np.asarray(route, dtype=np.int32)
+        if deviation is not None:
+            cost = Mw[arrays['route'], np.roll(arrays['route'], -1)].sum()
+            arrays['cost'] = np.array(cost, dtype=np.float64)
+            arrays['target_costs'] = np.array(get_target_costs(cost, deviation), dtype=np.float64)
+    if exact is not None:
+        arrays['exact'] = np.array(exact, dtype=bool)
+    if nodes is not None:
+        arrays['nodes'] = np.ascontiguousarray(nodes, dtype=np.float64)
+
+    tmp_path = filepath + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_path, filepath)
+
+def read_instance(filepath):
+    """
+        Reads an instance written by write_instance without copying its
+        arrays: the file is memory-mapped and every array is a read-only view
+        of its bytes in the file (the members of the .npz are stored
+        uncompressed)
+
+        Returns a dict with the arrays of write_instance
+    """
+    with open(filepath, 'rb') as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    arrays = {}
+    with zipfile.ZipFile(filepath) as archive:
+        for info in archive.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError('{} is compressed; instances must be written by write_instance'.format(filepath))
+            # Local file header: 30 bytes, then the file name and the extra field
+            name_length = int.from_bytes(buffer[info.header_offset+26:info.header_offset+28], 'little')
+            extra_length = int.from_bytes(buffer[info.header_offset+28:info.header_offset+30], 'little')
+            start = info.header_offset + 30 + name_length + extra_length
+            arrays[info.filename[:-len('.npy')]] = read_npy_view(buffer, start)
+    arrays['n'] = int(arrays['n'])
+    if 'cost' in arrays:
+        arrays['cost'] = float(arrays['cost'])
+    if 'exact' in arrays:
+        arrays['exact'] = bool(arrays['exact'])
+    return arrays
+
+def read_npy_view(buffer, start):
+    """
+        Array stored in .npy format at offset 'start' of 'buffer', as a view
+    """
+    stream = memoryview(buffer)[start:]
+    header = _BufferReader(stream)
+    version = np.lib.format.read_magic(header)
+    if version == (1, 0):
+        shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(header)
+    else:
+        shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(header)
+    count = int(np.prod(shape, dtype=np.int64))
+    array = np.frombuffer(stream, dtype=dtype, count=count, offset=header.position)
+    return array.reshape(shape, order='F' if fortran_order else 'C')
+
+class _BufferReader:
+    """
+        File-like reader over a memoryview, for Numpy's .npy header parser
+    """
+    def __init__(self, view):
+        self.view = view
+        self.position = 0
+
+    def read(self, size):
+        data = self.view[self.position:self.position+size].tobytes()
+        self.position += len(data)
+        return data
+
+def to_matrices(instance):
+    """
+        Dense adjacency and weight matrices of an instance, like the ones
+        returned by create_graph (Ma only has its upper triangle)
+    """
+    n = instance['n']
+    Ma = np.zeros((n,n))
+    edges = instance['edges']
+    Ma[edges[:,0],edges[:,1]] = 1
+    Mw = np.zeros((n,n))
+    rows, cols = np.triu_indices(n, 1)
+    Mw[rows,cols] = instance['weights']
+    Mw[cols,rows] = instance['weights']
+    return Ma, Mw
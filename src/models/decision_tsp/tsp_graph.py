@@ -0,0 +1,124 @@
+import numpy as np
+import torch
+from torch_geometric.data import HeteroData
+from instance_io import DEFAULT_DEVIATION, get_target_costs
+
+# Operator features: one-hot encoding of the operation
+OPERATORS = ('sum', 'mul')
+# Constraint features: one-hot encoding of the relation
+RELATIONS = ('le', 'eq')
+# Index of the target cost in the constant nodes, counted from the end
+TARGET_CONSTANT = -2
+
+
+def triu_index(i, j, n):
+    """
+        Position of the pairs (i,j), i<j, in the row-major upper triangle of
+        an n×n matrix; e.g. in the weights of instance_io.write_instance
+    """
+    return i*n - i*(i+1)//2 + (j-i-1)
+
+def get_edge_weights(instance, i, j):
+    i, j = np.minimum(i, j), np.maximum(i, j)
+    return np.asarray(instance['weights'])[triu_index(i, j, instance['n'])]
+
+def get_optimal_cost(instance):
+    """
+        Cost of the tour stored with an instance
+    """
+    if 'cost' in instance:
+        return instance['cost']
+    route = np.asarray(instance['route'], dtype=np.int64)
+    return float(get_edge_weights(instance, route, np.roll(route, -1)).sum())
+
+def get_instance_target_costs(instance, deviation=None):
+    """
+        Target costs of the NO and YES decision instances of an instance: the
+        ones stored by the generator if deviation is None, otherwise (or if
+        none are stored) derived from the optimal cost; see get_target_costs
+    """
+    if deviation is None and 'target_costs' in instance:
+        return tuple(np.asarray(instance['target_costs']).tolist())
+    return get_target_costs(get_optimal_cost(instance), DEFAULT_DEVIATION if deviation is None else deviation)
+
+def build_graph_arrays(instance):
+    """
+        Arrays of the graph of "is there a tour of cost at most C?" for an
+        instance, with the target cost C left at 0. Every edge e=(i,j) of the
+        instance is a boolean variable x_e:
+        - variable: x_e, connected to both values
+        - value: 0 and 1
+        - constant: the weight of every edge, the target cost C and 2
+        - operator: w_e*x_e for every edge (mul), the tour cost (sum of the
+          products) and the degree of every node (sum of the x_e of its edges)
+        - constraint: cost <= C (first) and degree == 2 for every node
+        Edges go from the inputs of an operator or a constraint to it, and
+        from variables to their values
+
+        Returns:
+            features: {node_type: float32 array}
+            edges: {edge_type: int64 array of shape (2,num_edges)}
+    """
+    n = int(instance['n'])
+    instance_edges = np.asarray(instance['edges'], dtype=np.int64)
+    m = len(instance_edges)
+    variables = np.arange(m)
+
+    features = {
+        'variable': np.ones((m,1), dtype=np.float32),
+        'value': np.array([[0],[1]], dtype=np.float32),
+        'constant': np.concatenate((get_edge_weights(instance, instance_edges[:,0], instance_edges[:,1]), [0, 2])).astype(np.float32)[:,None],
+        'operator': np.zeros((m+1+n, len(OPERATORS)), dtype=np.float32),
+        'constraint': np.zeros((1+n, len(RELATIONS)), dtype=np.float32),
+    }
+    # Operators: m products, the cost, then n degrees
+    features['operator'][:m, OPERATORS.index('mul')] = 1
+    features['operator'][m:, OPERATORS.index('sum')] = 1
+    features['constraint'][0, RELATIONS.index('le')] = 1
+    features['constraint'][1:, RELATIONS.index('eq')] = 1
+
+    cost, degrees = m, m+1
+    edges = {
+        ('variable','connected_to','value'): np.stack((np.repeat(variables, 2), np.tile([0,1], m))),
+        ('variable','connected_to','operator'): np.concatenate((
+            np.stack((variables, variables)),
+            np.stack((np.repeat(variables, 2), degrees + instance_edges.ravel())),
+        ), axis=1),
+        ('constant','connected_to','operator'): np.stack((variables, variables)),
+        ('operator','connected_to','operator'): np.stack((variables, np.full(m, cost))),
+        ('operator','connected_to','constraint'): np.stack((np.arange(cost, cost+1+n), np.arange(1+n))),
+        ('constant','connected_to','constraint'): np.stack((np.concatenate(([m], np.full(n, m+1))), np.arange(1+n))),
+    }
+    return features, {edge_type: edge_index.astype(np.int64) for edge_type, edge_index in edges.items()}
+
+def assemble_graph(features, edges, target_cost, label):
+    """
+        HeteroData graph from the arrays of build_graph_arrays, for a target
+        cost and its label (1 if there is a tour of cost at most target_cost).
+        Every edge type gets its reverse ('rev_' relation), and edges between
+        operators are made undirected, like T.ToUndirected does
+    """
+    data = HeteroData()
+    for node_type, x in features.items():
+        data[node_type].x = torch.from_numpy(np.array(x, dtype=np.float32))
+    data['constant'].x[TARGET_CONSTANT] = target_cost
+    data['variable'].y = torch.Tensor([[0, 1] if label else [1, 0]])
+
+    for (source, relation, target), edge_index in edges.items():
+        edge_index = torch.from_numpy(np.array(edge_index, dtype=np.int64))
+        if source == target:
+            edge_index = torch.cat((edge_index, edge_index.flip([0])), dim=1)
+        data[source, relation, target].edge_index = edge_index
+    for (source, relation, target), edge_index in edges.items():
+        if source != target:
+            data[target, f"rev_{relation}", source].edge_index = data[source, relation, target].edge_index.flip([0])
+    return data
+
+def build_decision_graphs(instance, deviation=None):
+    """
+        Graphs of the NO (label 0) and YES (label 1) decision instances
+        around the optimal cost of an instance; see get_instance_target_costs
+    """
+    features, edges = build_graph_arrays(instance)
+    targets = get_instance_target_costs(instance, deviation)
+    return [assemble_graph(features, edges, target, label) for label, target in enumerate(targets)]
@@ -0,0 +1,220 @@
+import time
+import numpy as np
+
+# Largest instance solved exactly by the 'builtin' solver; Held-Karp needs O(2^n n) memory
+HELD_KARP_MAX_N = 16
+# Number of nearest neighbors considered by every local search move
+NUM_NEIGHBORS = 10
+# Longest segment moved by Or-opt
+OR_OPT_MAX_SEGMENT = 3
+# Number of perturbed restarts of the local search
+NUM_RESTARTS = 20
+EPSILON = 1e-12
+
+
+def penalized_weights(Ma, Mw):
+    """
+        Complete weight matrix where inexistent edges cost more than any tour
+        made of existing edges, so that a tour using one of them is only
+        chosen when no Hamiltonian tour exists (see solve)
+    """
+    n = Ma.shape[0]
+    penalty = n*max(Mw[Ma == 1].max(initial=0), 1) + 1
+    W = np.where(Ma == 1, Mw, penalty)
+    np.fill_diagonal(W, 0)
+    return W
+
+def tour_length(W, tour):
+    tour = np.asarray(tour)
+    return W[tour, np.roll(tour, -1)].sum()
+
+def held_karp(W, time_limit=None, initial_tour=None):
+    """
+        Exact dynamic programming solver. dp[S,j] is the length of the
+        shortest path starting at node 0, visiting the nodes of S and ending at
+        j. All subsets of the same size are computed at once, one end node at a
+        time. 'initial_tour' is ignored
+
+        Instances larger than HELD_KARP_MAX_N nodes are rejected, since memory
+        and time grow as 2^n
+    """
+    n = W.shape[0]
+    if n > HELD_KARP_MAX_N:
+        raise ValueError('Held-Karp is limited to {} nodes, got {}; use local_search or Concorde'.format(HELD_KARP_MAX_N, n))
+    if n <= 3:
+        return list(range(n))
+    m = n-1
+    full = 1 << m
+    masks = np.arange(full)
+    popcount = np.zeros(full, dtype=np.int64)
+    for j in range(m):
+        popcount += (masks >> j) & 1
+
+    dp = np.full((full,m), np.inf)
+    parent = np.zeros((full,m), dtype=np.min_scalar_type(m-1))
+    dp[1 << np.arange(m), np.arange(m)] = W[0,1:]
+    for size in range(2, m+1):
+        sized = masks[popcount == size]
+        for j in range(m):
+            S = sized[(sized >> j) & 1 == 1]
+            # dp[S \ {j}, j] is infinite, so j is never its own predecessor
+            costs = dp[S ^ (1 << j)] + W[1:,j+1]
+            best = costs.argmin(axis=1)
+            dp[S,j] = costs[np.arange(len(S)), best]
+            parent[S,j] = best
+
+    # Walk back from the best last node
+    j = int((dp[full-1] + W[1:,0]).argmin())
+    mask = full-1
+    tour = []
+    while mask:
+        tour.append(j+1)
+        mask, j = mask ^ (1 << j), int(parent[mask,j])
+    return [0] + tour[::-1]
+
+def nearest_neighbor_tour(W, start=0):
+    n = W.shape[0]
+    visited = np.zeros(n, dtype=bool)
+    tour = [start]
+    visited[start] = True
+    for _ in range(n-1):
+        costs = np.where(visited, np.inf, W[tour[-1]])
+        tour.append(int(costs.argmin()))
+        visited[tour[-1]] = True
+    return tour
+
+def two_opt(W, tour, neighbors, deadline=None):
+    """
+        Replaces edges (a,succ(a)) and (c,succ(c)) by (a,c) and
+        (succ(a),succ(c)), for c among the nearest neighbors of a, until no
+        such move shortens the tour. Returns whether the tour changed
+    """
+    n = len(tour)
+    pos = np.empty(n, dtype=np.int64)
+    pos[tour] = np.arange(n)
+    changed = False
+    improved = True
+    while improved and (deadline is None or time.time() < deadline):
+        improved = False
+        for i in range(n):
+            a, b = tour[i], tour[(i+1) % n]
+            for c in neighbors[a]:
+                j = pos[c]
+                d = tour[(j+1) % n]
+                if c == b or d == a:
+                    continue
+                if W[a,b] + W[c,d] - W[a,c] - W[b,d] > EPSILON:
+                    # Reverse the path from b to c
+                    lo, hi = (i+1, j) if i < j else (j+1, i)
+                    tour[lo:hi+1] = tour[lo:hi+1][::-1]
+                    pos[tour[lo:hi+1]] = np.arange(lo, hi+1)
+                    improved = changed = True
+                    break
+    return changed
+
+def or_opt(W, tour, neighbors, deadline=None):
+    """
+        Moves segments of up to OR_OPT_MAX_SEGMENT nodes, possibly reversed,
+        next to a nearest neighbor of one of their ends, until no such move
+        shortens the tour. Returns whether the tour changed
+    """
+    n = len(tour)
+    changed = False
+    improved = True
+    while improved and (deadline is None or time.time() < deadline):
+        improved = False
+        for length in range(1, min(OR_OPT_MAX_SEGMENT, n-3)+1):
+            for i in range(n):
+                segment = [tour[(i+k) % n] for k in range(length)]
+                p, q = tour[i-1], tour[(i+length) % n]
+                first, last = segment[0], segment[-1]
+                removal_gain = W[p,first] + W[last,q] - W[p,q]
+                rest = [x for x in tour if x not in segment]
+                rest_pos = {x: k for k, x in enumerate(rest)}
+                best = None
+                for c in set(neighbors[first]) | set(neighbors[last]):
+                    if c in segment:
+                        continue
+                    k = rest_pos[c]
+                    d = rest[(k+1) % len(rest)]
+                    for inserted in (segment, segment[::-1]):
+                        gain = removal_gain - (W[c,inserted[0]] + W[inserted[-1],d] - W[c,d])
+                        if gain > EPSILON and (best is None or gain > best[0]):
+                            best = (gain, k, inserted)
+                if best is not None:
+                    _, k, inserted = best
+                    tour[:] = rest[:k+1] + inserted + rest[k+1:]
+                    improved = changed = True
+                    break
+            if improved:
+                break
+    return changed
+
+def improve_tour(W, tour, neighbors, deadline=None):
+    while two_opt(W, tour, neighbors, deadline) | or_opt(W, tour, neighbors, deadline):
+        if deadline is not None and time.time() >= deadline:
+            break
+    return tour
+
+def double_bridge(tour, rng):
+    """
+        Splits the tour into 4 segments A B C D and reconnects them as A C B
+        D, a move that 2-opt and Or-opt cannot undo in one step
+    """
+    i, j, k = np.sort(rng.choice(np.arange(1, len(tour)), size=3, replace=False))
+    return tour[:i] + tour[j:k] + tour[i:j] + tour[k:]
+
+def local_search(W, time_limit=None, initial_tour=None, num_neighbors=NUM_NEIGHBORS, num_restarts=NUM_RESTARTS, seed=0):
+    """
+        Heuristic solver: nearest neighbor tour improved by 2-opt and Or-opt
+        moves restricted to neighbor lists, then 'num_restarts' times perturbed
+        by a double bridge move (see double_bridge) and improved again, keeping
+        the shortest tour, or until 'time_limit' seconds have passed. Restarts
+        draw from their own generator, seeded with 'seed'
+
+        If the result is longer than 'initial_tour', the search starts over
+        from 'initial_tour'. Moves never lengthen a tour, so the result is then
+        at most as long as 'initial_tour': with the weights of
+        penalized_weights, a Hamiltonian 'initial_tour' guarantees a
+        Hamiltonian result, even when the search from the nearest neighbor
+        tour gets stuck on inexistent edges (common on sparse graphs)
+
+        Tours are usually, but not always, optimal. The NO label of a decision
+        instance is only correct if its tour is optimal (see
+        instance_io.get_target_costs), so instances solved by local search
+        must be flagged exact=False and never used as NO instances; see
+        instance_generator.is_exact
+    """
+    n = W.shape[0]
+    if n <= 3:
+        return list(range(n))
+    deadline = None if time_limit is None else time.time() + time_limit
+    neighbors = np.argsort(W + np.diag(np.full(n, np.inf)), axis=1, kind='stable')[:,:min(num_neighbors, n-1)].tolist()
+    tour = improve_tour(W, nearest_neighbor_tour(W), neighbors, deadline)
+    if initial_tour is not None and tour_length(W, tour) > tour_length(W, initial_tour):
+        tour = improve_tour(W, [int(x) for x in initial_tour], neighbors, deadline)
+
+    rng = np.random.RandomState(seed)
+    length = tour_length(W, tour)
+    for _ in range(num_restarts):
+        if deadline is not None and time.time() >= deadline:
+            break
+        candidate = improve_tour(W, double_bridge(tour, rng), neighbors, deadline)
+        candidate_length = tour_length(W, candidate)
+        if candidate_length < length - EPSILON:
+            tour, length = candidate, candidate_length
+    return tour
+
+def builtin(W, time_limit=None, initial_tour=None):
+    """
+        Held-Karp for up to HELD_KARP_MAX_N nodes, local search otherwise
+    """
+    if W.shape[0] <= HELD_KARP_MAX_N:
+        return held_karp(W)
+    return local_search(W, time_limit, initial_tour)
+
+SOLVERS = {
+    'builtin': builtin,
+    'held_karp': held_karp,
+    'local_search': local_search,
+}
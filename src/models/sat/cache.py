@@ -0,0 +1,75 @@
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional
+from torch_geometric.data import HeteroData
+
+
+def graph_nbytes(data:HeteroData) -> int:
+    """Number of bytes used by the tensors of a graph
+    """
+    nbytes = 0
+    for store in data.stores:
+        for value in store.values():
+            if hasattr(value, "element_size"):
+                nbytes += value.numel() * value.element_size()
+    return nbytes
+
+
+class GraphCache:
+    """
+    Least recently used cache of graphs, bounded by the number of bytes of their tensors. Entries are not pickled, so
+    every DataLoader worker starts with its own empty cache.
+    """
+    def __init__(self, max_bytes:int):
+        """
+        Args:
+            max_bytes (int): once the cached graphs use more than max_bytes, least recently used graphs are evicted
+        """
+        self.max_bytes = max_bytes
+        self._reset()
+
+    def _reset(self):
+        self.entries = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["entries"] = OrderedDict()
+        state["nbytes"] = 0
+        return state
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key:Hashable) -> Optional[HeteroData]:
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key:Hashable, data:HeteroData):
+        nbytes = graph_nbytes(data)
+        if nbytes > self.max_bytes:
+            return
+        if key in self.entries:
+            self.nbytes -= self.entries.pop(key)[1]
+        self.entries[key] = (data, nbytes)
+        self.nbytes += nbytes
+        while self.nbytes > self.max_bytes:
+            _, (_, evicted_nbytes) = self.entries.popitem(last=False)
+            self.nbytes -= evicted_nbytes
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        requests = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / requests if requests else 0.0,
+            "entries": len(self.entries),
+            "nbytes": self.nbytes,
+        }
@@ -0,0 +1,125 @@
+import os
+from itertools import chain
+from typing import List, Tuple
+import numpy as np
+
+CORPUS_SUFFIX = ".corpus.npz"
+
+
+def is_corpus(filepath:str) -> bool:
+    return filepath.endswith(CORPUS_SUFFIX)
+
+
+def flatten_clauses(clauses) -> Tuple[np.ndarray, np.ndarray]:
+    """Flatten clauses into one literal array and clause offsets. The literals of clause i are literals[offsets[i]:offsets[i+1]].
+    Lives here, with the NumPy-only corpus code, so that the generator can use it; sat_parser re-exports it.
+
+    Args:
+        clauses (List): clauses of a CNF problem, as lists of literals (e.g. the iclauses of gen_sr_dimacs.py) or sat_parser.Clause
+
+    Returns:
+        literals (np.ndarray): int32 array containing the literals of every clause, in clause order
+        offsets (np.ndarray): int64 array of size len(clauses) + 1
+    """
+    clauses = [getattr(clause, "variables", clause) for clause in clauses]
+    lengths = np.fromiter((len(clause) for clause in clauses), dtype=np.int64, count=len(clauses))
+    offsets = np.zeros(len(clauses) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    literals = np.fromiter(chain.from_iterable(clauses), dtype=np.int32, count=int(offsets[-1]))
+    return literals, offsets
+
+
+class CorpusWriter:
+    """
+    Writes CNF problems to a binary corpus file instead of one DIMACS file per problem. A corpus is an uncompressed .npz
+    file holding:
+    - literals: int32 literals of every clause of every problem
+    - clause_offsets: int64 array of size num_clauses + 1; the literals of clause j are literals[clause_offsets[j]:clause_offsets[j+1]]
+    - instance_offsets: int64 array of size num_problems + 1; the clauses of problem i are clauses instance_offsets[i] to instance_offsets[i+1] - 1
+    - labels: int8 satisfiability label of every problem
+    - pair_ids: int64 id shared by the problems of a SAT/UNSAT pair
+    - num_variables: int32 number of variables of every problem
+    """
+    def __init__(self, path:str):
+        """
+        Args:
+            path (str): corpus file, ending with .corpus.npz
+        """
+        if not is_corpus(path):
+            raise ValueError(f"Corpus files must end with {CORPUS_SUFFIX}: {path}")
+        self.path = path
+        self.literals = []
+        self.clause_lengths = []
+        self.instance_lengths = []
+        self.labels = []
+        self.pair_ids = []
+        self.num_variables = []
+
+    def add(self, n_vars:int, iclauses:List[List[int]], is_sat:int, pair_id:int):
+        literals, offsets = flatten_clauses(iclauses)
+        self.literals.append(literals)
+        self.clause_lengths.append(np.diff(offsets))
+        self.instance_lengths.append(len(iclauses))
+        self.labels.append(is_sat)
+        self.pair_ids.append(pair_id)
+        self.num_variables.append(n_vars)
+
+    def close(self):
+        """Write the corpus atomically
+        """
+        clause_lengths = np.concatenate(self.clause_lengths) if self.clause_lengths else np.zeros(0, dtype=np.int64)
+        clause_offsets = np.zeros(len(clause_lengths) + 1, dtype=np.int64)
+        np.cumsum(clause_lengths, out=clause_offsets[1:])
+        instance_offsets = np.zeros(len(self.instance_lengths) + 1, dtype=np.int64)
+        np.cumsum(self.instance_lengths, out=instance_offsets[1:])
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                literals=np.concatenate(self.literals) if self.literals else np.zeros(0, dtype=np.int32),
+                clause_offsets=clause_offsets,
+                instance_offsets=instance_offsets,
+                labels=np.array(self.labels, dtype=np.int8),
+                pair_ids=np.array(self.pair_ids, dtype=np.int64),
+                num_variables=np.array(self.num_variables, dtype=np.int32),
+            )
+        os.replace(tmp_path, self.path)
+
+
+class Corpus:
+    """
+    Problems of a corpus file written by CorpusWriter. Only depends on NumPy, like the writer, so the generator does not need
+    the graph libraries.
+    """
+    def __init__(self, path:str):
+        with np.load(path, allow_pickle=False) as f:
+            self.arrays = {key: f[key] for key in f.files}
+        self.labels = self.arrays["labels"]
+        self.pair_ids = self.arrays["pair_ids"]
+
+    def __len__(self):
+        return len(self.labels)
+
+    def get_instance(self, idx:int) -> Tuple[np.ndarray, np.ndarray, int]:
+        """Literals, clause offsets (starting at 0) and label of a problem; see sat_parser.CNF
+        """
+        clause_offsets = self.arrays["clause_offsets"]
+        instance_offsets = self.arrays["instance_offsets"]
+        offsets = clause_offsets[instance_offsets[idx]:instance_offsets[idx + 1] + 1]
+        literals = self.arrays["literals"][offsets[0]:offsets[-1]]
+        return literals, offsets - offsets[0], int(self.labels[idx])
+
+    def get_pairs(self) -> List[List[int]]:
+        """Indices of the problems of every pair, in order of first appearance
+        """
+        pairs = {}
+        for idx, pair_id in enumerate(self.pair_ids.tolist()):
+            pairs.setdefault(pair_id, []).append(idx)
+        return list(pairs.values())
+
+
+def read_corpus_labels(path:str) -> np.ndarray:
+    """Labels of the problems of a corpus, without loading the problems
+    """
+    with np.load(path, allow_pickle=False) as f:
+        return f["labels"]
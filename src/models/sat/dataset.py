@@ -4,12 +4,32 @@ from torch_geometric.data import Dataset
 import torch_geometric
 from torch_geometric.data.makedirs import makedirs
 from tqdm import tqdm
-from sat_parser import parse_dimacs_cnf
+from sat_parser import CNF, parse_dimacs_cnf, get_label_from_filename
+from manifest import Manifest
+from shards import ShardReader, ShardWriter
+from cache import GraphCache
+from dtypes import LABEL_DTYPE, compact_graph, upcast_graph
+from simplify import simplify_cnf
+from reorder import REORDER_METHODS, reorder_graph
+from corpus import Corpus, is_corpus, read_corpus_labels
 import re
 import os
 import sys
+import glob
+import shutil
+import hashlib
 import warnings
 import random
+import multiprocessing
+import numpy as np
+
+GRAPH_BUILDERS = {
+    "base": CNF.build_heterogeneous_graph,
+    "modified": CNF.build_sat_specific_heterogeneous_graph,
+    "refactored": CNF.build_generic_heterogeneous_graph,
+}
+FILES_PER_PART = 1000
+SIMPLIFY_PREFIX = "simplify_"
 
 def files_exist(files: List[str]) -> bool:
     # NOTE: We return `False` in case `files` is empty, leading to a
@@ -22,8 +42,196 @@ def _repr(obj) -> str:
         return 'None'
     return re.sub('(<.*?)\\s.*(>)', r'\1\2', obj.__repr__())
 
+
+def build_graph(cnf:CNF, graph_type:str):
+    return GRAPH_BUILDERS[graph_type](cnf)
+
+
+def hash_file(filepath:str) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    with open(filepath, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def delete_path(path:str):
+    """Delete a graph file or a shard directory, if it exists
+    """
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    elif os.path.exists(path):
+        os.remove(path)
+
+
+def get_entry_keys(manifest:Manifest):
+    """Sources and items of the entries of a manifest, which identify the entries of a part
+    """
+    items = manifest.columns.get("item", np.zeros(len(manifest), dtype=np.int64))
+    return manifest.columns["source"].tolist(), items.tolist()
+
+
+def scan_files(directory:str):
+    """Files of a directory and of its sub-directories; e.g. the shard directories written by gen_sr_dimacs.py --sharded
+    """
+    for entry in os.scandir(directory):
+        if entry.is_dir():
+            yield from scan_files(entry.path)
+        else:
+            yield entry
+
+
+def get_part_name(raw_paths:List[str]) -> str:
+    """Name a part after the names, sizes and modification times of its raw files, so re-running an interrupted
+    processing step on the same files reuses the same name
+    """
+    h = hashlib.blake2b(digest_size=8)
+    for filepath in raw_paths:
+        stat = os.stat(filepath)
+        h.update(f"{os.path.basename(filepath)}:{stat.st_size}:{stat.st_mtime_ns}\n".encode())
+    return f"part_{h.hexdigest()}"
+
+
+def get_part_manifest_path(processed_dir:str, part_name:str, graph_type:str) -> str:
+    return os.path.join(processed_dir, "parts", f"{part_name}.{graph_type}.npz")
+
+
+def get_pair_key(filepath:str) -> str:
+    """Name shared by the SAT and UNSAT files of a pair written by gen_sr_dimacs.py; i.e. the file name without its label
+    """
+    return re.sub(r"_sat=\d", "", os.path.basename(filepath))
+
+
+def group_pairs(raw_paths:List[str]) -> List[List[int]]:
+    """Group the indices of raw files that belong to the same SAT/UNSAT pair, in order of first appearance
+    """
+    groups = {}
+    for i, filepath in enumerate(raw_paths):
+        groups.setdefault(get_pair_key(filepath), []).append(i)
+    return list(groups.values())
+
+
+def build_pair_graphs(cnfs:List[CNF], graph_types:List[str]) -> List[dict]:
+    """Build the graphs of problems that usually share most of their clauses, like the two problems of a pair. The common
+    clauses are processed once and the tensors the graphs have in common are shared; see sat_parser.GraphPrefix.
+
+    Returns:
+        one {graph_type: graph} dict per problem
+    """
+    if len(cnfs) == 1:
+        return [{graph_type: build_graph(cnfs[0], graph_type) for graph_type in graph_types}]
+    num_common_clauses = min(cnfs[0].common_prefix_length(cnf) for cnf in cnfs[1:])
+    prefix = cnfs[0].graph_prefix(num_common_clauses, graph_types)
+    return [{graph_type: prefix.build(cnf, graph_type) for graph_type in graph_types} for cnf in cnfs]
+
+
+def prepare_cnf(cnf:CNF, simplify:bool=False):
+    """Simplify a problem if requested
+
+    Returns:
+        cnf (CNF): the problem
+        stats (dict): simplification statistics; empty if simplify is False
+    """
+    if not simplify:
+        return cnf, {}
+    return simplify_cnf(cnf)
+
+
+def get_required_label(filepath:str) -> int:
+    """Label of a raw DIMACS file, from its name; SatDataset needs the label of every problem
+    """
+    label = get_label_from_filename(filepath)
+    if label is None:
+        raise ValueError(f"No satisfiability label ('sat=0' or 'sat=1') found in the name of {filepath}; SatDataset needs labelled problems")
+    return label
+
+
+def load_cnf(filepath:str, simplify:bool=False):
+    """Parse a raw DIMACS file, then simplify the problem if requested; see prepare_cnf
+    """
+    return prepare_cnf(parse_dimacs_cnf(filepath, is_sat=get_required_label(filepath)), simplify)
+
+
+def count_problems(filepath:str) -> int:
+    """Number of problems in a raw file: one for a DIMACS file, more for a binary corpus (see corpus.CorpusWriter)
+    """
+    return len(read_corpus_labels(filepath)) if is_corpus(filepath) else 1
+
+
+def load_problem_groups(raw_paths:List[str], simplify:bool=False):
+    """Load the problems of raw files by groups of problems built together: the two DIMACS files of a SAT/UNSAT pair, or
+    the problems of a corpus that share a pair id. Every problem is (raw file index, item, cnf, simplification stats), where
+    item is the index of the problem in its corpus (0 for a DIMACS file).
+    """
+    for group in group_pairs(raw_paths):
+        if not is_corpus(raw_paths[group[0]]):
+            yield [(i, 0, *load_cnf(raw_paths[i], simplify)) for i in group]
+            continue
+        for i in group:
+            corpus = Corpus(raw_paths[i])
+            for items in corpus.get_pairs():
+                yield [(i, item, *prepare_cnf(CNF(*corpus.get_instance(item)), simplify)) for item in items]
+
+
+def process_part(part_name:str, raw_paths:List[str], processed_dir:str, graph_types:List[str], storage:str, shard_size:int,
+                 simplify:bool=False, reorder:str=None) -> int:
+    """Build and save the graphs of a part of the raw files, then save the part's manifest for every graph type. Every raw
+    problem is parsed once, whatever the number of graph types, and the two problems of a SAT/UNSAT pair are built together so
+    that the clauses they share are only processed once. Raw files are DIMACS files or binary corpora written by gen_sr_dimacs.py,
+    which are read without any text parsing. With simplify, problems are simplified before building their graphs and the
+    simplification statistics are stored in the manifest. With reorder, the nodes of every graph are renumbered with that method;
+    see reorder.reorder_graph. Runs in a worker process; every part writes its own files (or shards), so workers never write to
+    the same file.
+
+    Returns:
+        number of processed problems
+    """
+    entries = {graph_type: {} for graph_type in graph_types}
+    shard_writers = {}
+    if storage == "shards":
+        shard_writers = {graph_type: ShardWriter(processed_dir, shard_size, prefix=f"{part_name}_{graph_type}") for graph_type in graph_types}
+    file_infos = {}
+    for problems in load_problem_groups(raw_paths, simplify):
+        cnfs = [cnf for _, _, cnf, _ in problems]
+        compact_cache = {}
+        for (i, item, cnf, cnf_stats), graphs in zip(problems, build_pair_graphs(cnfs, graph_types)):
+            filepath = raw_paths[i]
+            if i not in file_infos:
+                stat = os.stat(filepath)
+                file_infos[i] = {"part": part_name, "hash": hash_file(filepath), "size": stat.st_size, "mtime": stat.st_mtime_ns}
+            source = os.path.basename(filepath)
+            source_info = dict(file_infos[i], item=item)
+            source_info.update({SIMPLIFY_PREFIX + key: value for key, value in cnf_stats.items()})
+            for graph_type in graph_types:
+                data = graphs[graph_type]
+                if reorder is not None:
+                    data = reorder_graph(data, reorder)
+                data = compact_graph(data, graph_type, compact_cache)
+                if storage == "shards":
+                    shard_name, offsets = shard_writers[graph_type].add(data)
+                    entry = Manifest.build_entry(data, shard_name, source, cnf.is_sat, offsets)
+                else:
+                    file_name = f"data_{part_name}_{i}_{item}_{graph_type}_sat={cnf.is_sat}.pt"
+                    torch.save(data, os.path.join(processed_dir, file_name), _use_new_zipfile_serialization=False)
+                    entry = Manifest.build_entry(data, file_name, source, cnf.is_sat)
+                entry.update(source_info)
+                entries[graph_type][i, item] = entry
+
+    for graph_type in graph_types:
+        if storage == "shards":
+            shard_writers[graph_type].close()
+        part_entries = [entries[graph_type][key] for key in sorted(entries[graph_type])]
+        Manifest.from_entries(part_entries).save(get_part_manifest_path(processed_dir, part_name, graph_type))
+    return len(entries[graph_types[0]])
+
+
+def _process_part_task(task) -> int:
+    return process_part(*task)
+
 class SatDataset(Dataset):
-    def __init__(self, root:str, transform:torch_geometric.transforms=None, pre_transform=None, graph_type:str="modified"):
+    def __init__(self, root:str, transform:torch_geometric.transforms=None, pre_transform=None, graph_type:str="modified",
+                 graph_types:List[str]=None, storage:str="files", shard_size:int=10000, num_workers:int=0, lazy:bool=False, cache_bytes:int=2**30,
+                 upcast:bool=True, simplify:bool=False, reorder:str=None):
         """
         Args:
             root : directory containing the dataset. This directory contains 2 sub-directories: raw (raw data) and processed (processed data)
@@ -32,63 +240,286 @@ class SatDataset(Dataset):
             graph_type (str): choice of 'modified' or 'base'. The base version connects nodes in the following way: variable -> operator -> constraint
                 whereas the modified version connects variable -> operator -> variable. Because the modified version needs one negation operator node per negated literal,
                 it results in much more nodes in the graph. In addition to requiring less nodes to encode the problem, the modified version connects positive literals
-                to their negation, which gives more structure to the resulting graph.
+                to their negation, which gives more structure to the resulting graph. Picks the representation loaded by this dataset.
+            graph_types (List[str], optional): representations built when processing, stored side by side. Every raw file is parsed once
+                for all of them, so other representations can later be loaded by changing graph_type without processing again. Must contain
+                graph_type. Defaults to [graph_type].
+            storage (str): choice of 'files' or 'shards'. 'files' saves every graph in its own .pt file. 'shards' packs graphs into
+                shards of flat per-type arrays that are memory-mapped when loading, so samples are views that every DataLoader worker
+                shares instead of copies. Shards are stored in the processed_shards sub-directory.
+            shard_size (int): number of graphs per shard when storage is 'shards'. Defaults to 10000.
+            num_workers (int): number of processes building graphs in parallel. 0 processes everything in the main process. Defaults to 0.
+                Processing is incremental: only raw files that are new or whose content changed are processed, and an interrupted run
+                resumes from the last completed part.
+            lazy (bool): if True, nothing is processed; get parses the raw DIMACS file and builds the graph on demand. Built graphs are kept
+                in an LRU cache local to each DataLoader worker (see cache_stats). Sizes per graph are not available in this mode. Defaults to False.
+            cache_bytes (int): maximum number of bytes of graph tensors kept in the cache of each worker when lazy is True. Defaults to 1 GiB.
+            upcast (bool): graphs are stored (and cached) with compact dtypes, the same for all the graphs of a dataset; see
+                dtypes.compact_graph. If True, get converts them to float32 features and int64 edge indices. If False, get returns the compact graphs and dtypes.upcast_graph should be
+                called after collating, ideally after moving the batch to the GPU. Defaults to True.
+            simplify (bool): if True, problems are simplified before building their graphs: tautologies, duplicate and subsumed clauses
+                are removed, and unit propagation and pure literal elimination are applied. Satisfiability is preserved, so labels stay
+                valid; see simplify.Simplifier. Problems that propagation decides are simplified up to the step that would decide
+                them rather than kept whole, so graph sizes do not give their label away; they stay in the dataset and are flagged
+                by solved_by_simplification, e.g. dataset[~dataset.solved_by_simplification] leaves them out. Simplified graphs are
+                processed in their own directory (processed_simplified or processed_shards_simplified) and statistics on what was
+                removed are available through simplification_stats. Defaults to False.
+            reorder (str, optional): choice of 'rcm', 'degree' or 'bfs'. Renumbers the nodes of every graph when it is built so that
+                neighboring nodes are stored close together, which makes message passing more cache friendly on large problems. Node
+                features and edge indices are permuted together and data[node_type].perm holds the original index of every node; see
+                reorder.reorder_graph. Reordered graphs are processed in their own directory (e.g. processed_rcm). Defaults to None.
         """
+        graph_types = list(graph_types) if graph_types is not None else [graph_type]
+        for name in [graph_type] + graph_types:
+            if name not in GRAPH_BUILDERS:
+                raise ValueError(f"Unknown graph_type '{name}'; expected one of {list(GRAPH_BUILDERS)}")
+        if graph_type not in graph_types:
+            raise ValueError(f"graph_type '{graph_type}' must be one of the processed graph_types {graph_types}")
+        if reorder is not None and reorder not in REORDER_METHODS:
+            raise ValueError(f"Unknown reorder '{reorder}'; expected one of {REORDER_METHODS}")
+        if storage not in ("files", "shards"):
+            raise ValueError(f"Unknown storage '{storage}'; expected 'files' or 'shards'")
         self.graph_type = graph_type
+        self.graph_types = graph_types
+        self.storage = storage
+        self.shard_size = shard_size
+        self.num_workers = num_workers
+        self.lazy = lazy
+        self.upcast = upcast
+        self.simplify = simplify
+        self.reorder = reorder
         super(SatDataset, self).__init__(
             root, transform=transform, pre_transform=pre_transform)
-    
+        if lazy:
+            self.manifest = None
+            self.lazy_items, self.lazy_labels = self.list_problems()
+            self.corpora = {}
+            self.cache = GraphCache(cache_bytes)
+        else:
+            self.manifest = Manifest.load(self.get_manifest_path(graph_type))
+            self.shard_reader = ShardReader(self.processed_dir)
+
     @property
     def raw_file_names(self):
         """
         If this file exists in the raw_dir directory, files will not be dowloaded
         """
         return "sr_n=0006_pk2=0.30_pg=0.40_t=9_sat=0.dimacs"
-    
+
     @property
     def processed_file_names(self):
         """If these files are present in the processed data directory, data processing step is skipped
         """
-        # return "data_0_sat=0.pt"
-        return "data"
-    
+        return [f"manifest_{graph_type}.npz" for graph_type in self.graph_types]
+
     @property
-    def raw_paths(self) -> List[str]:
-        r"""The absolute filepaths that must be present in order to skip
-        downloading."""
-        files = os.listdir(self.raw_dir)
+    def processed_dir(self) -> str:
+        name = "processed_shards" if self.storage == "shards" else "processed"
+        if self.simplify:
+            name += "_simplified"
+        if self.reorder is not None:
+            name += f"_{self.reorder}"
+        return os.path.join(self.root, name)
+
+    def get_manifest_path(self, graph_type:str) -> str:
+        return os.path.join(self.processed_dir, f"manifest_{graph_type}.npz")
 
-        return [os.path.join(self.raw_dir, f) for f in files]
-    
     @property
-    def processed_paths(self) -> List[str]:
-        r"""The absolute filepaths that must be present in order to skip
-        downloading."""
-        files = os.listdir(self.processed_dir)
+    def raw_paths(self) -> List[str]:
+        r"""The absolute filepaths of the raw files (DIMACS files or binary corpora), sorted by path. Files can be in sub-directories
+        of raw_dir, but file names must be unique. Only used while processing; processed graphs are found through the manifest."""
+        return sorted(entry.path for entry in scan_files(self.raw_dir))
 
-        return [os.path.join(self.processed_dir, f) for f in files]
+    def list_problems(self):
+        """Problems of the raw files, for the lazy mode
+
+        Returns:
+            items (List[tuple]): (raw file path, index of the problem in the file) of every problem
+            labels (np.ndarray): satisfiability label of every problem
+        """
+        items = []
+        labels = []
+        for filepath in self.raw_paths:
+            if is_corpus(filepath):
+                corpus_labels = read_corpus_labels(filepath)
+                items.extend((filepath, item) for item in range(len(corpus_labels)))
+                labels.extend(corpus_labels.tolist())
+            else:
+                items.append((filepath, 0))
+                labels.append(get_required_label(filepath))
+        return items, np.array(labels, dtype=np.int8)
+
+    def get_corpus(self, filepath:str) -> Corpus:
+        """Corpus of a raw file, loaded once per process when lazy is True
+        """
+        if filepath not in self.corpora:
+            self.corpora[filepath] = Corpus(filepath)
+        return self.corpora[filepath]
 
     def download(self):
         pass
 
     def process(self):
-        num_files_to_process = len(self.raw_paths)
-        pbar = tqdm(total=num_files_to_process, position=0)
-        for i, filepath in enumerate(self.raw_paths):
-            pbar.update(1)
-            cnf = parse_dimacs_cnf(filepath)
-            if self.graph_type == "base":
-                data = cnf.build_heterogeneous_graph()
-            elif self.graph_type == "modified":
-                data = cnf.build_sat_specific_heterogeneous_graph()
-            elif self.graph_type == "refactored":
-                data = cnf.build_generic_heterogeneous_graph()
-            is_sat = filepath[-8]
-            out_path = os.path.join(self.processed_dir, f"data_{i}_sat={is_sat}.pt")
-            torch.save(data, out_path, _use_new_zipfile_serialization=False)
-        
+        """Process the raw files that miss an up-to-date graph for one of the graph types, in parts spread over num_workers
+        processes, then merge the manifests of all valid parts into one manifest per graph type
+        """
+        valid_manifests = {}
+        pending_paths = set()
+        types_to_build = []
+        for graph_type in self.graph_types:
+            valid_manifests[graph_type], type_pending_paths = self.find_pending_raw_files(graph_type)
+            if type_pending_paths:
+                types_to_build.append(graph_type)
+                pending_paths.update(type_pending_paths)
+        pending_paths = sorted(pending_paths)
+
+        # Graphs rebuilt because another graph type was missing replace the previous ones, which are removed before any part
+        # is built, so a new part never shares its outputs with a removed entry
+        rebuilt_sources = {os.path.basename(filepath).encode() for filepath in pending_paths}
+        for graph_type in types_to_build:
+            valid_manifest = valid_manifests[graph_type]
+            still_valid = np.array([source not in rebuilt_sources for source in valid_manifest.columns.get("source", [])], dtype=bool)
+            valid_manifests[graph_type] = self.remove_entries(valid_manifest, still_valid, graph_type)
+
+        part_size = self.shard_size if self.storage == "shards" else FILES_PER_PART
+        tasks = []
+        part_paths = []
+        part_problems = 0
+        num_problems = 0
+        for group in group_pairs(pending_paths):
+            # The files of a pair are kept in the same part, so they can be built together. Parts are sized by number of
+            # problems, since a corpus file holds many of them.
+            group_problems = sum(count_problems(pending_paths[i]) for i in group)
+            if part_paths and part_problems + group_problems > part_size:
+                tasks.append((get_part_name(part_paths), part_paths, self.processed_dir, types_to_build, self.storage, self.shard_size, self.simplify, self.reorder))
+                part_paths = []
+                part_problems = 0
+            part_paths.extend(pending_paths[i] for i in group)
+            part_problems += group_problems
+            num_problems += group_problems
+        if part_paths:
+            tasks.append((get_part_name(part_paths), part_paths, self.processed_dir, types_to_build, self.storage, self.shard_size, self.simplify, self.reorder))
+
+        pbar = tqdm(total=num_problems, position=0)
+        if self.num_workers > 0 and len(tasks) > 1:
+            with multiprocessing.Pool(min(self.num_workers, len(tasks))) as pool:
+                for num_processed in pool.imap_unordered(_process_part_task, tasks):
+                    pbar.update(num_processed)
+        else:
+            for task in tasks:
+                pbar.update(_process_part_task(task))
         pbar.close()
-    
+
+        for graph_type in self.graph_types:
+            valid_manifest = valid_manifests[graph_type]
+            new_manifests = []
+            if graph_type in types_to_build:
+                new_manifests = [Manifest.load(get_part_manifest_path(self.processed_dir, task[0], graph_type)) for task in tasks]
+            manifest = Manifest.concatenate([valid_manifest] + new_manifests)
+            if len(manifest):
+                manifest = manifest.select(np.argsort(manifest.columns["source"], kind="stable"))
+            manifest.save(self.get_manifest_path(graph_type))
+
+    def find_pending_raw_files(self, graph_type:str):
+        """Compare the raw files with the processed parts of a graph type. Graphs stay valid if their raw file still exists and
+        has the same size and modification time, or the same content hash; in the latter case, the size and modification time of
+        its entries are refreshed so the file is not hashed again. Only the graphs of the latest valid part of a raw file are kept
+        (a corpus file has one graph per problem). The other entries are removed (see remove_entries) and parts without any valid
+        graph are deleted.
+
+        Returns:
+            valid_manifest (Manifest): entries of the graphs that are still valid
+            pending_paths (List[str]): raw files that need to be processed
+        """
+        manifest_path = self.get_manifest_path(graph_type)
+        part_paths = sorted(glob.glob(get_part_manifest_path(self.processed_dir, "*", graph_type)))
+        if os.path.exists(manifest_path) and all(os.path.getmtime(p) <= os.path.getmtime(manifest_path) for p in part_paths):
+            known = Manifest.load(manifest_path)
+        else:
+            known = Manifest.concatenate([Manifest.load(p) for p in part_paths])
+
+        raw_paths = {os.path.basename(filepath): filepath for filepath in self.raw_paths}
+        keep = np.zeros(len(known), dtype=bool)
+        valid_parts = {}
+        refreshed = {}
+        checked = set()
+        for i in reversed(range(len(known))):
+            source = known.get_source(i)
+            part = known.columns["part"][i]
+            if source not in raw_paths:
+                continue
+            if source in valid_parts:
+                keep[i] = valid_parts[source] == part
+                continue
+            if (source, part) in checked:
+                continue
+            checked.add((source, part))
+            stat = os.stat(raw_paths[source])
+            unchanged = stat.st_size == known.columns["size"][i] and stat.st_mtime_ns == known.columns["mtime"][i]
+            if unchanged or hash_file(raw_paths[source]) == known.columns["hash"][i].decode():
+                keep[i] = True
+                valid_parts[source] = part
+                if not unchanged:
+                    refreshed[source] = (stat.st_size, stat.st_mtime_ns)
+
+        if refreshed:
+            known.columns["size"] = known.columns["size"].copy()
+            known.columns["mtime"] = known.columns["mtime"].copy()
+            for i in np.flatnonzero(keep):
+                source = known.get_source(i)
+                if source in refreshed:
+                    known.columns["size"][i], known.columns["mtime"][i] = refreshed[source]
+
+        valid_manifest = self.remove_entries(known, keep, graph_type)
+        live_parts = set(valid_manifest.columns["part"].tolist()) if len(valid_manifest) else set()
+        for part_path in part_paths:
+            part_name = os.path.basename(part_path)[:-len(f".{graph_type}.npz")]
+            if part_name.encode() not in live_parts and os.path.exists(part_path):
+                self.delete_part(part_name, graph_type)
+
+        pending_paths = [filepath for source, filepath in raw_paths.items() if source not in valid_parts]
+        return valid_manifest, pending_paths
+
+    def remove_entries(self, manifest:Manifest, keep:np.ndarray, graph_type:str) -> Manifest:
+        """Remove the entries of a manifest that are not kept, e.g. the graphs of a modified or deleted raw file: their graph files
+        (or shards) are deleted unless a kept entry uses them, and they are removed from the manifests of their parts, which are
+        deleted once they have no entry left. Without this, the outputs of replaced entries would stay on disk as long as their
+        part holds other valid graphs.
+
+        Returns:
+            manifest (Manifest): the kept entries
+        """
+        kept = manifest.select(np.flatnonzero(keep))
+        removed = manifest.select(np.flatnonzero(~keep))
+        if not len(removed):
+            return kept
+
+        used_paths = set(kept.columns["path"].tolist()) if len(kept) else set()
+        for path in set(removed.columns["path"].tolist()) - used_paths:
+            delete_path(os.path.join(self.processed_dir, path.decode()))
+
+        kept_keys = set(zip(*get_entry_keys(kept), kept.columns["part"].tolist())) if len(kept) else set()
+        for part in set(removed.columns["part"].tolist()):
+            part_manifest_path = get_part_manifest_path(self.processed_dir, part.decode(), graph_type)
+            if not os.path.exists(part_manifest_path):
+                continue
+            part_manifest = Manifest.load(part_manifest_path)
+            part_keep = np.array([key + (part,) in kept_keys for key in zip(*get_entry_keys(part_manifest))], dtype=bool)
+            if part_keep.all():
+                continue
+            if part_keep.any():
+                part_manifest.select(np.flatnonzero(part_keep)).save(part_manifest_path)
+            else:
+                self.delete_part(part.decode(), graph_type)
+        return kept
+
+    def delete_part(self, part_name:str, graph_type:str):
+        part_manifest_path = get_part_manifest_path(self.processed_dir, part_name, graph_type)
+        part_manifest = Manifest.load(part_manifest_path)
+        for path in set(part_manifest.columns["path"].tolist()) if len(part_manifest) else set():
+            delete_path(os.path.join(self.processed_dir, path.decode()))
+        os.remove(part_manifest_path)
+
     def _process(self):
         f = os.path.join(self.processed_dir, 'pre_transform.pt')
         if os.path.exists(f) and torch.load(f) != _repr(self.pre_transform):
@@ -106,27 +537,137 @@ class SatDataset(Dataset):
                 "make use of another pre-fitering technique, make sure to "
                 "delete '{self.processed_dir}' first")
 
-        if files_exist(self.processed_paths):  # pragma: no cover
+        if self.lazy:
+            return
+
+        if files_exist(self.processed_paths) and all(self.is_up_to_date(graph_type) for graph_type in self.graph_types):
             return
 
         if self.log:
             print('Processing...', file=sys.stderr)
 
-        makedirs(self.processed_dir)
+        makedirs(os.path.join(self.processed_dir, "parts"))
         self.process()
 
         if self.log:
             print('Done!', file=sys.stderr)
-    
+
+    def is_up_to_date(self, graph_type:str) -> bool:
+        """Cheap check that the manifest of a graph type covers exactly the raw files, with unchanged sizes and modification times
+        """
+        manifest = Manifest.load(self.get_manifest_path(graph_type))
+        stats = {}
+        for entry in scan_files(self.raw_dir):
+            stat = entry.stat()
+            stats[entry.name.encode()] = (stat.st_size, stat.st_mtime_ns)
+        if not len(manifest):
+            return not stats
+        known = {
+            source: (size, mtime)
+            for source, size, mtime in zip(manifest.columns["source"].tolist(), manifest.columns["size"].tolist(), manifest.columns["mtime"].tolist())
+        }
+        return stats == known
+
     def len(self):
-        return len(self.raw_paths)
-    
+        if self.lazy:
+            return len(self.lazy_items)
+        return len(self.manifest)
+
     def get(self, idx: int):
-        path = self.processed_paths[idx]
-        data = torch.load(path)
-        
+        data = self.get_compact(idx)
+        if self.upcast:
+            return upcast_graph(data)
+        return data
+
+    def get_compact(self, idx: int):
+        """Get a graph with the dtypes it is stored with
+        """
+        if self.lazy:
+            data = self.cache.get(idx)
+            if data is None:
+                filepath, item = self.lazy_items[idx]
+                if is_corpus(filepath):
+                    cnf, _ = prepare_cnf(CNF(*self.get_corpus(filepath).get_instance(item)), self.simplify)
+                else:
+                    cnf, _ = load_cnf(filepath, self.simplify)
+                data = build_graph(cnf, self.graph_type)
+                if self.reorder is not None:
+                    data = reorder_graph(data, self.reorder)
+                data = compact_graph(data, self.graph_type)
+                self.cache.put(idx, data)
+            return data
+
+        if self.manifest.is_packed:
+            nodes, edges = self.manifest.get_location(idx)
+            data = self.shard_reader.get(self.manifest.get_path(idx), nodes, edges)
+            label = [0, 1] if self.manifest.labels[idx] else [1, 0]
+            data["variable"].y = torch.tensor([label], dtype=LABEL_DTYPE)
+            return data
+
+        path = os.path.join(self.processed_dir, self.manifest.get_path(idx))
+        data = torch.load(path, weights_only=False)
+
         return data
 
+    def num_nodes_per_graph(self, node_type:str=None) -> np.ndarray:
+        """Number of nodes of every graph of the dataset (or of the current subset), read from the manifest. Can be used
+        to filter the dataset without loading any graph; e.g. dataset[dataset.num_nodes_per_graph() < 500]
+
+        Args:
+            node_type (str, optional): count only the nodes of this type. Defaults to all node types.
+        """
+        self.check_manifest()
+        return self.manifest.num_nodes(node_type)[np.asarray(self.indices(), dtype=np.int64)]
+
+    def num_edges_per_graph(self, edge_type:tuple=None) -> np.ndarray:
+        """Number of edges of every graph of the dataset (or of the current subset), read from the manifest
+
+        Args:
+            edge_type (tuple, optional): count only the edges of this type. Defaults to all edge types.
+        """
+        self.check_manifest()
+        return self.manifest.num_edges(edge_type)[np.asarray(self.indices(), dtype=np.int64)]
+
+    @property
+    def labels(self) -> np.ndarray:
+        """Satisfiability label of every graph of the dataset (or of the current subset), read from the manifest
+        """
+        if self.lazy:
+            return self.lazy_labels[np.asarray(self.indices(), dtype=np.int64)]
+        return self.manifest.labels[np.asarray(self.indices(), dtype=np.int64)]
+
+    @property
+    def simplification_stats(self) -> dict:
+        """Totals of the simplification statistics over the dataset (or the current subset), read from the manifest; e.g.
+        removed_clauses, removed_literals, subsumed_clauses or solved (problems decided by simplification)
+        """
+        self.check_manifest()
+        indices = np.asarray(self.indices(), dtype=np.int64)
+        return {
+            key[len(SIMPLIFY_PREFIX):]: int(column[indices].sum())
+            for key, column in self.manifest.columns.items() if key.startswith(SIMPLIFY_PREFIX)
+        }
+
+    @property
+    def solved_by_simplification(self) -> np.ndarray:
+        """Whether simplification decided every graph of the dataset (or of the current subset), read from the manifest.
+        Always False when simplify is False.
+        """
+        self.check_manifest()
+        indices = np.asarray(self.indices(), dtype=np.int64)
+        solved = self.manifest.columns.get(SIMPLIFY_PREFIX + "solved", np.zeros(len(self.manifest), dtype=np.int64))
+        return solved[indices] > 0
+
+    @property
+    def cache_stats(self) -> dict:
+        """Hits, misses and size of the graph cache of the current process, when lazy is True
+        """
+        return self.cache.stats
+
+    def check_manifest(self):
+        if self.manifest is None:
+            raise RuntimeError("Graph sizes and simplification statistics come from the processed manifest and are not available when lazy is True")
+
 if __name__ == "__main__":
     dataset = SatDataset(root=r"C:\Users\leobo\Desktop\École\Poly\Recherche\Generic-Graph-Representation\Graph-Representation\src\models\sat\data")
     a=1
\ No newline at end of file
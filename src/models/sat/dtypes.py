@@ -0,0 +1,83 @@
+import copy
+import torch
+from torch_geometric.data import HeteroData
+
+# Storage dtype of the node features of every representation, from the bounds of their values: one-hot encodings and
+# constant features fit in uint8, signs in int8, and counts (of variables, clauses or literals) in int32. The dtype of a
+# node type only depends on the representation, so every graph of a dataset stores it with the same dtype.
+NODE_FEATURE_DTYPES = {
+    "base": {"variable": torch.int32, "value": torch.uint8, "operator": torch.uint8, "constraint": torch.uint8},
+    "modified": {"variable": torch.int8, "value": torch.uint8, "operator": torch.uint8, "constraint": torch.uint8},
+    "refactored": {"variable": torch.uint8, "value": torch.uint8, "operator": torch.int8, "constraint": torch.int32, "meta": torch.int32},
+}
+# One-hot labels
+LABEL_DTYPE = torch.uint8
+# Edge indices and node permutations (stored by reorder.reorder_graph). int32 holds the node ids of any graph that fits in
+# memory, and batches of int32 edge indices never overflow.
+INDEX_DTYPE = torch.int32
+FEATURE_KEYS = ("x", "y")
+INDEX_KEYS = ("edge_index", "perm")
+
+
+def compact_tensor(value:torch.Tensor, dtype:torch.dtype, name:str) -> torch.Tensor:
+    """Convert a tensor to its storage dtype. Features that are not integer-valued (e.g. random_values features) keep
+    their dtype.
+    """
+    if value.is_floating_point() and not torch.equal(value, value.round()):
+        return value
+    if value.numel():
+        info = torch.iinfo(dtype)
+        if value.min() < info.min or value.max() > info.max:
+            raise ValueError(f"Values of {name} do not fit its storage dtype {dtype}")
+    return value.to(dtype)
+
+
+def compact_graph(data:HeteroData, graph_type:str, cache:dict=None) -> HeteroData:
+    """Store every feature and edge index of a graph with its storage dtype: the dtype of its node type for node features
+    (see NODE_FEATURE_DTYPES), uint8 for labels and int32 for edge indices and node permutations. The graph is modified in place.
+
+    Args:
+        graph_type (str): representation of the graph; 'base', 'modified' or 'refactored'
+        cache (dict, optional): compacted tensors by id of the original tensor. Tensors shared by several graphs (see
+            sat_parser.GraphPrefix) are then only compacted once when the same cache is used for all of them.
+    """
+    feature_dtypes = NODE_FEATURE_DTYPES[graph_type]
+    for node_type, store in zip(data.node_types, data.node_stores):
+        if "x" in store:
+            if node_type not in feature_dtypes:
+                raise ValueError(f"No storage dtype for the features of '{node_type}' nodes in {graph_type} graphs")
+            store["x"] = compact_cached(store["x"], feature_dtypes[node_type], f"{node_type}.x", cache)
+        if "y" in store:
+            store["y"] = compact_cached(store["y"], LABEL_DTYPE, f"{node_type}.y", cache)
+    for store in data.stores:
+        for key in INDEX_KEYS:
+            if key in store:
+                store[key] = compact_cached(store[key], INDEX_DTYPE, key, cache)
+    return data
+
+
+def compact_cached(value:torch.Tensor, dtype:torch.dtype, name:str, cache:dict=None) -> torch.Tensor:
+    if cache is None:
+        return compact_tensor(value, dtype, name)
+    # The original tensor is kept with its compact version, so its id cannot be reused by another tensor
+    original, compact = cache.get(id(value), (None, None))
+    if original is not value:
+        compact = compact_tensor(value, dtype, name)
+        cache[id(value)] = (value, compact)
+    return compact
+
+
+def upcast_graph(data:HeteroData, feature_dtype:torch.dtype=torch.float, index_dtype:torch.dtype=torch.long) -> HeteroData:
+    """Convert the features and edge indices of a compact graph (or batch) back to the dtypes expected by the models. Meant to
+    be called as late as possible; e.g. after collating a batch or after moving it to the GPU. The input graph is not modified.
+    """
+    data = copy.copy(data)
+    for store in data.stores:
+        for key in FEATURE_KEYS:
+            if key in store and store[key].dtype != feature_dtype:
+                store[key] = store[key].to(feature_dtype)
+        for key in INDEX_KEYS:
+            if key in store and store[key].dtype != index_dtype:
+                store[key] = store[key].to(index_dtype)
+    return data
+
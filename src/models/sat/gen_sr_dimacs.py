@@ -14,10 +14,15 @@
 # ==============================================================================
 
 import math
+import os
+import time
 import numpy as np
 import random
 import argparse
+import multiprocessing
+from functools import partial
 import PyMiniSolvers.minisolvers as minisolvers
+from corpus import CORPUS_SUFFIX, CorpusWriter
 
 
 def write_dimacs_to(n_vars, iclauses, out_filename):
@@ -29,18 +34,36 @@ def write_dimacs_to(n_vars, iclauses, out_filename):
             f.write("0\n")
 
 
-def mk_out_filenames(opts, n_vars, t):
+def mk_out_filenames(opts, n_vars, t, out_dir=None):
     prefix = "%s/sr_n=%.4d_pk2=%.2f_pg=%.2f_t=%d" % \
-        (opts.out_dir, n_vars, opts.p_k_2, opts.p_geo, t)
+        (out_dir or opts.out_dir, n_vars, opts.p_k_2, opts.p_geo, t)
     return ("%s_sat=0.dimacs" % prefix, "%s_sat=1.dimacs" % prefix)
 
 
+def mk_corpus_filename(opts, shard, out_dir=None):
+    return "%s/sr_pk2=%.2f_pg=%.2f_shard=%.5d%s" % \
+        (out_dir or opts.out_dir, opts.p_k_2, opts.p_geo, shard, CORPUS_SUFFIX)
+
+
 def generate_k_iclause(n, k):
     vs = np.random.choice(n, size=min(n, k), replace=False)
     return [v + 1 if random.random() < 0.5 else -(v + 1) for v in vs]
 
 
-def gen_iclause_pair(opts):
+def is_satisfied_by(model, iclause):
+    """Whether a clause has a literal that is true in a model (list of 0/1 values, one per variable)
+    """
+    return any(model[abs(x) - 1] == (x > 0) for x in iclause)
+
+
+def gen_iclause_pair(opts, stats=None):
+    """Add random clauses until the problem becomes unsatisfiable. The solver is only called when the new clause is not
+    satisfied by the last model found, since the problem is then known to stay satisfiable. Other calls reuse the same
+    MiniSat instance, which keeps its learnt clauses and saved phases from one call to the next.
+
+    Args:
+        stats (dict, optional): clauses and solver_calls counters, incremented in place
+    """
     n = random.randint(opts.min_n, opts.max_n)
 
     solver = minisolvers.MinisatSolver()
@@ -48,6 +71,8 @@ def gen_iclause_pair(opts):
         solver.new_var(dvar=True)
 
     iclauses = []
+    model = [0] * n  # any assignment satisfies the empty problem
+    solver_calls = 0
 
     while True:
         k_base = 1 if random.random() < opts.p_k_2 else 2
@@ -55,17 +80,83 @@ def gen_iclause_pair(opts):
         iclause = generate_k_iclause(n, k)
 
         solver.add_clause(iclause)
-        is_sat = solver.solve()
+        if is_satisfied_by(model, iclause):
+            is_sat = True
+        else:
+            is_sat = solver.solve()
+            solver_calls += 1
+            if is_sat:
+                model = list(solver.get_model())
         if is_sat:
             iclauses.append(iclause)
         else:
             break
 
+    if stats is not None:
+        stats["clauses"] = stats.get("clauses", 0) + len(iclauses) + 1
+        stats["solver_calls"] = stats.get("solver_calls", 0) + solver_calls
+
     iclause_unsat = iclause
     iclause_sat = [- iclause_unsat[0]] + iclause_unsat[1:]
     return n, iclauses, iclause_unsat, iclause_sat
 
 
+def get_shard_seeds(opts, shard):
+    """Seeds of the python and numpy generators for a shard. Every shard gets its own stream, derived from --py_seed/--np_seed
+    and the shard index, so the generated pairs only depend on the seeds and --shard_size, whatever the number of workers.
+    """
+    py_seed = np.random.SeedSequence(opts.py_seed, spawn_key=(shard,)).generate_state(1)[0]
+    np_seed = np.random.SeedSequence(opts.np_seed, spawn_key=(shard,)).generate_state(1)[0]
+    return int(py_seed), int(np_seed)
+
+
+def get_shard_dir(opts, shard):
+    if not opts.sharded:
+        return opts.out_dir
+    return os.path.join(opts.out_dir, "shard_%.5d" % shard)
+
+
+def gen_shard(opts, shard):
+    """Generate the pairs of a shard; i.e. pairs shard * shard_size to (shard + 1) * shard_size - 1. Depending on --format,
+    pairs are written as DIMACS files, to one binary corpus file per shard (see corpus.CorpusWriter) or both.
+
+    Returns:
+        number of generated pairs
+        stats (dict): clauses and solver_calls counters; see gen_iclause_pair
+    """
+    py_seed, np_seed = get_shard_seeds(opts, shard)
+    random.seed(py_seed)
+    np.random.seed(np_seed)
+    out_dir = get_shard_dir(opts, shard)
+    os.makedirs(out_dir, exist_ok=True)
+
+    start = shard * opts.shard_size
+    end = min(start + opts.shard_size, opts.n_pairs)
+    stats = {}
+    write_dimacs = opts.format in ("dimacs", "both")
+    corpus_writer = CorpusWriter(mk_corpus_filename(opts, shard, out_dir)) if opts.format in ("corpus", "both") else None
+    for pair in range(start, end):
+        if opts.num_workers <= 1 and pair % opts.print_interval == 0:
+            print("[%d]" % pair)
+        n_vars, iclauses, iclause_unsat, iclause_sat = gen_iclause_pair(opts, stats)
+        out_filenames = mk_out_filenames(opts, n_vars, pair, out_dir)
+
+        iclauses.append(iclause_unsat)
+        if write_dimacs:
+            write_dimacs_to(n_vars, iclauses, out_filenames[0])
+        if corpus_writer is not None:
+            corpus_writer.add(n_vars, iclauses, 0, pair)
+
+        iclauses[-1] = iclause_sat
+        if write_dimacs:
+            write_dimacs_to(n_vars, iclauses, out_filenames[1])
+        if corpus_writer is not None:
+            corpus_writer.add(n_vars, iclauses, 1, pair)
+    if corpus_writer is not None:
+        corpus_writer.close()
+    return end - start, stats
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument('out_dir', action='store', type=str)
@@ -88,21 +179,43 @@ if __name__ == "__main__":
 
     parser.add_argument('--print_interval', action='store',
                         dest='print_interval', type=int, default=100)
-    opts = parser.parse_args()
-
-    if opts.py_seed is not None:
-        random.seed(opts.py_seed)
-    if opts.np_seed is not None:
-        np.random.seed(opts.np_seed)
 
-    for pair in range(opts.n_pairs):
-        if pair % opts.print_interval == 0:
-            print("[%d]" % pair)
-        n_vars, iclauses, iclause_unsat, iclause_sat = gen_iclause_pair(opts)
-        out_filenames = mk_out_filenames(opts, n_vars, pair)
-
-        iclauses.append(iclause_unsat)
-        write_dimacs_to(n_vars, iclauses, out_filenames[0])
+    parser.add_argument('--num_workers', action='store',
+                        dest='num_workers', type=int, default=1,
+                        help="number of processes generating shards in parallel")
+    parser.add_argument('--shard_size', action='store',
+                        dest='shard_size', type=int, default=1000,
+                        help="number of pairs per shard; every shard has its own seeds")
+    parser.add_argument('--format', action='store',
+                        dest='format', type=str, default='dimacs', choices=['dimacs', 'corpus', 'both'],
+                        help="write pairs as DIMACS files, as one binary corpus file per shard (read directly by SatDataset) or both")
+    parser.add_argument('--sharded', action='store_true',
+                        dest='sharded',
+                        help="write every shard to its own sub-directory (shard_00000, ...) of out_dir")
+    opts = parser.parse_args()
 
-        iclauses[-1] = iclause_sat
-        write_dimacs_to(n_vars, iclauses, out_filenames[1])
+    num_shards = math.ceil(opts.n_pairs / opts.shard_size)
+    start_time = time.time()
+    num_pairs = 0
+    stats = {"clauses": 0, "solver_calls": 0}
+    if opts.num_workers > 1:
+        with multiprocessing.Pool(opts.num_workers) as pool:
+            shard_pairs = pool.imap_unordered(partial(gen_shard, opts), range(num_shards))
+            for num_done, (shard_num_pairs, shard_stats) in enumerate(shard_pairs, 1):
+                num_pairs += shard_num_pairs
+                for key, value in shard_stats.items():
+                    stats[key] += value
+                print("[%d/%d shards] %d/%d pairs, %.1f pairs/s" % (
+                    num_done, num_shards, num_pairs, opts.n_pairs, num_pairs / (time.time() - start_time)))
+    else:
+        for shard in range(num_shards):
+            shard_num_pairs, shard_stats = gen_shard(opts, shard)
+            num_pairs += shard_num_pairs
+            for key, value in shard_stats.items():
+                stats[key] += value
+
+    elapsed = time.time() - start_time
+    print("Generated %d pairs (%d problems) in %d shards with %d workers in %.1fs (%.1f pairs/s)" % (
+        num_pairs, 2 * num_pairs, num_shards, opts.num_workers, elapsed, num_pairs / max(elapsed, 1e-9)))
+    print("%d solver calls for %d clauses (%.2f per pair)" % (
+        stats["solver_calls"], stats["clauses"], stats["solver_calls"] / max(num_pairs, 1)))
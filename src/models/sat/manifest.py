@@ -0,0 +1,169 @@
+import os
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from torch_geometric.data import HeteroData
+
+NUM_NODES_PREFIX = "num_nodes_"
+NUM_EDGES_PREFIX = "num_edges_"
+NODE_OFFSET_PREFIX = "node_offset_"
+EDGE_OFFSET_PREFIX = "edge_offset_"
+STRING_COLUMNS = ("path", "source", "part", "hash")
+
+
+def edge_type_to_key(edge_type:Tuple[str, str, str]) -> str:
+    return "__".join(edge_type)
+
+
+def key_to_edge_type(key:str) -> Tuple[str, str, str]:
+    return tuple(key.split("__"))
+
+
+class Manifest:
+    """
+    Index of the processed graphs of a dataset, stored column-wise. Entry i describes the i-th graph of the dataset:
+    - path: file (relative to the processed directory) where the graph is stored
+    - source: raw file the graph was built from
+    - item: index of the problem in its source; 0 for a DIMACS file, the problem index for a binary corpus (see corpus.CorpusWriter)
+    - part: processing part that built the graph
+    - label: 1 if the problem is satisfiable, 0 otherwise
+    - hash, size and mtime: content hash, size and modification time of the source, to detect changed raw files
+    - num_nodes_{node_type} and num_edges_{edge_type}: size of the graph for every node and edge type
+    - node_offset_{node_type} and edge_offset_{edge_type}: only for packed storage; position of the graph inside its shard
+    - simplify_*: only for simplified datasets; what simplification removed from the problem (see simplify.Simplifier)
+    Sizes can be used to filter or split a dataset without loading any graph.
+    """
+    def __init__(self, columns:Optional[Dict[str, np.ndarray]]=None):
+        self.columns = columns if columns is not None else {}
+
+    def __len__(self):
+        if "label" not in self.columns:
+            return 0
+        return len(self.columns["label"])
+
+    @staticmethod
+    def build_entry(data:HeteroData, path:str, source:str, label:int, offsets:Optional[Dict]=None) -> Dict:
+        """Describe one processed graph
+
+        Args:
+            offsets (Dict, optional): node_offset_* and edge_offset_* columns, for graphs packed in shards
+        """
+        entry = {"path": path, "source": source, "label": label}
+        if offsets is not None:
+            entry.update(offsets)
+        for node_type in data.node_types:
+            entry[NUM_NODES_PREFIX + node_type] = data[node_type].num_nodes
+        for edge_type in data.edge_types:
+            entry[NUM_EDGES_PREFIX + edge_type_to_key(edge_type)] = data[edge_type].num_edges
+        return entry
+
+    @classmethod
+    def from_entries(cls, entries:List[Dict]):
+        keys = []
+        for entry in entries:
+            keys.extend(key for key in entry if key not in keys)
+
+        columns = {}
+        for key in keys:
+            if key in STRING_COLUMNS:
+                columns[key] = np.array([entry[key].encode() for entry in entries], dtype=np.bytes_)
+            elif key == "label":
+                columns[key] = np.array([entry[key] for entry in entries], dtype=np.int8)
+            else:
+                columns[key] = np.array([entry.get(key, 0) for entry in entries], dtype=np.int64)
+        return cls(columns)
+
+    @classmethod
+    def concatenate(cls, manifests:List["Manifest"]):
+        """Concatenate manifests; columns missing from some manifests are filled with empty strings or zeros
+        """
+        manifests = [manifest for manifest in manifests if len(manifest)]
+        keys = []
+        for manifest in manifests:
+            keys.extend(key for key in manifest.columns if key not in keys)
+
+        columns = {}
+        for key in keys:
+            parts = []
+            for manifest in manifests:
+                if key in manifest.columns:
+                    parts.append(manifest.columns[key])
+                elif key in STRING_COLUMNS:
+                    parts.append(np.full(len(manifest), b"", dtype=np.bytes_))
+                else:
+                    parts.append(np.zeros(len(manifest), dtype=np.int64))
+            columns[key] = np.concatenate(parts)
+        return cls(columns)
+
+    def select(self, indices:np.ndarray):
+        """Manifest containing only the given entries
+        """
+        return Manifest({key: column[indices] for key, column in self.columns.items()})
+
+    @classmethod
+    def load(cls, path:str):
+        with np.load(path, allow_pickle=False) as f:
+            columns = {key: f[key] for key in f.files}
+        return cls(columns)
+
+    def save(self, path:str):
+        """Save the manifest atomically, so an interrupted run never leaves a partial manifest behind
+        """
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **self.columns)
+        os.replace(tmp_path, path)
+
+    def get_path(self, idx:int) -> str:
+        return self.columns["path"][idx].decode()
+
+    def get_source(self, idx:int) -> str:
+        return self.columns["source"][idx].decode()
+
+    @property
+    def labels(self) -> np.ndarray:
+        return self.columns["label"]
+
+    @property
+    def node_types(self) -> List[str]:
+        return [key[len(NUM_NODES_PREFIX):] for key in self.columns if key.startswith(NUM_NODES_PREFIX)]
+
+    @property
+    def edge_types(self) -> List[Tuple[str, str, str]]:
+        return [key_to_edge_type(key[len(NUM_EDGES_PREFIX):]) for key in self.columns if key.startswith(NUM_EDGES_PREFIX)]
+
+    def num_nodes(self, node_type:Optional[str]=None) -> np.ndarray:
+        """Number of nodes of every graph, either for one node type or for all node types combined
+        """
+        if node_type is not None:
+            return self.columns[NUM_NODES_PREFIX + node_type]
+        return sum((self.columns[NUM_NODES_PREFIX + t] for t in self.node_types), np.zeros(len(self), dtype=np.int64))
+
+    def num_edges(self, edge_type:Optional[Tuple[str, str, str]]=None) -> np.ndarray:
+        """Number of edges of every graph, either for one edge type or for all edge types combined
+        """
+        if edge_type is not None:
+            return self.columns[NUM_EDGES_PREFIX + edge_type_to_key(edge_type)]
+        return sum((self.columns[NUM_EDGES_PREFIX + edge_type_to_key(t)] for t in self.edge_types), np.zeros(len(self), dtype=np.int64))
+
+    @property
+    def is_packed(self) -> bool:
+        """Whether graphs are packed in shards rather than stored one file per graph
+        """
+        return any(key.startswith(NODE_OFFSET_PREFIX) for key in self.columns)
+
+    def get_location(self, idx:int) -> Tuple[Dict[str, Tuple[int, int]], Dict[Tuple[str, str, str], Tuple[int, int]]]:
+        """Position of a packed graph inside its shard
+
+        Returns:
+            nodes: {node_type: (offset, count)}
+            edges: {edge_type: (offset, count)}
+        """
+        nodes = {
+            node_type: (int(self.columns[NODE_OFFSET_PREFIX + node_type][idx]), int(self.columns[NUM_NODES_PREFIX + node_type][idx]))
+            for node_type in self.node_types
+        }
+        edges = {}
+        for edge_type in self.edge_types:
+            key = edge_type_to_key(edge_type)
+            edges[edge_type] = (int(self.columns[EDGE_OFFSET_PREFIX + key][idx]), int(self.columns[NUM_EDGES_PREFIX + key][idx]))
+        return nodes, edges
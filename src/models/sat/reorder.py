@@ -0,0 +1,172 @@
+from typing import Dict, Tuple
+import numpy as np
+import torch
+from torch_geometric.data import HeteroData
+
+REORDER_METHODS = ("rcm", "degree", "bfs")
+PERM_KEY = "perm"
+# Nodes whose degree is more than this many times the mean degree are hubs
+HUB_DEGREE_FACTOR = 16
+
+
+def get_id_counts(data:HeteroData) -> Dict[str, int]:
+    """Number of node ids of every node type: its number of nodes, or more if edges refer to larger ids. The base and
+    refactored representations index variable nodes by variable number but only have a node per variable that appears,
+    so the unused variables of a problem leave ids without a node.
+    """
+    counts = {node_type: data[node_type].num_nodes for node_type in data.node_types}
+    for (source_type, _, target_type), store in zip(data.edge_types, data.edge_stores):
+        if store.edge_index.numel():
+            counts[source_type] = max(counts[source_type], int(store.edge_index[0].max()) + 1)
+            counts[target_type] = max(counts[target_type], int(store.edge_index[1].max()) + 1)
+    return counts
+
+
+def build_adjacency(data:HeteroData) -> Tuple[Dict[str, int], np.ndarray, np.ndarray]:
+    """Undirected adjacency of a heterogeneous graph seen as one homogeneous graph, in CSR form. Ids of type t are offsets[t]
+    to offsets[t] + count(t) - 1, in node type order, where count(t) is given by get_id_counts.
+
+    Returns:
+        offsets (Dict[str, int]): first homogeneous id of every node type
+        indptr (np.ndarray): neighbors of node i are indices[indptr[i]:indptr[i+1]], sorted by id
+        indices (np.ndarray): neighbor ids
+    """
+    offsets = {}
+    num_nodes = 0
+    for node_type, count in get_id_counts(data).items():
+        offsets[node_type] = num_nodes
+        num_nodes += count
+
+    sources = [np.empty(0, dtype=np.int64)]
+    targets = [np.empty(0, dtype=np.int64)]
+    for (source_type, _, target_type), store in zip(data.edge_types, data.edge_stores):
+        edge_index = store.edge_index.numpy().astype(np.int64)
+        sources += [edge_index[0] + offsets[source_type], edge_index[1] + offsets[target_type]]
+        targets += [edge_index[1] + offsets[target_type], edge_index[0] + offsets[source_type]]
+    sources = np.concatenate(sources)
+    targets = np.concatenate(targets)
+
+    order = np.argsort(sources * max(num_nodes, 1) + targets, kind="stable")
+    indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=num_nodes), out=indptr[1:])
+    return offsets, indptr, targets[order]
+
+
+def breadth_first_order(indptr:np.ndarray, indices:np.ndarray, start:int, visited:np.ndarray, degrees:np.ndarray=None) -> np.ndarray:
+    """Breadth-first order of the connected component of start, one level at a time. Children are ordered by the position
+    of their parent in the current level and, if degrees is given, by increasing degree (Cuthill-McKee); otherwise by id.
+    visited is updated in place.
+    """
+    levels = [np.array([start], dtype=np.int64)]
+    visited[start] = True
+    frontier = levels[0]
+    while len(frontier):
+        counts = indptr[frontier + 1] - indptr[frontier]
+        starts = np.repeat(indptr[frontier] - np.cumsum(counts) + counts, counts)
+        children = indices[starts + np.arange(len(starts))]
+        parents = np.repeat(np.arange(len(frontier)), counts)
+        keep = ~visited[children]
+        children, parents = children[keep], parents[keep]
+        if degrees is not None:
+            order = np.lexsort((degrees[children], parents))
+            children = children[order]
+        children, first = np.unique(children, return_index=True)
+        frontier = children[np.argsort(first, kind="stable")]
+        visited[frontier] = True
+        levels.append(frontier)
+    return np.concatenate(levels)
+
+
+def compute_node_order(data:HeteroData, method:str) -> Dict[str, np.ndarray]:
+    """New order of the nodes of every type
+
+    Args:
+        method (str): 'rcm' (reverse Cuthill-McKee over the whole graph; neighbors end up with close ids), 'degree' (by decreasing
+            degree) or 'bfs' (breadth-first from the first connected constraint node, neighbors by id)
+
+    Returns:
+        {node_type: perm}, where perm[i] is the original index of the node placed at index i. Ids without a node (see
+        get_id_counts) are not part of perm; they keep their place, after the nodes
+    """
+    if method not in REORDER_METHODS:
+        raise ValueError(f"Unknown reordering method '{method}'; expected one of {REORDER_METHODS}")
+    offsets, indptr, indices = build_adjacency(data)
+    num_nodes = len(indptr) - 1
+    degrees = np.diff(indptr)
+    if method != "degree" and len(indices):
+        # Hubs (value nodes, the main constraint, the meta node) would put every node in the same breadth-first level, so they
+        # are left out of the traversal and placed last
+        hubs = degrees > HUB_DEGREE_FACTOR * degrees.mean()
+        if hubs.any():
+            sources = np.repeat(np.arange(num_nodes), degrees)
+            keep = ~hubs[sources] & ~hubs[indices]
+            indices = indices[keep]
+            np.cumsum(np.bincount(sources[keep], minlength=num_nodes), out=indptr[1:])
+            degrees = np.diff(indptr)
+
+    if method == "degree":
+        ranks = np.empty(num_nodes, dtype=np.int64)
+        ranks[np.argsort(-degrees, kind="stable")] = np.arange(num_nodes)
+    else:
+        visited = np.zeros(num_nodes, dtype=bool)
+        components = []
+        if method == "bfs" and "constraint" in offsets and data["constraint"].num_nodes:
+            start = offsets["constraint"] + int(np.argmax(degrees[offsets["constraint"]:offsets["constraint"] + data["constraint"].num_nodes] > 0))
+            components.append(breadth_first_order(indptr, indices, start, visited))
+        # Every remaining component starts from its node of lowest degree; isolated nodes go last
+        candidates = np.argsort(np.where(degrees > 0, degrees, np.iinfo(np.int64).max), kind="stable")
+        for start in candidates[degrees[candidates] > 0]:
+            if not visited[start]:
+                components.append(breadth_first_order(indptr, indices, start, visited, degrees if method == "rcm" else None))
+        order = np.concatenate(components)
+        if method == "rcm":
+            order = order[::-1]
+        # Hubs and isolated nodes are never visited; they stay last, after the reversal of rcm
+        order = np.concatenate((order, np.flatnonzero(~visited)))
+        ranks = np.empty(num_nodes, dtype=np.int64)
+        ranks[order] = np.arange(num_nodes)
+
+    perms = {}
+    ends = list(offsets.values())[1:] + [num_nodes]
+    for (node_type, offset), end in zip(offsets.items(), ends):
+        perm = np.argsort(ranks[offset:end], kind="stable")
+        perms[node_type] = perm[perm < data[node_type].num_nodes]
+    return perms
+
+
+def reorder_graph(data:HeteroData, method:str) -> HeteroData:
+    """Renumber the nodes of a graph so that nodes that are close in the graph are close in memory, which makes the gathers and
+    scatters of message passing more cache friendly. Node features are permuted, edge indices are relabeled and the edges of every
+    type are sorted by target then source node. The permutation of every node type is stored as data[node_type].perm, where perm[i]
+    is the original index of node i; see restore_node_order. The graph is modified in place.
+
+    Args:
+        method (str): 'rcm', 'degree' or 'bfs'; see compute_node_order
+    """
+    perms = compute_node_order(data, method)
+    counts = get_id_counts(data)
+    inverses = {}
+    for node_type, perm in perms.items():
+        inverse = np.arange(counts[node_type])
+        inverse[perm] = np.arange(len(perm))
+        inverses[node_type] = torch.from_numpy(inverse)
+        store = data[node_type]
+        perm = torch.from_numpy(perm)
+        store.x = store.x[perm]  # y is a graph-level label and keeps its shape
+        store[PERM_KEY] = perm
+
+    for (source_type, _, target_type), store in zip(data.edge_types, data.edge_stores):
+        edge_index = store.edge_index
+        sources = inverses[source_type][edge_index[0].long()]
+        targets = inverses[target_type][edge_index[1].long()]
+        order = torch.sort(targets * max(counts[source_type], 1) + sources, stable=True).indices
+        store.edge_index = torch.stack((sources[order], targets[order])).to(edge_index.dtype)
+    return data
+
+
+def restore_node_order(values:torch.Tensor, perm:torch.Tensor) -> torch.Tensor:
+    """Put per-node values (e.g. model outputs) of a reordered graph back in the original node order
+    """
+    restored = torch.empty_like(values)
+    restored[perm.long()] = values
+    return restored
@@ -0,0 +1,99 @@
+from typing import Iterator, List
+import numpy as np
+from torch.utils.data import Sampler
+
+
+class BucketBatchSampler(Sampler):
+    """
+    Batch sampler grouping graphs of similar size. Graphs are sorted by size and split into num_buckets buckets of equal
+    count; batches are formed inside a bucket, then the order of all batches is shuffled. Two modes are available:
+    - fixed: every batch holds batch_size graphs
+    - budget: graphs are added to a batch as long as the total size stays under max_size (a graph larger than
+      max_size gets its own batch), which keeps the memory and latency of every step close to constant
+    Sizes are precomputed; e.g. SatDataset.num_edges_per_graph(). Use with DataLoader(dataset, batch_sampler=sampler).
+    A new shuffle is drawn every time the sampler is iterated.
+    """
+    def __init__(self, sizes:np.ndarray, batch_size:int=None, max_size:int=None, num_buckets:int=10, shuffle:bool=True,
+                 drop_last:bool=False, seed:int=0):
+        """
+        Args:
+            sizes (np.ndarray): size of every graph of the dataset (number of nodes or edges)
+            batch_size (int, optional): number of graphs per batch, for the fixed mode
+            max_size (int, optional): maximum total size of a batch, for the budget mode
+            num_buckets (int): number of size buckets. Defaults to 10.
+            shuffle (bool): shuffle graphs inside buckets and the order of batches. Defaults to True.
+            drop_last (bool): in fixed mode, drop the last incomplete batch of every bucket. Defaults to False.
+            seed (int): seed of the shuffles. Defaults to 0.
+        """
+        if (batch_size is None) == (max_size is None):
+            raise ValueError("Exactly one of batch_size (fixed mode) and max_size (budget mode) must be given")
+        self.sizes = np.asarray(sizes)
+        self.batch_size = batch_size
+        self.max_size = max_size
+        self.num_buckets = max(1, min(num_buckets, len(self.sizes)))
+        self.shuffle = shuffle
+        self.drop_last = drop_last
+        self.seed = seed
+        self.epoch = 0
+
+    @classmethod
+    def from_dataset(cls, dataset, by:str="edges", **kwargs):
+        """Build a sampler from the sizes stored in the manifest of a SatDataset
+
+        Args:
+            by (str): 'edges' or 'nodes'
+        """
+        sizes = dataset.num_edges_per_graph() if by == "edges" else dataset.num_nodes_per_graph()
+        return cls(sizes, **kwargs)
+
+    def set_epoch(self, epoch:int):
+        self.epoch = epoch
+
+    def build_batches(self, epoch:int) -> List[np.ndarray]:
+        rng = np.random.default_rng([self.seed, epoch])
+        if self.shuffle:
+            # Break ties between graphs of equal size randomly
+            order = np.argsort(self.sizes + rng.random(len(self.sizes)) * 0.5, kind="stable")
+        else:
+            order = np.argsort(self.sizes, kind="stable")
+
+        batches = []
+        for bucket in np.array_split(order, self.num_buckets):
+            if self.shuffle:
+                bucket = rng.permutation(bucket)
+            if self.batch_size is not None:
+                bucket_batches = [bucket[i:i + self.batch_size] for i in range(0, len(bucket), self.batch_size)]
+                if self.drop_last and bucket_batches and len(bucket_batches[-1]) < self.batch_size:
+                    bucket_batches.pop()
+            else:
+                bucket_batches = self.split_by_budget(bucket)
+            batches.extend(bucket_batches)
+
+        if self.shuffle:
+            batches = [batches[i] for i in rng.permutation(len(batches))]
+        return batches
+
+    def split_by_budget(self, indices:np.ndarray) -> List[np.ndarray]:
+        """Split indices into consecutive batches whose total size does not exceed max_size
+        """
+        batches = []
+        start = 0
+        total = 0
+        for i, size in enumerate(self.sizes[indices].tolist()):
+            if i > start and total + size > self.max_size:
+                batches.append(indices[start:i])
+                start = i
+                total = 0
+            total += size
+        if start < len(indices):
+            batches.append(indices[start:])
+        return batches
+
+    def __iter__(self) -> Iterator[List[int]]:
+        batches = self.build_batches(self.epoch)
+        self.epoch += 1
+        for batch in batches:
+            yield batch.tolist()
+
+    def __len__(self) -> int:
+        return len(self.build_batches(self.epoch))
@@ -1,21 +1,187 @@
-from typing import List
+from functools import cached_property
+import gzip
+import lzma
+import os
+import re
+import warnings
+from typing import Dict, List, Optional, Tuple
+import numpy as np
 import torch
 from torch_geometric.data import HeteroData
-import torch_geometric.transforms as T
-
-
-def parse_dimacs_cnf(filepath:str):
-    with open(filepath, "r") as f:
-        lines = f.readlines()
-    
-    is_sat = filepath[-8]
-    clauses = []
-    for i in range(1, len(lines)):
-        line = lines[i].strip().split()[:-1]
-        new_clause = Clause(line)
-        clauses.append(new_clause)
-    
-    return CNF(clauses, is_sat)
+from corpus import flatten_clauses
+
+
+DIMACS_CHUNK_SIZE = 1 << 24
+
+
+def open_dimacs(filepath:str):
+    """Open a DIMACS file in binary mode, decompressing .gz, .xz and .lzma files on the fly
+    """
+    if filepath.endswith(".gz"):
+        return gzip.open(filepath, "rb")
+    if filepath.endswith((".xz", ".lzma")):
+        return lzma.open(filepath, "rb")
+    return open(filepath, "rb")
+
+
+def get_label_from_filename(filepath:str) -> Optional[int]:
+    """Get the satisfiability label from a file name like 'sr_n=0006_pk2=0.30_pg=0.40_t=9_sat=0.dimacs'; None if the name
+    has no label (e.g. competition instances)
+    """
+    match = re.search(r"sat=(\d)", os.path.basename(filepath))
+    if match is None:
+        return None
+    return int(match.group(1))
+
+
+def parse_integers(text:bytes, filepath:str) -> np.ndarray:
+    """Integers of clause lines read from a DIMACS file. Older Numpy versions only warn about a token that is not an integer
+    and stop parsing there, so the warning is turned into an error.
+    """
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", DeprecationWarning)
+        try:
+            return np.fromstring(text, dtype=np.int64, sep=" ")
+        except (ValueError, DeprecationWarning):
+            pass
+    token = next((token for token in text.split() if not token.lstrip(b"+-").isdigit()), None)
+    if token is None:
+        raise ValueError(f"{filepath} is not a valid DIMACS CNF file: its clauses could not be read as integer literals")
+    raise ValueError(f"{filepath} is not a valid DIMACS CNF file: {token.decode(errors='replace')!r} is not an integer literal")
+
+
+def read_dimacs_arrays(filepath:str, chunk_size:int=DIMACS_CHUNK_SIZE) -> Tuple[np.ndarray, np.ndarray, int]:
+    """Stream a DIMACS CNF file into a flat literal array and clause offsets. The file is read in chunks of chunk_size bytes,
+    so memory stays close to the size of the returned arrays. Comment lines are skipped, clauses can span several lines and
+    everything after a '%' line (SATLIB end marker) is ignored.
+
+    Args:
+        filepath (str): path to a .cnf/.dimacs file, optionally compressed as .gz, .xz or .lzma
+        chunk_size (int): number of bytes read at once
+
+    Returns:
+        literals (np.ndarray): int32 array containing the literals of every clause, in file order
+        offsets (np.ndarray): int64 array of size num_clauses + 1. The literals of clause i are literals[offsets[i]:offsets[i+1]]
+        num_variables (int): number of variables declared in the 'p cnf' header
+    """
+    num_variables = 0
+    literals = np.empty(0, dtype=np.int32)
+    offsets = np.zeros(1, dtype=np.int64)
+    num_literals = 0
+    num_offsets = 1
+    pending = b""
+    ended = False
+
+    with open_dimacs(filepath) as f:
+        while not ended:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                text, pending = pending, b""
+                ended = True
+            else:
+                chunk = pending + chunk
+                split_at = chunk.rfind(b"\n") + 1
+                if not split_at and chunk.lstrip()[:1] not in (b"c", b"p", b"%"):
+                    # Very long clause line: split between two literals
+                    split_at = chunk.rfind(b" ") + 1
+                text, pending = chunk[:split_at], chunk[split_at:]
+
+            if b"c" in text or b"p" in text or b"%" in text:
+                kept_lines = []
+                for line in text.split(b"\n"):
+                    stripped = line.lstrip()
+                    if stripped.startswith(b"c"):
+                        continue
+                    if stripped.startswith(b"p"):
+                        header = stripped.split()
+                        try:
+                            num_variables = int(header[2])
+                            num_clauses = int(header[3])
+                        except (IndexError, ValueError):
+                            raise ValueError(f"{filepath} is not a valid DIMACS CNF file: malformed header {stripped.decode(errors='replace')!r}") from None
+                        # Pre-allocate from the header; clauses of SR instances hold a few literals on average
+                        offsets = np.zeros(num_clauses + 1, dtype=np.int64)
+                        literals = np.empty(4 * num_clauses, dtype=np.int32)
+                        continue
+                    if stripped.startswith(b"%"):
+                        ended = True
+                        break
+                    kept_lines.append(line)
+                text = b"\n".join(kept_lines)
+
+            if not text.strip():
+                continue
+            values = parse_integers(text, filepath)
+            ends = np.flatnonzero(values == 0)
+            chunk_literals = values[values != 0]
+            if num_literals + len(chunk_literals) > len(literals):
+                literals = np.resize(literals, max(num_literals + len(chunk_literals), len(literals) * 3 // 2))
+            literals[num_literals:num_literals + len(chunk_literals)] = chunk_literals
+            if num_offsets + len(ends) > len(offsets):
+                offsets = np.resize(offsets, max(num_offsets + len(ends), len(offsets) * 3 // 2))
+            offsets[num_offsets:num_offsets + len(ends)] = num_literals + ends - np.arange(len(ends))
+            num_literals += len(chunk_literals)
+            num_offsets += len(ends)
+
+    if num_literals > offsets[num_offsets - 1]:
+        # Last clause is missing its terminating 0
+        if num_offsets == len(offsets):
+            offsets = np.resize(offsets, num_offsets + 1)
+        offsets[num_offsets] = num_literals
+        num_offsets += 1
+
+    literals = literals[:num_literals] if num_literals == len(literals) else literals[:num_literals].copy()
+    offsets = offsets[:num_offsets] if num_offsets == len(offsets) else offsets[:num_offsets].copy()
+    if not num_variables and num_literals:
+        num_variables = int(np.abs(literals).max())
+    return literals, offsets, num_variables
+
+
+def parse_dimacs_cnf(filepath:str, chunk_size:int=DIMACS_CHUNK_SIZE, is_sat:Optional[int]=None):
+    """Read a DIMACS CNF file; see read_dimacs_arrays
+
+    Args:
+        is_sat (int, optional): satisfiability label of the problem. Defaults to the label in the file name (see
+            get_label_from_filename); the label is unknown (None) if the name has none
+    """
+    literals, offsets, _ = read_dimacs_arrays(filepath, chunk_size)
+    if is_sat is None:
+        is_sat = get_label_from_filename(filepath)
+
+    return CNF(literals, offsets, is_sat)
+
+
+def literal_clause_indices(offsets:np.ndarray) -> np.ndarray:
+    """Index of the clause containing each literal of the flat literal array
+    """
+    return np.repeat(np.arange(len(offsets) - 1, dtype=np.int64), np.diff(offsets))
+
+
+def remove_duplicate_literals(literals:np.ndarray, offsets:np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Remove literals repeated inside a clause, keeping the first occurrence; i.e. give clauses the semantics of a set
+
+    Returns:
+        literals (np.ndarray): literals without repetitions
+        offsets (np.ndarray): updated clause offsets
+    """
+    if not len(literals):
+        return literals, offsets
+    clause_indices = literal_clause_indices(offsets)
+    max_variable = int(np.abs(literals).max())
+    keys = clause_indices * (2 * max_variable + 1) + (literals.astype(np.int64) + max_variable)
+    order = np.argsort(keys, kind="stable")  # stable, so repeated literals stay in file order
+    sorted_keys = keys[order]
+    repeated = np.zeros(len(literals), dtype=bool)
+    repeated[1:] = sorted_keys[1:] == sorted_keys[:-1]
+    if not repeated.any():
+        return literals, offsets
+
+    keep = np.ones(len(literals), dtype=bool)
+    keep[order[repeated]] = False
+    new_offsets = np.zeros_like(offsets)
+    np.cumsum(np.bincount(clause_indices[keep], minlength=len(offsets) - 1), out=new_offsets[1:])
+    return literals[keep], new_offsets
+
 
 class Clause:
     """
@@ -25,130 +191,202 @@ class Clause:
         self.variables = {int(var) for var in line}
 
 class CNF:
-    def __init__(self, clauses:List[Clause], is_sat:str):
-        self.clauses = clauses
-        self.is_sat = int(is_sat)
-        variables = set()
-        base_variables = set()
-        for clause in self.clauses:
-            base_vars = {abs(var) -1 for var in clause.variables}
-            base_variables = base_variables.union(base_vars)
-            variables = variables.union(clause.variables)
-        variables = list(variables)
-        base_variables = list(base_variables)
-        self.variables = sorted(variables)
-        self.base_variables = sorted(base_variables)
-    
+    """
+    CNF problem stored as one contiguous literal array and clause offsets. The clauses, variables and base_variables
+    attributes are computed from the arrays the first time they are accessed.
+    """
+    def __init__(self, literals:np.ndarray, clause_offsets:np.ndarray, is_sat:Optional[str]):
+        """
+        Args:
+            literals (np.ndarray): literals of every clause, in clause order
+            clause_offsets (np.ndarray): array of size num_clauses + 1. The literals of clause i are literals[clause_offsets[i]:clause_offsets[i+1]]
+            is_sat (str, optional): 1 if the problem is satisfiable, 0 otherwise, None if unknown. Graphs of problems with an
+                unknown label have no y
+        """
+        literals = np.ascontiguousarray(literals, dtype=np.int32)
+        clause_offsets = np.ascontiguousarray(clause_offsets, dtype=np.int64)
+        self.literals, self.clause_offsets = remove_duplicate_literals(literals, clause_offsets)
+        self.is_sat = int(is_sat) if is_sat is not None else None
+
+    @classmethod
+    def from_clauses(cls, clauses:List[Clause], is_sat:str):
+        literals, offsets = flatten_clauses(clauses)
+        return cls(literals, offsets, is_sat)
+
+    @property
+    def num_clauses(self) -> int:
+        return len(self.clause_offsets) - 1
+
+    @cached_property
+    def literal_set(self) -> np.ndarray:
+        """Sorted array of the distinct literals of the problem
+        """
+        return np.unique(self.literals)
+
+    @cached_property
+    def base_variable_set(self) -> np.ndarray:
+        """Sorted array of the distinct (0-indexed) variables of the problem
+        """
+        return np.unique(np.abs(self.literal_set) - 1)
+
+    @cached_property
+    def clauses(self) -> List[Clause]:
+        return [Clause(self.literals[start:end]) for start, end in zip(self.clause_offsets[:-1], self.clause_offsets[1:])]
+
+    @cached_property
+    def variables(self) -> List[int]:
+        return self.literal_set.tolist()
+
+    @cached_property
+    def base_variables(self) -> List[int]:
+        return self.base_variable_set.tolist()
+
+    def common_prefix_length(self, other:"CNF") -> int:
+        """Number of leading clauses that are identical (same literals in the same order) in both problems
+        """
+        num_clauses = min(self.num_clauses, other.num_clauses)
+        same_offsets = self.clause_offsets[:num_clauses + 1] == other.clause_offsets[:num_clauses + 1]
+        if not same_offsets.all():
+            num_clauses = int(np.argmin(same_offsets)) - 1
+        end = self.clause_offsets[num_clauses]
+        different = np.flatnonzero(self.literals[:end] != other.literals[:end])
+        if len(different):
+            num_clauses = int(np.searchsorted(self.clause_offsets, different[0], side="right")) - 1
+        return num_clauses
+
+    def suffix(self, num_clauses:int) -> Tuple[np.ndarray, np.ndarray]:
+        """Literals and clause offsets of the clauses following the first num_clauses clauses
+        """
+        start = self.clause_offsets[num_clauses]
+        return self.literals[start:], self.clause_offsets[num_clauses:] - start
+
+    def graph_prefix(self, num_clauses:int, graph_types:List[str]) -> "GraphPrefix":
+        """Start the incremental construction of the graphs of problems whose first clauses are the first num_clauses clauses
+        of this problem; see GraphPrefix
+        """
+        end = self.clause_offsets[num_clauses]
+        return GraphPrefix(self.literals[:end], self.clause_offsets[:num_clauses + 1], graph_types)
+
     def build_heterogeneous_graph(self, original=True):
-        """Build the modified graph representation; i.e. one where variables (literals) are directly connected to their negated variable (literals)
+        """Build the base graph representation; i.e. one where every negated literal goes through its own negation operator
+        before reaching its constraint (variable -> operator -> constraint)
 
         Returns:
             data (torch_geometric.data.HeteroData): graph for the SAT problem
         """
-        # Nodes and node stuff
-        constraints = [[1, 0]]
-        negation_operator_id = 0
-        operators = []
+        parts = self.heterogeneous_graph_parts(self.literals, self.clause_offsets)
+        return self.assemble_heterogeneous_graph(parts, self.literal_set, self.num_clauses, self.is_sat)
 
-        # Edges and edge stuff
-        variable_to_value_edges = self.get_sat_variable_to_domain_edges(self.base_variables)
-        variable_to_operator_edges = []
-        variable_to_constraint_edges = []
-        operator_to_constraint_edges = []
-        constraint_to_constraint_edges = []
-
-        for i, clause in enumerate(self.clauses):
-            current_constraint_index = i + 1
-            constraints.append([0, 1])
-            for variable in clause.variables:
-                variable_index = abs(variable) - 1
-                if variable < 0:
-                    operators.append([1])
-                    variable_to_operator_edges.append([variable_index, negation_operator_id])
-                    operator_to_constraint_edges.append([negation_operator_id, current_constraint_index])
-                    negation_operator_id += 1
-                else:
-                    variable_to_constraint_edges.append([variable_index, current_constraint_index])
-            constraint_to_constraint_edges.append([0, current_constraint_index])
-        data = HeteroData()
-
-        var_tensor = torch.Tensor([[1, len(self.base_variables), len(self.clauses)] for _ in self.base_variables])
+    @staticmethod
+    def heterogeneous_graph_parts(literals:np.ndarray, offsets:np.ndarray, first_clause:int=0) -> Dict[str, np.ndarray]:
+        """Per-literal arrays of the base representation for clauses starting at clause first_clause. The arrays of consecutive
+        clause ranges are concatenated along their last axis.
+        """
+        clause_indices = literal_clause_indices(offsets) + first_clause + 1  # constraint 0 is the main constraint
+        variable_indices = np.abs(literals).astype(np.int64) - 1
+        negated = literals < 0
+        return {
+            "operator_variables": variable_indices[negated],
+            "operator_constraints": clause_indices[negated],
+            "variable_constraint_edges": np.stack((variable_indices[~negated], clause_indices[~negated])),
+        }
 
-        data["variable"].x = var_tensor
-        label = [0, 1] if self.is_sat else [1, 0]
-        data["variable"].y = torch.Tensor([label])
-        data["value"].x = torch.Tensor([[0], [1]])
-        data["operator"].x = torch.Tensor([[1] for _ in range(negation_operator_id)])
-        data["constraint"].x = torch.Tensor(constraints)
+    @staticmethod
+    def assemble_heterogeneous_graph(parts:Dict[str, np.ndarray], literal_set:np.ndarray, num_clauses:int, is_sat:int,
+                                     shared:dict=None) -> HeteroData:
+        """Build the base representation from the parts of all clauses. Tensors that only depend on the sizes or the variables
+        of the problem are taken from (and added to) shared when it is given.
+        """
+        base_variable_set = np.unique(np.abs(literal_set).astype(np.int64) - 1)
+        num_variables = len(base_variable_set)
+        num_operators = len(parts["operator_variables"])
+        operator_ids = np.arange(num_operators, dtype=np.int64)
 
-        data["variable", "connected_to", "value"].edge_index = self.build_edge_index_tensor(variable_to_value_edges)
-        data["variable", "connected_to", "operator"].edge_index = self.build_edge_index_tensor(variable_to_operator_edges)
-        data["variable", "connected_to", "constraint"].edge_index = self.build_edge_index_tensor(variable_to_constraint_edges)
-        data["operator", "connected_to", "constraint"].edge_index = self.build_edge_index_tensor(operator_to_constraint_edges)
-        data["constraint", "connected_to", "constraint"].edge_index = self.build_edge_index_tensor(constraint_to_constraint_edges)
-        T.ToUndirected()(data)
+        data = HeteroData()
+        data["variable"].x = shared_tensor(shared, ("variable", num_variables, num_clauses),
+                                           lambda: CNF.build_feature_tensor(np.tile([1, num_variables, num_clauses], (num_variables, 1))))
+        data["variable"].y = shared_tensor(shared, ("y", is_sat), lambda: CNF.build_label_tensor(is_sat))
+        data["value"].x = shared_tensor(shared, "value", lambda: torch.Tensor([[0], [1]]))
+        data["operator"].x = shared_tensor(shared, ("operator", num_operators), lambda: CNF.build_feature_tensor(np.ones((num_operators, 1))))
+        data["constraint"].x = shared_tensor(shared, ("constraint", num_clauses), lambda: CNF.build_main_constraint_features(num_clauses))
 
+        set_undirected_edges(data, {
+            ("variable", "connected_to", "value"): shared_tensor(
+                shared, ("variable_value", base_variable_set.tobytes()),
+                lambda: CNF.build_edge_index_tensor(CNF.get_sat_variable_to_domain_edges(base_variable_set))),
+            ("variable", "connected_to", "operator"): CNF.build_edge_index_tensor(np.stack((parts["operator_variables"], operator_ids))),
+            ("variable", "connected_to", "constraint"): CNF.build_edge_index_tensor(parts["variable_constraint_edges"]),
+            ("operator", "connected_to", "constraint"): CNF.build_edge_index_tensor(np.stack((operator_ids, parts["operator_constraints"]))),
+            ("constraint", "connected_to", "constraint"): shared_tensor(
+                shared, ("constraint_constraint", num_clauses), lambda: CNF.build_edge_index_tensor(undirected_star_edges(num_clauses))),
+        })
         return data
-    
+
     def build_sat_specific_heterogeneous_graph(self, random_values=False):
         """Build the modified graph representation; i.e. one where variables (literals) are directly connected to their negated variable (literals)
-        IMPORTANT: After investigation, it was concluded that this formulation is not generic enough as it leverages SAT-specific structure. 
+        IMPORTANT: After investigation, it was concluded that this formulation is not generic enough as it leverages SAT-specific structure.
 
         Returns:
             data (torch_geometric.data.HeteroData): graph for the SAT problem
         """
-        # Nodes and node stuff
-        variable_to_index = {var: idx for idx, var in enumerate(self.variables)}
-        constraints = [[1, 0]]
-        negation_operator_id = 0
-        operators = []
+        parts = self.sat_specific_heterogeneous_graph_parts(self.literals, self.clause_offsets)
+        return self.assemble_sat_specific_heterogeneous_graph(parts, self.literal_set, self.num_clauses, self.is_sat, random_values=random_values)
+
+    @staticmethod
+    def sat_specific_heterogeneous_graph_parts(literals:np.ndarray, offsets:np.ndarray, first_clause:int=0) -> Dict[str, np.ndarray]:
+        """Per-literal arrays of the modified representation for clauses starting at clause first_clause. Literal nodes are
+        indexed in the sorted literal set of the whole problem, so literals are only mapped to nodes when assembling.
+        """
+        return {
+            "literals": literals.astype(np.int64),
+            "constraints": literal_clause_indices(offsets) + first_clause + 1,
+        }
+
+    @staticmethod
+    def assemble_sat_specific_heterogeneous_graph(parts:Dict[str, np.ndarray], literal_set:np.ndarray, num_clauses:int, is_sat:int,
+                                                  shared:dict=None, random_values:bool=False) -> HeteroData:
+        """Build the modified representation from the parts of all clauses; see assemble_heterogeneous_graph
+        """
+        variables = literal_set.astype(np.int64)
+        literals = parts["literals"]
+        literal_indices = np.searchsorted(variables, literals)
+
+        # Every negated literal occurrence whose positive literal also appears gets its own negation operator,
+        # connected to both the positive and the negated literal
+        negated_literals = literals[literals < 0]
+        negated_indices = literal_indices[literals < 0]
+        positive_indices = np.searchsorted(variables, -negated_literals)
+        has_positive = positive_indices < len(variables)
+        has_positive[has_positive] = variables[positive_indices[has_positive]] == -negated_literals[has_positive]
+        num_operators = int(has_positive.sum())
 
         # Edges and edge stuff
-        variable_to_value_edges = self.get_sat_variable_to_domain_edges(self.variables, modified=True)
-        variable_to_operator_edges = []
-        variable_to_constraint_edges = []
-        variable_to_operator_edges = []
-        constraint_to_constraint_edges = []
-
-        for i, clause in enumerate(self.clauses):
-            current_constraint_index = i + 1
-            constraints.append([0, 1])
-            for variable in clause.variables:
-                variable_index = variable_to_index[variable]
-                if variable < 0:
-                    positive_var = abs(variable)
-                    positive_var_index = variable_to_index.get(positive_var, None)
-                    if positive_var_index is not None:
-                        pairs_to_add = [
-                            [positive_var_index, negation_operator_id],
-                            [variable_index, negation_operator_id]
-                        ]
-                        if pairs_to_add[0] not in variable_to_operator_edges and pairs_to_add[1] not in variable_to_operator_edges:
-                            variable_to_operator_edges.append(pairs_to_add[0])
-                            variable_to_operator_edges.append(pairs_to_add[1])                    
-                            negation_operator_id += 1
-                    
-                variable_to_constraint_edges.append([variable_index, current_constraint_index])
-            constraint_to_constraint_edges.append([0, current_constraint_index])
+        variable_to_operator_edges = np.stack((
+            np.column_stack((positive_indices[has_positive], negated_indices[has_positive])).ravel(),
+            np.repeat(np.arange(num_operators, dtype=np.int64), 2)
+        ))
+        variable_to_constraint_edges = np.stack((literal_indices, parts["constraints"]))
+
         data = HeteroData()
         if random_values:
-            var_tensor = torch.randn((len(self.variables), 1))
+            data["variable"].x = torch.randn((len(variables), 1))
         else:
-            var_tensor = torch.Tensor([[1] if var > 0 else [-1] for var in self.variables])
-        data["variable"].x = var_tensor
-        label = [0, 1] if self.is_sat else [1, 0]
-        data["variable"].y = torch.Tensor([label])
-        data["value"].x = torch.Tensor([[0], [1]])
-        data["operator"].x = torch.Tensor(
-            [[1] for _ in range(negation_operator_id)])
-        data["constraint"].x = torch.Tensor(constraints)
-
-        data["variable", "connected_to", "value"].edge_index = self.build_edge_index_tensor(variable_to_value_edges)
-        data["variable", "connected_to", "operator"].edge_index = self.build_edge_index_tensor(variable_to_operator_edges)
-        data["variable", "connected_to", "constraint"].edge_index = self.build_edge_index_tensor(variable_to_constraint_edges)
-        data["constraint", "connected_to", "constraint"].edge_index = self.build_edge_index_tensor(constraint_to_constraint_edges)
-        T.ToUndirected()(data)
+            data["variable"].x = shared_tensor(shared, ("variable", variables.tobytes()),
+                                               lambda: CNF.build_feature_tensor(np.where(variables > 0, 1, -1)[:, None]))
+        data["variable"].y = shared_tensor(shared, ("y", is_sat), lambda: CNF.build_label_tensor(is_sat))
+        data["value"].x = shared_tensor(shared, "value", lambda: torch.Tensor([[0], [1]]))
+        data["operator"].x = shared_tensor(shared, ("operator", num_operators), lambda: CNF.build_feature_tensor(np.ones((num_operators, 1))))
+        data["constraint"].x = shared_tensor(shared, ("constraint", num_clauses), lambda: CNF.build_main_constraint_features(num_clauses))
 
+        set_undirected_edges(data, {
+            ("variable", "connected_to", "value"): shared_tensor(
+                shared, ("variable_value", len(variables)),
+                lambda: CNF.build_edge_index_tensor(CNF.get_sat_variable_to_domain_edges(variables, modified=True))),
+            ("variable", "connected_to", "operator"): CNF.build_edge_index_tensor(variable_to_operator_edges),
+            ("variable", "connected_to", "constraint"): CNF.build_edge_index_tensor(variable_to_constraint_edges),
+            ("constraint", "connected_to", "constraint"): shared_tensor(
+                shared, ("constraint_constraint", num_clauses), lambda: CNF.build_edge_index_tensor(undirected_star_edges(num_clauses))),
+        })
         return data
 
 
@@ -159,62 +397,178 @@ class CNF:
         Returns:
             data (torch_geometric.data.HeteroData): graph for the SAT problem
         """
+        parts = self.generic_heterogeneous_graph_parts(self.literals, self.clause_offsets)
+        return self.assemble_generic_heterogeneous_graph(parts, self.literal_set, self.num_clauses, self.is_sat)
+
+    @staticmethod
+    def generic_heterogeneous_graph_parts(literals:np.ndarray, offsets:np.ndarray, first_clause:int=0) -> Dict[str, np.ndarray]:
+        """Per-literal arrays of the refactored representation for clauses starting at clause first_clause; see heterogeneous_graph_parts
+        """
+        clause_indices = literal_clause_indices(offsets) + first_clause
+        variable_indices = np.abs(literals).astype(np.int64) - 1
+        negated = literals < 0
+        return {
+            "clause_lengths": np.diff(offsets),
+            "negated_variables": variable_indices[negated],
+            "variable_constraint_edges": np.stack((variable_indices[~negated], clause_indices[~negated])),
+            "operator_constraint_edges": np.stack((variable_indices[negated], clause_indices[negated])),
+        }
+
+    @staticmethod
+    def assemble_generic_heterogeneous_graph(parts:Dict[str, np.ndarray], literal_set:np.ndarray, num_clauses:int, is_sat:int,
+                                             shared:dict=None) -> HeteroData:
+        """Build the refactored representation from the parts of all clauses; see assemble_heterogeneous_graph
+        """
+        base_variable_set = np.unique(np.abs(literal_set).astype(np.int64) - 1)
+        num_variables = len(base_variable_set)
+
         # Nodes and node stuff
-        constraints = []
-        operators = [[-1] for _ in self.base_variables]
-        meta = [[len(self.clauses), len(self.base_variables)]]
+        constraints = np.column_stack((np.ones(num_clauses), parts["clause_lengths"]))
 
         # Edges and edge stuff
-        variable_to_value_edges = self.get_sat_variable_to_domain_edges(self.base_variables)
-        variable_to_operator_edges = []
-        variable_to_constraint_edges = []
-        operator_to_constraint_edges = []
-        meta_to_constraint_edges = []
-
-        for i, clause in enumerate(self.clauses):
-            current_constraint_index = i
-            constraints.append([1, len(clause.variables)])
-            for variable in clause.variables:
-                variable_index = abs(variable) - 1
-                if variable < 0:
-                    if [variable_index, variable_index] not in variable_to_operator_edges:
-                        variable_to_operator_edges.append([variable_index, variable_index]) # the operator index is the same as the variable index
-                    operator_to_constraint_edges.append([variable_index, current_constraint_index])
-                else:
-                    variable_to_constraint_edges.append([variable_index, current_constraint_index])
-            meta_to_constraint_edges.append([0, current_constraint_index])
-        
+        # The operator index is the same as the variable index. Operators are connected in order of first negation.
+        negated_variables, first_negations = np.unique(parts["negated_variables"], return_index=True)
+        negated_variables = negated_variables[np.argsort(first_negations, kind="stable")]
+
         data = HeteroData()
-        var_tensor = torch.Tensor([[1] for _ in self.base_variables])
-
-        data["variable"].x = var_tensor
-        label = [0, 1] if self.is_sat else [1, 0]
-        data["variable"].y = torch.Tensor([label])
-        data["value"].x = torch.Tensor([[0], [1]])
-        data["operator"].x = torch.Tensor(operators)
-        data["constraint"].x = torch.Tensor(constraints)
-        data["meta"].x = torch.Tensor(meta)
-
-        data["variable", "connected_to", "value"].edge_index = self.build_edge_index_tensor(variable_to_value_edges)
-        data["variable", "connected_to", "operator"].edge_index = self.build_edge_index_tensor(variable_to_operator_edges)
-        data["variable", "connected_to", "constraint"].edge_index = self.build_edge_index_tensor(variable_to_constraint_edges)
-        data["operator", "connected_to", "constraint"].edge_index = self.build_edge_index_tensor(operator_to_constraint_edges)
-        data["meta", "connected_to", "constraint"].edge_index = self.build_edge_index_tensor(meta_to_constraint_edges)
-        
-        T.ToUndirected()(data)
+        data["variable"].x = shared_tensor(shared, ("variable", num_variables), lambda: CNF.build_feature_tensor(np.ones((num_variables, 1))))
+        data["variable"].y = shared_tensor(shared, ("y", is_sat), lambda: CNF.build_label_tensor(is_sat))
+        data["value"].x = shared_tensor(shared, "value", lambda: torch.Tensor([[0], [1]]))
+        data["operator"].x = shared_tensor(shared, ("operator", num_variables), lambda: CNF.build_feature_tensor(np.full((num_variables, 1), -1)))
+        data["constraint"].x = CNF.build_feature_tensor(constraints)
+        data["meta"].x = shared_tensor(shared, ("meta", num_clauses, num_variables), lambda: torch.Tensor([[num_clauses, num_variables]]))
 
+        set_undirected_edges(data, {
+            ("variable", "connected_to", "value"): shared_tensor(
+                shared, ("variable_value", base_variable_set.tobytes()),
+                lambda: CNF.build_edge_index_tensor(CNF.get_sat_variable_to_domain_edges(base_variable_set))),
+            ("variable", "connected_to", "operator"): CNF.build_edge_index_tensor(np.stack((negated_variables, negated_variables))),
+            ("variable", "connected_to", "constraint"): CNF.build_edge_index_tensor(parts["variable_constraint_edges"]),
+            ("operator", "connected_to", "constraint"): CNF.build_edge_index_tensor(parts["operator_constraint_edges"]),
+            ("meta", "connected_to", "constraint"): shared_tensor(
+                shared, ("meta_constraint", num_clauses),
+                lambda: CNF.build_edge_index_tensor(np.stack((np.zeros(num_clauses, dtype=np.int64), np.arange(num_clauses))))),
+        })
         return data
-    
-    def get_sat_variable_to_domain_edges(self, variables, modified=False):
-        edges = []
-        for i, variable in enumerate(variables):
-            for value in [0, 1]:
-                if modified:
-                    new_edge = [i, value]
-                else:
-                    new_edge = [variable, value]
-                edges.append(new_edge)
-        return edges
-    
-    def build_edge_index_tensor(self, edges:List)->torch.Tensor:
-        return torch.Tensor(edges).long().t().contiguous()
\ No newline at end of file
+
+    @staticmethod
+    def get_sat_variable_to_domain_edges(variables, modified=False) -> np.ndarray:
+        """Connect every variable to both boolean values. Returns an array of shape (2, 2 * len(variables))
+        """
+        if modified:
+            sources = np.arange(len(variables), dtype=np.int64)
+        else:
+            sources = np.asarray(variables, dtype=np.int64)
+        return np.stack((np.repeat(sources, 2), np.tile(np.arange(2, dtype=np.int64), len(sources))))
+
+    @staticmethod
+    def build_main_constraint_features(num_clauses:int) -> torch.Tensor:
+        """Features of the main constraint (first row) followed by one row per clause
+        """
+        constraints = np.zeros((num_clauses + 1, 2))
+        constraints[0, 0] = 1
+        constraints[1:, 1] = 1
+        return CNF.build_feature_tensor(constraints)
+
+    @staticmethod
+    def build_label_tensor(is_sat:Optional[int]) -> Optional[torch.Tensor]:
+        """Label of a graph; None for an unknown label, which leaves the graph without y
+        """
+        if is_sat is None:
+            return None
+        label = [0, 1] if is_sat else [1, 0]
+        return torch.Tensor([label])
+
+    @staticmethod
+    def build_feature_tensor(features:np.ndarray) -> torch.Tensor:
+        return torch.from_numpy(np.ascontiguousarray(features, dtype=np.float32))
+
+    @staticmethod
+    def build_edge_index_tensor(edges:np.ndarray) -> torch.Tensor:
+        """
+        Args:
+            edges (np.ndarray): array of shape (2, num_edges)
+        """
+        return torch.from_numpy(np.ascontiguousarray(edges, dtype=np.int64).reshape(2, -1))
+
+
+class GraphPrefix:
+    """
+    Incremental construction of the graphs of CNF problems that share their first clauses; e.g. the SAT/UNSAT pairs written
+    by gen_sr_dimacs.py, which only differ in their last clause. The per-literal arrays of the common clauses are computed
+    once, then every variant only computes the arrays of its own clauses. Tensors that only depend on what the variants
+    have in common (numbers of nodes, variable sets, the main constraint edges, ...) are built once and shared by the graphs
+    of all variants, so they should not be modified in place.
+    """
+    GRAPH_PARTS = {
+        "base": (CNF.heterogeneous_graph_parts, CNF.assemble_heterogeneous_graph),
+        "modified": (CNF.sat_specific_heterogeneous_graph_parts, CNF.assemble_sat_specific_heterogeneous_graph),
+        "refactored": (CNF.generic_heterogeneous_graph_parts, CNF.assemble_generic_heterogeneous_graph),
+    }
+
+    def __init__(self, literals:np.ndarray, clause_offsets:np.ndarray, graph_types:List[str]):
+        """
+        Args:
+            literals (np.ndarray): literals of the common clauses
+            clause_offsets (np.ndarray): offsets of the common clauses; see CNF
+            graph_types (List[str]): representations that will be built, among 'base', 'modified' and 'refactored'
+        """
+        self.num_clauses = len(clause_offsets) - 1
+        self.literal_set = np.unique(literals)
+        self.parts = {graph_type: self.GRAPH_PARTS[graph_type][0](literals, clause_offsets) for graph_type in graph_types}
+        self.shared = {graph_type: {} for graph_type in graph_types}
+
+    def add_clauses(self, literals:np.ndarray, clause_offsets:np.ndarray, is_sat:int, graph_type:str) -> HeteroData:
+        """Build the graph of the problem made of the common clauses followed by the given clauses
+
+        Args:
+            literals (np.ndarray): literals of the clauses added after the common clauses
+            clause_offsets (np.ndarray): offsets of the added clauses, starting at 0
+            is_sat (int): 1 if the problem is satisfiable, 0 otherwise, None if unknown
+            graph_type (str): one of the representations given when creating the prefix
+        """
+        build_parts, assemble = self.GRAPH_PARTS[graph_type]
+        suffix_parts = build_parts(literals, clause_offsets, first_clause=self.num_clauses)
+        parts = {
+            key: np.concatenate((value, suffix_parts[key]), axis=-1)
+            for key, value in self.parts[graph_type].items()
+        }
+        literal_set = np.union1d(self.literal_set, literals)
+        num_clauses = self.num_clauses + len(clause_offsets) - 1
+        return assemble(parts, literal_set, num_clauses, None if is_sat is None else int(is_sat), shared=self.shared[graph_type])
+
+    def build(self, cnf:CNF, graph_type:str) -> HeteroData:
+        """Build the graph of a problem whose first clauses are the common clauses; see CNF.common_prefix_length
+        """
+        literals, clause_offsets = cnf.suffix(self.num_clauses)
+        return self.add_clauses(literals, clause_offsets, cnf.is_sat, graph_type)
+
+
+def shared_tensor(shared:dict, key, build) -> torch.Tensor:
+    """Get the tensor stored under key in shared, building and storing it first if needed. Without shared, just build it.
+    """
+    if shared is None:
+        return build()
+    if key not in shared:
+        shared[key] = build()
+    return shared[key]
+
+
+def undirected_star_edges(num_clauses:int) -> np.ndarray:
+    """Edges between the main constraint (node 0) and every clause constraint, in both directions and sorted like
+    torch_geometric.utils.to_undirected sorts them
+    """
+    clause_ids = np.arange(1, num_clauses + 1, dtype=np.int64)
+    main_ids = np.zeros(num_clauses, dtype=np.int64)
+    return np.stack((np.concatenate((main_ids, clause_ids)), np.concatenate((clause_ids, main_ids))))
+
+
+def set_undirected_edges(data:HeteroData, edges:Dict[Tuple[str, str, str], torch.Tensor]):
+    """Set the edge indices of a graph and add the reverse ('rev_' relation) of every edge type between two different node
+    types, like T.ToUndirected does. Edges between nodes of the same type must already be undirected.
+    """
+    for edge_type, edge_index in edges.items():
+        data[edge_type].edge_index = edge_index
+    for (source, relation, target), edge_index in edges.items():
+        if source != target:
+            data[target, f"rev_{relation}", source].edge_index = edge_index.flip([0])
@@ -1,4 +1,4 @@
-python3 gen_sr_dimacs.py data/test/ 10000 --min_n 3 --max_n 20 --p_geo 0.2 --p_k_2 0.2
+python3 gen_sr_dimacs.py data/test/ 10000 --min_n 3 --max_n 20 --p_geo 0.2 --p_k_2 0.2 --py_seed 0 --np_seed 0 --num_workers $(nproc)
 # python3 gen_sr_dimacs.py data/raw/ 50 --min_n 3 --max_n 20 --p_geo 0.8 --p_k_2 0.2
 # python3 gen_sr_dimacs.py data/raw/ 90 --min_n 3 --max_n 20 --p_geo 0.8 --p_k_2 0.8
 # python3 gen_sr_dimacs.py data/raw/ 150 --min_n 3 --max_n 20 --p_geo 0.2 --p_k_2 0.8
\ No newline at end of file
@@ -0,0 +1,174 @@
+import os
+from typing import Dict, Tuple
+import numpy as np
+import torch
+from torch_geometric.data import HeteroData
+from manifest import NODE_OFFSET_PREFIX, EDGE_OFFSET_PREFIX, edge_type_to_key
+from reorder import PERM_KEY
+
+
+def node_array_name(node_type:str) -> str:
+    return f"x.{node_type}.npy"
+
+
+def perm_array_name(node_type:str) -> str:
+    return f"perm.{node_type}.npy"
+
+
+def edge_array_name(edge_type:Tuple[str, str, str]) -> str:
+    return f"edge_index.{edge_type_to_key(edge_type)}.npy"
+
+
+class ShardWriter:
+    """
+    Packs graphs into shards. A shard is a directory holding, for every node type, the node features of all its graphs
+    concatenated along the first dimension (as well as their node permutations, for reordered graphs) and, for every edge
+    type, their edge indices concatenated along the second dimension. Edge indices stay local to their graph. The position of each graph is returned by add and is meant to be
+    stored in the dataset manifest. Graphs can also be added as plain arrays with add_arrays, e.g. by the decision TSP dataset.
+    """
+    def __init__(self, directory:str, shard_size:int=10000, prefix:str="shard"):
+        """
+        Args:
+            directory (str): directory where shards are written
+            shard_size (int): number of graphs per shard
+            prefix (str): shard names are {prefix}_{shard index}
+        """
+        self.directory = directory
+        self.shard_size = shard_size
+        self.prefix = prefix
+        self.num_shards = 0
+        self._reset()
+
+    def _reset(self):
+        self.node_features = {}
+        self.node_perms = {}
+        self.edge_indices = {}
+        self.node_counts = {}
+        self.edge_counts = {}
+        self.num_graphs = 0
+
+    @property
+    def shard_name(self) -> str:
+        return f"{self.prefix}_{self.num_shards:05d}"
+
+    def add(self, data:HeteroData) -> Tuple[str, Dict[str, int]]:
+        """Add a graph to the current shard
+
+        Returns:
+            shard_name (str): name of the shard containing the graph
+            offsets (Dict[str, int]): node_offset_* and edge_offset_* manifest columns of the graph
+        """
+        features = {node_type: data[node_type].x.numpy() for node_type in data.node_types}
+        perms = {node_type: data[node_type][PERM_KEY].numpy() for node_type in data.node_types if PERM_KEY in data[node_type]}
+        edges = {edge_type: data[edge_type].edge_index.numpy() for edge_type in data.edge_types}
+        return self.add_arrays(features, edges, perms)
+
+    def add_arrays(self, features:Dict[str, np.ndarray], edges:Dict[Tuple[str, str, str], np.ndarray],
+                   perms:Dict[str, np.ndarray]=None) -> Tuple[str, Dict[str, int]]:
+        """Add a graph given as arrays to the current shard; see add
+
+        Args:
+            features: {node_type: node features, one row per node}
+            edges: {edge_type: edge indices of shape (2, num_edges)}
+            perms (optional): {node_type: node permutation}, for reordered graphs
+        """
+        if self.num_graphs == self.shard_size:
+            self.flush()
+
+        offsets = {}
+        for node_type, x in features.items():
+            offsets[NODE_OFFSET_PREFIX + node_type] = self.node_counts.get(node_type, 0)
+            self.node_features.setdefault(node_type, []).append(x)
+            if perms and node_type in perms:
+                self.node_perms.setdefault(node_type, []).append(perms[node_type])
+            self.node_counts[node_type] = self.node_counts.get(node_type, 0) + x.shape[0]
+        for edge_type, edge_index in edges.items():
+            offsets[EDGE_OFFSET_PREFIX + edge_type_to_key(edge_type)] = self.edge_counts.get(edge_type, 0)
+            self.edge_indices.setdefault(edge_type, []).append(edge_index)
+            self.edge_counts[edge_type] = self.edge_counts.get(edge_type, 0) + edge_index.shape[1]
+        self.num_graphs += 1
+
+        return self.shard_name, offsets
+
+    def flush(self):
+        """Write the current shard to disk and start a new one
+        """
+        if not self.num_graphs:
+            return
+        shard_dir = os.path.join(self.directory, self.shard_name)
+        os.makedirs(shard_dir, exist_ok=True)
+        for node_type, features in self.node_features.items():
+            np.save(os.path.join(shard_dir, node_array_name(node_type)), np.concatenate(features, axis=0))
+        for node_type, perms in self.node_perms.items():
+            np.save(os.path.join(shard_dir, perm_array_name(node_type)), np.concatenate(perms))
+        for edge_type, edge_indices in self.edge_indices.items():
+            np.save(os.path.join(shard_dir, edge_array_name(edge_type)), np.concatenate(edge_indices, axis=1))
+        self.num_shards += 1
+        self._reset()
+
+    def close(self):
+        self.flush()
+
+
+class ShardReader:
+    """
+    Reads graphs packed by ShardWriter. Shard arrays are memory-mapped copy-on-write the first time they are used, and
+    the returned graphs are views over them: nothing is copied, and every process reading the same shards shares one
+    page-cache copy. Memory maps are not pickled, so each DataLoader worker opens its own.
+    """
+    def __init__(self, directory:str):
+        self.directory = directory
+        self._arrays = {}
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_arrays"] = {}
+        return state
+
+    def _array(self, shard_name:str, array_name:str) -> np.ndarray:
+        """Memory-mapped array of a shard; None for an optional array the shard does not have
+        """
+        key = (shard_name, array_name)
+        if key not in self._arrays:
+            path = os.path.join(self.directory, shard_name, array_name)
+            self._arrays[key] = np.load(path, mmap_mode="c") if os.path.exists(path) else None
+        return self._arrays[key]
+
+    def get(self, shard_name:str, nodes:Dict[str, Tuple[int, int]], edges:Dict[Tuple[str, str, str], Tuple[int, int]]) -> HeteroData:
+        """Build a graph from its position in a shard, as returned by Manifest.get_location
+
+        Args:
+            shard_name (str): name of the shard containing the graph
+            nodes: {node_type: (offset, count)}
+            edges: {edge_type: (offset, count)}
+        """
+        features, edge_indices, perms = self.get_arrays(shard_name, nodes, edges)
+        data = HeteroData()
+        for node_type, x in features.items():
+            data[node_type].x = torch.from_numpy(x)
+            if node_type in perms:
+                data[node_type][PERM_KEY] = torch.from_numpy(perms[node_type])
+        for edge_type, edge_index in edge_indices.items():
+            data[edge_type].edge_index = torch.from_numpy(edge_index)
+        return data
+
+    def get_arrays(self, shard_name:str, nodes:Dict[str, Tuple[int, int]], edges:Dict[Tuple[str, str, str], Tuple[int, int]]):
+        """Arrays of a graph from its position in a shard; see get
+
+        Returns:
+            features: {node_type: node features}
+            edges: {edge_type: edge indices}
+            perms: {node_type: node permutation}, only for the node types of reordered graphs
+        """
+        features = {}
+        perms = {}
+        for node_type, (offset, count) in nodes.items():
+            features[node_type] = self._array(shard_name, node_array_name(node_type))[offset:offset + count]
+            node_perms = self._array(shard_name, perm_array_name(node_type))
+            if node_perms is not None:
+                perms[node_type] = node_perms[offset:offset + count]
+        edge_indices = {
+            edge_type: self._array(shard_name, edge_array_name(edge_type))[:, offset:offset + count]
+            for edge_type, (offset, count) in edges.items()
+        }
+        return features, edge_indices, perms
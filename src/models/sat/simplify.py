@@ -0,0 +1,229 @@
+from typing import Dict, Tuple
+import numpy as np
+from sat_parser import CNF, literal_clause_indices
+
+# Only clauses with at most this many literals are used to find subsumed clauses
+MAX_SUBSUMING_CLAUSE_SIZE = 3
+# Maximum number of (subsuming clause, candidate clause) pairs checked, per literal of the problem
+SUBSUMPTION_PAIRS_PER_LITERAL = 16
+
+
+def select_clauses(literals:np.ndarray, offsets:np.ndarray, keep:np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Keep the clauses where keep is True, in their original order
+    """
+    lengths = np.diff(offsets)[keep]
+    new_offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=new_offsets[1:])
+    return literals[np.repeat(keep, np.diff(offsets))], new_offsets
+
+
+def select_literals(literals:np.ndarray, offsets:np.ndarray, keep:np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Keep the literals where keep is True; clauses can become empty
+    """
+    new_offsets = np.zeros_like(offsets)
+    np.cumsum(np.bincount(literal_clause_indices(offsets)[keep], minlength=len(offsets) - 1), out=new_offsets[1:])
+    return literals[keep], new_offsets
+
+
+def sort_clause_literals(literals:np.ndarray, offsets:np.ndarray, num_variables:int) -> np.ndarray:
+    """Literals sorted inside every clause; clauses keep their order
+    """
+    keys = literal_clause_indices(offsets) * (2 * num_variables + 1) + (literals.astype(np.int64) + num_variables)
+    return literals[np.argsort(keys, kind="stable")]
+
+
+class Simplifier:
+    """
+    Satisfiability-preserving simplification of a CNF problem, run before building its graph to remove nodes and edges
+    that do not change the answer. Every step works on the flat literal array and clause offsets:
+    - tautologies (clauses containing a literal and its negation) are removed
+    - unit propagation and pure literal elimination run until neither applies; satisfied clauses are removed and false
+      literals are removed from their clause
+    - duplicate clauses (same set of literals) are removed, keeping the first one
+    - clauses subsumed by a clause of at most max_subsuming_size literals are removed, checking at most
+      pairs_per_literal * num_literals candidate pairs
+    These steps are repeated until no clause is removed.
+    Remaining clauses keep their order and remaining variables are renumbered from 1 in order. Propagation stops before the
+    step that would decide the problem (a conflict, or every clause satisfied), so decided problems are simplified as far
+    as the others and their graphs stay meaningful; they are flagged with solved = 1. Returning them unchanged instead would
+    make their size depend on the label.
+    """
+    def __init__(self, max_subsuming_size:int=MAX_SUBSUMING_CLAUSE_SIZE, pairs_per_literal:int=SUBSUMPTION_PAIRS_PER_LITERAL):
+        """
+        Args:
+            max_subsuming_size (int): only clauses with at most this many literals can subsume other clauses. 0 disables subsumption.
+            pairs_per_literal (int): bound on the number of subsumption candidate pairs, per literal of the problem
+        """
+        self.max_subsuming_size = max_subsuming_size
+        self.pairs_per_literal = pairs_per_literal
+
+    def __call__(self, cnf:CNF) -> Tuple[CNF, Dict[str, int]]:
+        """Simplify a problem
+
+        Returns:
+            cnf (CNF): simplified problem, with the label of the original one
+            stats (Dict[str, int]): number of removed clauses, literals and variables, and what removed them
+        """
+        stats = {
+            "tautologies": 0, "units": 0, "pure_literals": 0, "duplicate_clauses": 0, "subsumed_clauses": 0,
+            "removed_clauses": 0, "removed_literals": 0, "removed_variables": 0, "solved": 0,
+        }
+        literals, offsets = cnf.literals, cnf.clause_offsets
+        num_variables = int(np.abs(literals).max()) if len(literals) else 0
+
+        result = self.remove_tautologies(literals, offsets, num_variables, stats)
+        if len(result[1]) == 1:
+            # No clause left besides tautologies: the problem is satisfiable and kept as it is
+            stats["tautologies"] = 0
+            solved = True
+        else:
+            literals, offsets = result
+            while True:
+                literals, offsets, solved = self.propagate(literals, offsets, num_variables, stats)
+                if solved:
+                    break
+                num_clauses = len(offsets) - 1
+                literals, offsets = self.remove_duplicate_clauses(literals, offsets, num_variables, stats)
+                literals, offsets = self.remove_subsumed_clauses(literals, offsets, num_variables, stats)
+                # Removing clauses can leave new pure literals
+                if len(offsets) - 1 == num_clauses:
+                    break
+
+        # Renumber the remaining variables from 1, in order
+        variables = np.unique(np.abs(literals))
+        renumbered = np.zeros(num_variables + 1, dtype=np.int32)
+        renumbered[variables] = np.arange(1, len(variables) + 1, dtype=np.int32)
+        literals = np.sign(literals) * renumbered[np.abs(literals)]
+
+        simplified = CNF(literals, offsets, cnf.is_sat)
+        stats["removed_clauses"] = cnf.num_clauses - simplified.num_clauses
+        stats["removed_literals"] = len(cnf.literals) - len(simplified.literals)
+        stats["removed_variables"] = len(cnf.base_variable_set) - len(variables)
+        stats["solved"] = int(solved)
+        return simplified, stats
+
+    def remove_tautologies(self, literals:np.ndarray, offsets:np.ndarray, num_variables:int, stats:Dict[str, int]):
+        clause_indices = literal_clause_indices(offsets)
+        keys = np.sort(clause_indices * (num_variables + 1) + np.abs(literals))
+        # Literals are unique inside a clause, so a repeated variable means a literal and its negation
+        tautologies = np.unique(keys[1:][keys[1:] == keys[:-1]] // (num_variables + 1))
+        stats["tautologies"] += len(tautologies)
+        if not len(tautologies):
+            return literals, offsets
+        keep = np.ones(len(offsets) - 1, dtype=bool)
+        keep[tautologies] = False
+        return select_clauses(literals, offsets, keep)
+
+    def propagate(self, literals:np.ndarray, offsets:np.ndarray, num_variables:int, stats:Dict[str, int]):
+        """Unit propagation and pure literal elimination until a fixpoint, or until the next step would decide the problem:
+        a variable assigned both values, an empty clause or no clause left. That step is not applied.
+
+        Returns:
+            (literals, offsets, solved), where solved is True if propagation stopped because the problem is decided
+        """
+        values = np.zeros(num_variables + 1, dtype=np.int8)
+        while True:
+            lengths = np.diff(offsets)
+            if not lengths.all():
+                return literals, offsets, True
+            assigned = literals[offsets[:-1][lengths == 1]]
+            if len(assigned):
+                assigned = np.unique(assigned)
+                if len(np.unique(np.abs(assigned))) < len(assigned):
+                    return literals, offsets, True
+                step = "units"
+            else:
+                occurrences = np.bincount(literals.astype(np.int64) + num_variables, minlength=2 * num_variables + 1)
+                present = occurrences > 0
+                pure = present & ~present[::-1]
+                assigned = np.flatnonzero(pure) - num_variables
+                if not len(assigned):
+                    return literals, offsets, False
+                step = "pure_literals"
+
+            values[np.abs(assigned)] = np.sign(assigned)
+            literal_values = values[np.abs(literals)] * np.sign(literals)
+            clause_indices = literal_clause_indices(offsets)
+            satisfied = np.bincount(clause_indices[literal_values > 0], minlength=len(offsets) - 1) > 0
+            new_literals, new_offsets = select_literals(literals, offsets, (literal_values == 0) | satisfied[clause_indices])
+            new_literals, new_offsets = select_clauses(new_literals, new_offsets, ~satisfied)
+            new_lengths = np.diff(new_offsets)
+            if not len(new_lengths) or not new_lengths.all():
+                return literals, offsets, True
+            stats[step] += len(assigned)
+            literals, offsets = new_literals, new_offsets
+
+    def remove_duplicate_clauses(self, literals:np.ndarray, offsets:np.ndarray, num_variables:int, stats:Dict[str, int]):
+        sorted_literals = sort_clause_literals(literals, offsets, num_variables)
+        lengths = np.diff(offsets)
+        keep = np.ones(len(lengths), dtype=bool)
+        for length in np.unique(lengths):
+            clauses = np.flatnonzero(lengths == length)
+            if len(clauses) < 2:
+                continue
+            rows = sorted_literals[offsets[clauses][:, None] + np.arange(length)]
+            _, first = np.unique(rows, axis=0, return_index=True)
+            duplicates = np.ones(len(clauses), dtype=bool)
+            duplicates[first] = False
+            keep[clauses[duplicates]] = False
+        stats["duplicate_clauses"] += int((~keep).sum())
+        return select_clauses(literals, offsets, keep)
+
+    def remove_subsumed_clauses(self, literals:np.ndarray, offsets:np.ndarray, num_variables:int, stats:Dict[str, int]):
+        """Remove every clause that contains all the literals of a shorter clause. Candidates for a short clause are the
+        clauses containing its least frequent literal.
+        """
+        if not self.max_subsuming_size or not len(literals):
+            return literals, offsets
+        num_clauses = len(offsets) - 1
+        lengths = np.diff(offsets)
+        clause_indices = literal_clause_indices(offsets)
+        literal_ids = literals.astype(np.int64) + num_variables
+        occurrences = np.bincount(literal_ids, minlength=2 * num_variables + 1)
+
+        # Least frequent literal of every short clause
+        short = lengths[clause_indices] <= self.max_subsuming_size
+        short_positions = np.flatnonzero(short)
+        order = np.lexsort((occurrences[literal_ids[short_positions]], clause_indices[short_positions]))
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = clause_indices[short_positions[order[1:]]] != clause_indices[short_positions[order[:-1]]]
+        pivots = short_positions[order[first]]
+        subsuming = clause_indices[pivots]
+        pivot_literals = literal_ids[pivots]
+
+        # Candidate pairs (subsuming clause, clause containing its pivot), within budget
+        counts = occurrences[pivot_literals]
+        budget = self.pairs_per_literal * len(literals)
+        within_budget = np.cumsum(counts) <= budget
+        subsuming, pivot_literals, counts = subsuming[within_budget], pivot_literals[within_budget], counts[within_budget]
+        occurrence_order = np.argsort(literal_ids, kind="stable")
+        occurrence_starts = np.zeros(len(occurrences) + 1, dtype=np.int64)
+        np.cumsum(occurrences, out=occurrence_starts[1:])
+        pair_starts = np.repeat(occurrence_starts[pivot_literals] - np.cumsum(counts) + counts, counts)
+        candidates = clause_indices[occurrence_order[pair_starts + np.arange(len(pair_starts))]]
+        subsuming = np.repeat(subsuming, counts)
+        # Duplicates are already removed, so a subsumed clause is strictly longer
+        valid = lengths[candidates] > lengths[subsuming]
+        subsuming, candidates = subsuming[valid], candidates[valid]
+        if not len(candidates):
+            return literals, offsets
+
+        # A pair is a subsumption if every literal of the short clause is in the candidate
+        keys = np.sort(clause_indices * (2 * num_variables + 1) + literal_ids)
+        pair_lengths = lengths[subsuming]
+        pair_indices = np.repeat(np.arange(len(subsuming)), pair_lengths)
+        positions = np.repeat(offsets[subsuming] - np.cumsum(pair_lengths) + pair_lengths, pair_lengths) + np.arange(len(pair_indices))
+        wanted = candidates[pair_indices] * (2 * num_variables + 1) + literal_ids[positions]
+        found = keys[np.minimum(np.searchsorted(keys, wanted), len(keys) - 1)] == wanted
+        subsumed = np.bincount(pair_indices[found], minlength=len(subsuming)) == pair_lengths
+
+        keep = np.ones(num_clauses, dtype=bool)
+        keep[candidates[subsumed]] = False
+        stats["subsumed_clauses"] += int((~keep).sum())
+        return select_clauses(literals, offsets, keep)
+
+
+def simplify_cnf(cnf:CNF, **kwargs) -> Tuple[CNF, Dict[str, int]]:
+    """Simplify a problem with a Simplifier; see Simplifier for the arguments
+    """
+    return Simplifier(**kwargs)(cnf)
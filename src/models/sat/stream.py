@@ -0,0 +1,113 @@
+import random
+from argparse import Namespace
+from typing import List, Tuple
+import numpy as np
+from torch.utils.data import IterableDataset, get_worker_info
+from sat_parser import CNF, flatten_clauses
+from dataset import GRAPH_BUILDERS, build_pair_graphs, prepare_cnf
+from dtypes import compact_graph, upcast_graph
+from reorder import REORDER_METHODS, reorder_graph
+
+
+class SRStreamDataset(IterableDataset):
+    """
+    Endless stream of SR problems (see gen_sr_dimacs.py) generated and built into graphs on the fly, inside every DataLoader
+    worker, so training never touches the disk. Every generated pair yields its UNSAT and SAT problems, in random order,
+    so the stream is balanced. Both graphs of a pair are built together; see dataset.build_pair_graphs.
+
+    Every worker seeds the python and numpy generators used by gen_iclause_pair from (seed, epoch, worker id), so workers
+    generate different problems and a run is reproducible for a given seed and number of workers. With a seed, call set_epoch
+    before every epoch to draw new problems, since workers start from a copy of the dataset. Without a seed, every iteration
+    draws fresh seeds.
+
+    Use with DataLoader(dataset, batch_size=..., num_workers=...). The DataLoader must not shuffle; problems are random already.
+    Generating problems requires PyMiniSolvers (see gen_sr_dimacs.py), which is only imported when the stream is iterated.
+    """
+    def __init__(self, graph_type:str="refactored", min_n:int=10, max_n:int=40, p_k_2:float=0.3, p_geo:float=0.4,
+                 num_pairs:int=None, seed:int=None, simplify:bool=False, reorder:str=None, upcast:bool=True, transform=None):
+        """
+        Args:
+            graph_type (str): choice of 'base', 'modified' or 'refactored'. Defaults to 'refactored'.
+            min_n (int): minimum number of variables of a problem. Defaults to 10.
+            max_n (int): maximum number of variables of a problem; the number of variables is drawn uniformly. Defaults to 40.
+            p_k_2 (float): probability of drawing clauses of at least 2 literals instead of 3. Defaults to 0.3.
+            p_geo (float): parameter of the geometric distribution of the additional clause lengths. Defaults to 0.4.
+            num_pairs (int, optional): number of pairs per iteration, split between workers; iterations never end if None.
+                Defaults to None.
+            seed (int, optional): seed of the stream. Defaults to None.
+            simplify (bool): simplify problems before building their graphs; see SatDataset. Defaults to False.
+            reorder (str, optional): choice of 'rcm', 'degree' or 'bfs'; see SatDataset. Defaults to None.
+            upcast (bool): return float32 features and int64 edge indices, or the compact graphs; see SatDataset. Defaults to True.
+            transform (callable, optional): applied to every graph before it is returned. Defaults to None.
+        """
+        if graph_type not in GRAPH_BUILDERS:
+            raise ValueError(f"Unknown graph_type '{graph_type}'; expected one of {list(GRAPH_BUILDERS)}")
+        if reorder is not None and reorder not in REORDER_METHODS:
+            raise ValueError(f"Unknown reorder '{reorder}'; expected one of {REORDER_METHODS}")
+        if not 1 <= min_n <= max_n:
+            raise ValueError(f"Expected 1 <= min_n <= max_n, got min_n={min_n} and max_n={max_n}")
+        self.graph_type = graph_type
+        self.opts = Namespace(min_n=min_n, max_n=max_n, p_k_2=p_k_2, p_geo=p_geo)
+        self.num_pairs = num_pairs
+        self.seed = seed
+        self.simplify = simplify
+        self.reorder = reorder
+        self.upcast = upcast
+        self.transform = transform
+        self.epoch = 0
+
+    def set_epoch(self, epoch:int):
+        self.epoch = epoch
+
+    def get_worker_seeds(self, worker_id:int) -> Tuple[int, int]:
+        """Seeds of the python and numpy generators of a worker
+        """
+        seed_sequence = np.random.SeedSequence(self.seed, spawn_key=(self.epoch, worker_id))
+        py_seed, np_seed = seed_sequence.generate_state(2)
+        return int(py_seed), int(np_seed)
+
+    def get_num_worker_pairs(self, worker_id:int, num_workers:int) -> int:
+        if self.num_pairs is None:
+            return None
+        return self.num_pairs // num_workers + (worker_id < self.num_pairs % num_workers)
+
+    def build_pair(self) -> List:
+        """Generate a SAT/UNSAT pair and build its graphs, in random order
+        """
+        # Imported here so that importing this module does not require PyMiniSolvers
+        from gen_sr_dimacs import gen_iclause_pair
+        _, iclauses, iclause_unsat, iclause_sat = gen_iclause_pair(self.opts)
+        cnfs = [
+            prepare_cnf(CNF(*flatten_clauses(iclauses + [iclause_unsat]), 0), self.simplify)[0],
+            prepare_cnf(CNF(*flatten_clauses(iclauses + [iclause_sat]), 1), self.simplify)[0],
+        ]
+        graphs = [graphs[self.graph_type] for graphs in build_pair_graphs(cnfs, [self.graph_type])]
+        if random.random() < 0.5:
+            graphs.reverse()
+        return graphs
+
+    def prepare_graph(self, data, compact_cache:dict=None):
+        if self.reorder is not None:
+            data = reorder_graph(data, self.reorder)
+        data = compact_graph(data, self.graph_type, compact_cache)
+        if self.upcast:
+            data = upcast_graph(data)
+        if self.transform is not None:
+            data = self.transform(data)
+        return data
+
+    def __iter__(self):
+        worker_info = get_worker_info()
+        worker_id, num_workers = (worker_info.id, worker_info.num_workers) if worker_info is not None else (0, 1)
+        # gen_iclause_pair draws from the global generators, which belong to the worker process
+        py_seed, np_seed = self.get_worker_seeds(worker_id)
+        random.seed(py_seed)
+        np.random.seed(np_seed)
+
+        num_pairs = self.get_num_worker_pairs(worker_id, num_workers)
+        pair = 0
+        while num_pairs is None or pair < num_pairs:
+            compact_cache = {}
+            for data in self.build_pair():
+                yield self.prepare_graph(data, compact_cache)
+            pair += 1
@@ -4,6 +4,8 @@ import os
 os.environ['CUDA_LAUNCH_BLOCKING'] = '1'
 from model import SatGNN, HGT, HGTMeta
 from dataset import SatDataset
+from dtypes import upcast_graph
+from samplers import BucketBatchSampler
 from torch_geometric.loader import DataLoader
 import multiprocessing
 multiprocessing.set_start_method('spawn', force=True)
@@ -32,7 +34,7 @@ def train_one_epoch(model, optimizer, criterion, train_loader):
     total_examples = 0
     total_loss = 0
     for data in train_loader:
-        data = data.to(device="cuda:0")
+        data = upcast_graph(data.to(device="cuda:0"))
         optimizer.zero_grad()
         out = model(data.x_dict, data.edge_index_dict, data.batch_dict)
         loss = criterion(out, data["variable"].y)
@@ -62,7 +64,7 @@ def test_model(model, loader, criterion):
     total_loss = 0
 
     for data in loader:  # Iterate in batches over the training/test dataset.
-        data = data.to(device="cuda:0")
+        data = upcast_graph(data.to(device="cuda:0"))
         with torch.no_grad():
             out = model(data.x_dict, data.edge_index_dict, data.batch_dict)
             loss = criterion(out, data["variable"].y)
@@ -92,11 +94,12 @@ if __name__ == "__main__":
     num_heads = 2
     device = "cuda:0"
 
-    dataset = SatDataset(root=test_path, graph_type="refactored")
+    dataset = SatDataset(root=test_path, graph_type="refactored", upcast=False)
     train_dataset = dataset[:18000]
     test_dataset = dataset[18000:]
 
-    train_loader = DataLoader(train_dataset, batch_size=batch_size, shuffle=False, num_workers=4)
+    train_sampler = BucketBatchSampler.from_dataset(train_dataset, by="edges", batch_size=batch_size)
+    train_loader = DataLoader(train_dataset, batch_sampler=train_sampler, num_workers=4)
     test_loader = DataLoader(test_dataset, batch_size=batch_size, shuffle=False, num_workers=4)
     criterion = torch.nn.BCELoss()
 
@@ -1,9 +1,16 @@
 import ast
 import re
-from typing import List, Dict
+from typing import List, Dict, Tuple
 import xml
+import numpy as np
 from intension_utils import *
 
+# Value of the * wildcard (any value) in the tables of extension constraints
+WILDCARD = np.iinfo(np.int64).min
+# Characters of a table of tuples: digits, whitespace and "-*(),."
+TABLE_CHARACTERS = np.zeros(256, dtype=bool)
+TABLE_CHARACTERS[np.frombuffer(b"0123456789 \t\n\r-*(),.", dtype=np.uint8)] = True
+
 
 def parse_all_different_constraints(raw_alldiff_constraints: List[xml.etree.ElementTree.Element]) -> List[Dict]:
     """Parses all allDifferent constraints in a given problem
@@ -143,45 +150,155 @@ def parse_block(block: xml.etree.ElementTree.Element) -> List[Dict]:
     return constraints
 
 
-def parse_extension_constraint(constraint: xml.etree.ElementTree.Element) -> Dict:
-    """Parse an individual extension constraint defined with supports; that is values the variables CAN take. 
-    Extension constraints defined with exclusion are parsed with function parse_negative_extension_constraint
-    Returns a dict like:
-    {"variables": [x, y], "tuples": ((1, 2), (2, 3))}
+def parse_integer_tokens(chars: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Vectorized parser of the integers and * wildcards of an ASCII string: digit runs are found with array operations and their
+    values are summed digit by digit with np.add.reduceat, without any Python loop over the tokens.
 
     Args:
-        constraint (xml.etree.ElementTree.Element): element of "extension" ; extension constraint
+        chars (np.ndarray): uint8 ASCII codes of the string
 
     Returns:
-        parsed_constraint: dict containing the parsed constraint
+        values (np.ndarray): int64 value of every token, in order; WILDCARD for *
+        ends (np.ndarray): position in chars of the last character of every token
+    """
+    digit = (chars >= ord("0")) & (chars <= ord("9"))
+    first_digits = digit & ~np.concatenate(([False], digit[:-1]))
+    digit_starts = np.flatnonzero(first_digits)
+    digit_ends = np.flatnonzero(digit & ~np.concatenate((digit[1:], [False])))
+    digit_positions = np.flatnonzero(digit)
+
+    numbers = np.zeros(len(digit_starts), dtype=np.int64)
+    if len(digit_positions) > 0:
+        run = np.cumsum(first_digits)[digit_positions] - 1
+        place_values = np.int64(10) ** (digit_ends[run] - digit_positions)
+        numbers = np.add.reduceat((chars[digit_positions] - ord("0")).astype(np.int64) * place_values,
+                                  np.searchsorted(digit_positions, digit_starts))
+        negative = np.zeros(len(digit_starts), dtype=bool)
+        signed = digit_starts > 0
+        negative[signed] = chars[digit_starts[signed] - 1] == ord("-")
+        numbers[negative] = -numbers[negative]
+
+    star_positions = np.flatnonzero(chars == ord("*"))
+    if len(star_positions) == 0:
+        return numbers, digit_ends
+    # Merge numbers and wildcards in their order of appearance
+    ends = np.concatenate((digit_ends, star_positions))
+    values = np.concatenate((numbers, np.full(len(star_positions), WILDCARD, dtype=np.int64)))
+    order = np.argsort(ends, kind="stable")
+    return values[order], ends[order]
+
+
+def expand_unary_values(chars: np.ndarray) -> np.ndarray:
+    """Values of a unary table written without parentheses, where "a..b" stands for every integer from a to b; e.g.
+    "1 3..5 -2" gives [1, 3, 4, 5, -2]
+    """
+    values, ends = parse_integer_tokens(chars)
+    if len(values) == 0:
+        return values
+    # A value followed by ".." starts a range that ends with the next value
+    followed = ends + 2 < len(chars)
+    range_starts = np.zeros(len(values), dtype=bool)
+    range_starts[followed] = (chars[ends[followed] + 1] == ord(".")) & (chars[ends[followed] + 2] == ord("."))
+    if (range_starts[-1] or (range_starts[:-1] & range_starts[1:]).any()
+            or np.count_nonzero(chars == ord(".")) != 2 * np.count_nonzero(range_starts)):
+        raise ValueError("Invalid range in unary table")
+    kept = ~np.concatenate(([False], range_starts[:-1]))
+    lows = values[kept]
+    highs = np.where(range_starts, np.roll(values, -1), values)[kept]
+    counts = np.maximum(highs - lows + 1, 0)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    return np.repeat(lows, counts) + offsets
+
+
+def parse_tuples(text: str) -> np.ndarray:
+    """Parses the tuples of a <supports> or <conflicts> element, e.g. "(1,2)(2,*)(3,1)", into a table. Unary tables may omit
+    the parentheses and use ranges, like "1 3..5 8". The text is parsed with array operations (see parse_integer_tokens), which
+    is much faster than ast.literal_eval on large tables and does not build one Python object per value.
+
+    Args:
+        text (str): text of the element; None or blank for an empty table
+
+    Returns:
+        tuples (np.ndarray): int64 array of shape (number of tuples, arity), with WILDCARD for *. An empty table has shape (0, 0).
+    """
+    chars = np.frombuffer((text or "").encode(), dtype=np.uint8)
+    if not TABLE_CHARACTERS[chars].all():
+        raise ValueError("Unexpected character in table of tuples")
+    num_tuples = np.count_nonzero(chars == ord("("))
+    if num_tuples == 0:
+        if np.count_nonzero(chars == ord(")")) or np.count_nonzero(chars == ord(",")):
+            raise ValueError("Malformed table of tuples")
+        values = expand_unary_values(chars)
+        return values.reshape(-1, 1) if len(values) else values.reshape(0, 0)
+
+    values, ends = parse_integer_tokens(chars)
+    arity = len(values) // num_tuples
+    opening = np.flatnonzero(chars == ord("("))
+    closing = np.flatnonzero(chars == ord(")"))
+    commas = np.flatnonzero(chars == ord(","))
+    tuple_index = np.arange(num_tuples)
+    comma_index = np.arange(len(commas))
+    # Checked tuple by tuple with the number of values before every parenthesis and comma, so that a ragged table like
+    # "(1,2,3)(4)" is not reshaped into "(1,2)(3,4)"
+    well_formed = (
+        len(closing) == num_tuples and len(values) == num_tuples * arity and len(commas) == num_tuples * (arity - 1)
+        and np.count_nonzero(chars == ord(".")) == 0
+        # Tuples neither overlap nor nest
+        and (opening < closing).all() and (closing[:-1] < opening[1:]).all()
+        # Every tuple holds arity values, separated by commas
+        and (np.searchsorted(ends, opening) == arity * tuple_index).all()
+        and (np.searchsorted(ends, closing) == arity * (tuple_index + 1)).all()
+        and (np.searchsorted(ends, commas) == arity * (comma_index // max(arity - 1, 1)) + comma_index % max(arity - 1, 1) + 1).all()
+    )
+    if not well_formed:
+        raise ValueError("Malformed table of tuples")
+    return values.reshape(num_tuples, arity)
+
+
+def parse_table_constraint(constraint: xml.etree.ElementTree.Element, table_tag: str) -> Dict:
+    """Parses an extension constraint whose tuples are given by its child table_tag ("supports" or "conflicts"); see parse_tuples
+
+    Returns:
+        parsed_constraint: {"variables": [x, y], "tuples": np.array([[1, 2], [2, 3]])}
     """
     parsed_constraint = {}
     variables = constraint.find("list").text.strip().split()
     parsed_constraint["variables"] = variables
-    tuples = ast.literal_eval(constraint.find(
-        "supports").text.strip().replace(")", "),"))
+    tuples = parse_tuples(constraint.find(table_tag).text)
+    if len(tuples) == 0:
+        tuples = tuples.reshape(0, len(variables))
     parsed_constraint["tuples"] = tuples
 
     return parsed_constraint
 
 
+def parse_extension_constraint(constraint: xml.etree.ElementTree.Element) -> Dict:
+    """Parse an individual extension constraint defined with supports; that is values the variables CAN take. 
+    Extension constraints defined with exclusion are parsed with function parse_negative_extension_constraint
+    Returns a dict like:
+    {"variables": [x, y], "tuples": np.array([[1, 2], [2, 3]])}
+    where tuples is an int64 table with WILDCARD for * (see parse_tuples)
+
+    Args:
+        constraint (xml.etree.ElementTree.Element): element of "extension" ; extension constraint
+
+    Returns:
+        parsed_constraint: dict containing the parsed constraint
+    """
+    return parse_table_constraint(constraint, "supports")
+
+
 def parse_negative_extension_constraint(constraint: xml.etree.ElementTree.Element) -> Dict:
     """Parse an individual extension constraint defined with conflicts; that is values the variables can't take.
     Returns a dict like:
-    {"variables": [x, y], "tuples": ((1, 2), (2, 3))}, which means variables (x, y) can't take values (1, 2) or (2, 3)
+    {"variables": [x, y], "tuples": np.array([[1, 2], [2, 3]])}, which means variables (x, y) can't take values (1, 2) or (2, 3)
 
     Args:
         constraint (xml.etree.ElementTree.Element): element of "extension" ; extension constraint
     Returns:
         parsed_constraint: dict containing the parsed constraint
     """
-    parsed_constraint = {}
-    variables = constraint.find("list").text.strip().split()
-    parsed_constraint["variables"] = variables
-    tuples = ast.literal_eval(constraint.find("conflicts").text.strip().replace(")", "),"))
-    parsed_constraint["tuples"] = tuples
-
-    return parsed_constraint
+    return parse_table_constraint(constraint, "conflicts")
 
 
 def parse_intension_group(group, base_intension_expression):
@@ -0,0 +1,152 @@
+import lzma
+from typing import Iterator, Tuple, Any
+import xml
+import xml.etree.ElementTree as ET
+from variables import parse_array_variables, parse_integer_variables
+from constraints import (
+    parse_all_different_constraints,
+    parse_extension_constraint,
+    parse_negative_extension_constraint,
+    parse_intension_group,
+    parse_intension_expression,
+)
+
+# Top-level sections whose children are parsed one at a time
+SECTIONS = ("variables", "constraints")
+
+
+def open_instance(file_path: str):
+    """Open an XCSP3 instance, decompressing it on the fly if it is compressed with lzma (.lzma or .xz)
+    """
+    if file_path.endswith((".lzma", ".xz")):
+        return lzma.open(file_path, "rb")
+    return open(file_path, "rb")
+
+
+def get_intension_expression(constraint: xml.etree.ElementTree.Element) -> str:
+    """Expression of an intension constraint, written either as its text or in a <function> child
+    """
+    function = constraint.find("function")
+    return (function.text if function is not None else constraint.text).strip()
+
+
+def parse_extension(constraint: xml.etree.ElementTree.Element) -> dict:
+    """Parses an extension constraint with parse_extension_constraint or parse_negative_extension_constraint. The "kind" key
+    ("supports" or "conflicts") tells whether its tuples are the allowed or the forbidden ones
+    """
+    if constraint.find("supports") is not None:
+        return dict(parse_extension_constraint(constraint), kind="supports")
+    return dict(parse_negative_extension_constraint(constraint), kind="conflicts")
+
+
+def replace_list_placeholders(variables: list, arg: list) -> list:
+    """Replaces the %i placeholders (and %..., for all remaining arguments) of a template variable list by the arguments of a group
+    """
+    replaced = []
+    for token in variables:
+        if token == "%...":
+            replaced.extend(arg[len(replaced):])
+        elif token.startswith("%"):
+            replaced.append(arg[int(token[1:])])
+        else:
+            replaced.append(token)
+    return replaced
+
+
+def parse_group(group: xml.etree.ElementTree.Element):
+    """Parses a constraint group: a constraint template whose %i placeholders are replaced by every <args> element.
+
+    Returns:
+        constraints (List): one parsed constraint per <args>, or the element itself if its template is not supported. The table of
+            an extension template is parsed once and shared by all its constraints, which keep its "kind" (see parse_extension).
+    """
+    template = group[0]
+    args = [raw_arg.text.strip().split() for raw_arg in group.findall("args")]
+    if template.tag == "intension":
+        return parse_intension_group(group, get_intension_expression(template))
+    if template.tag == "extension":
+        shared = parse_extension(template)
+        return [
+            dict(shared, variables=replace_list_placeholders(shared["variables"], arg))
+            for arg in args
+        ]
+    if template.tag == "allDifferent" and len(template) == 0:
+        return [{"lists": arg, "exceptions": None} for arg in args]
+    return group
+
+
+def parse_constraint(constraint: xml.etree.ElementTree.Element):
+    """Parses a child of <constraints> with the parser of its tag; returns the element itself for tags that have no parser
+    """
+    if constraint.tag == "group":
+        return parse_group(constraint)
+    if constraint.tag == "block":
+        return [parse_constraint(child) for child in constraint]
+    if constraint.tag == "extension":
+        return parse_extension(constraint)
+    if constraint.tag == "intension":
+        return parse_intension_expression(get_intension_expression(constraint))
+    if constraint.tag == "allDifferent":
+        return parse_all_different_constraints([constraint])[0]
+    return constraint
+
+
+def parse_variable_element(variable: xml.etree.ElementTree.Element):
+    """Parses a child of <variables>: {name: Variable} for <var>, {name: List[Variable]} for <array>; see parse_integer_variables
+    and parse_array_variables. Returns the element itself for other tags.
+    """
+    if variable.tag == "var":
+        return parse_integer_variables([variable])
+    if variable.tag == "array":
+        return parse_array_variables([variable])
+    return variable
+
+
+def iter_instance(file_path: str) -> Iterator[Tuple[str, str, Any]]:
+    """Streams an XCSP3 instance with iterparse. Every child of <variables> and <constraints> (a variable array, a constraint, a
+    <group>, a <block>, ...) is parsed as soon as its end tag is read, yielded, then removed from the tree, so memory stays bounded
+    by the largest of them instead of growing with the file. Elements outside these sections (e.g. <objectives>) are dropped.
+
+    Args:
+        file_path (str): path to an XCSP3 file, possibly compressed with lzma
+
+    Yields:
+        (section, tag, item): section is "variables" or "constraints", tag the tag of the element and item its parsed form; see
+            parse_variable_element and parse_constraint. Unsupported elements are yielded as is and are only valid until the next item.
+            Extension constraints tell supports from conflicts by their "kind" key.
+    """
+    with open_instance(file_path) as f:
+        path = []
+        for event, elem in ET.iterparse(f, events=("start", "end")):
+            if event == "start":
+                path.append(elem)
+                continue
+            path.pop()
+            if len(path) == 2 and path[1].tag in SECTIONS:
+                section = path[1].tag
+                if section == "variables":
+                    item = parse_variable_element(elem)
+                else:
+                    item = parse_constraint(elem)
+                yield section, elem.tag, item
+                path[1].remove(elem)
+            elif len(path) == 1:
+                # Top-level elements are done once they end
+                path[0].remove(elem)
+
+
+def parse_instance(file_path: str) -> Tuple[dict, list]:
+    """Parses a whole instance with iter_instance
+
+    Returns:
+        variables (dict): Variable (for <var>) or List[Variable] (for <array>) by name
+        constraints (list): (tag, parsed constraint) of every child of <constraints>, in order
+    """
+    variables = {}
+    constraints = []
+    for section, tag, item in iter_instance(file_path):
+        if section == "variables":
+            variables.update(item)
+        else:
+            constraints.append((tag, item))
+    return variables, constraints
@@ -121,6 +121,9 @@ def parse_array_variables(array_vars: List[xml.etree.ElementTree.Element]) -> di
     instance_variables = {}
     for array in array_vars:
         other_domain = None  # domain for other variables
+        if len(array) == 0 and array.text:
+            # All variables share the domain given as the array's text
+            other_domain = parse_variable_domain(array.text.strip())
         array_variables = []
         array_name = array.attrib["id"]
         array_dimensions = get_array_dimensions(array.attrib["size"])
@@ -129,7 +132,7 @@ def parse_array_variables(array_vars: List[xml.etree.ElementTree.Element]) -> di
             if variable.tag == "domain":
                 domain = parse_variable_domain(variable.text)
                 var_names = variable.attrib["for"].split()
-                if var_names == "others":
+                if var_names == ["others"]:
                     other_domain = domain
                     continue
                 for new_var_name in var_names:
@@ -137,11 +140,9 @@ def parse_array_variables(array_vars: List[xml.etree.ElementTree.Element]) -> di
                     parse_variable(array_name, 0, current_array_dims, [
                     ], domain, array_variables, array_dimensions, array_domains_parsed)
 
-        for i, val in enumerate(array_domains_parsed):
-            if val == 0:
-                real_index = list(np.unravel_index(i, tuple(array_dimensions)))
-                new_var = build_variable(array_name, real_index, other_domain)
-                array_variables.append(new_var)
+        for real_index in np.argwhere(array_domains_parsed == 0).tolist():
+            new_var = build_variable(array_name, real_index, other_domain)
+            array_variables.append(new_var)
         instance_variables[array_name] = array_variables
 
     return instance_variables
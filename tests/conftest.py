@@ -0,0 +1,8 @@
+import os
+import sys
+
+# Modules import their siblings by name, so every source directory goes on the path. src/models/sat is inserted last and
+# searched first, so "dataset", which exists in both sat and decision_tsp, is the SAT one
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for directory in ("src/parsing", "src/models/decision_tsp", "src/models/sat"):
+    sys.path.insert(0, os.path.join(ROOT, directory))
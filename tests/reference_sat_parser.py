@@ -0,0 +1,134 @@
+"""Graph builders of sat_parser.CNF before they were vectorized, kept as a reference for test_sat_builders.py. Two changes
+make them runnable with every supported torch_geometric version: the result of T.ToUndirected is assigned (recent versions
+return a copy), and empty feature and edge lists keep their second dimension, like (0, 1) features and (2, 0) edge indices.
+"""
+from typing import List
+import torch
+from torch_geometric.data import HeteroData
+import torch_geometric.transforms as T
+
+
+class ReferenceCNF:
+    def __init__(self, clauses:List[List[int]], is_sat:int):
+        # Clauses were sets; their literals are iterated in the given order, without duplicates
+        self.clauses = [list(dict.fromkeys(clause)) for clause in clauses]
+        self.is_sat = int(is_sat)
+        variables = set()
+        for clause in self.clauses:
+            variables.update(clause)
+        self.variables = sorted(variables)
+        self.base_variables = sorted({abs(var) - 1 for var in variables})
+
+    def build_heterogeneous_graph(self):
+        constraints = [[1, 0]]
+        negation_operator_id = 0
+        variable_to_value_edges = self.get_sat_variable_to_domain_edges(self.base_variables)
+        variable_to_operator_edges = []
+        variable_to_constraint_edges = []
+        operator_to_constraint_edges = []
+        constraint_to_constraint_edges = []
+
+        for i, clause in enumerate(self.clauses):
+            current_constraint_index = i + 1
+            constraints.append([0, 1])
+            for variable in clause:
+                variable_index = abs(variable) - 1
+                if variable < 0:
+                    variable_to_operator_edges.append([variable_index, negation_operator_id])
+                    operator_to_constraint_edges.append([negation_operator_id, current_constraint_index])
+                    negation_operator_id += 1
+                else:
+                    variable_to_constraint_edges.append([variable_index, current_constraint_index])
+            constraint_to_constraint_edges.append([0, current_constraint_index])
+
+        data = HeteroData()
+        data["variable"].x = torch.Tensor([[1, len(self.base_variables), len(self.clauses)] for _ in self.base_variables])
+        data["variable"].y = torch.Tensor([[0, 1] if self.is_sat else [1, 0]])
+        data["value"].x = torch.Tensor([[0], [1]])
+        data["operator"].x = torch.ones((negation_operator_id, 1))
+        data["constraint"].x = torch.Tensor(constraints)
+        data["variable", "connected_to", "value"].edge_index = build_edge_index_tensor(variable_to_value_edges)
+        data["variable", "connected_to", "operator"].edge_index = build_edge_index_tensor(variable_to_operator_edges)
+        data["variable", "connected_to", "constraint"].edge_index = build_edge_index_tensor(variable_to_constraint_edges)
+        data["operator", "connected_to", "constraint"].edge_index = build_edge_index_tensor(operator_to_constraint_edges)
+        data["constraint", "connected_to", "constraint"].edge_index = build_edge_index_tensor(constraint_to_constraint_edges)
+        return T.ToUndirected()(data)
+
+    def build_sat_specific_heterogeneous_graph(self):
+        variable_to_index = {var: idx for idx, var in enumerate(self.variables)}
+        constraints = [[1, 0]]
+        negation_operator_id = 0
+        variable_to_value_edges = self.get_sat_variable_to_domain_edges(self.variables, modified=True)
+        variable_to_operator_edges = []
+        variable_to_constraint_edges = []
+        constraint_to_constraint_edges = []
+
+        for i, clause in enumerate(self.clauses):
+            current_constraint_index = i + 1
+            constraints.append([0, 1])
+            for variable in clause:
+                variable_index = variable_to_index[variable]
+                if variable < 0:
+                    positive_var_index = variable_to_index.get(abs(variable), None)
+                    if positive_var_index is not None:
+                        pairs_to_add = [[positive_var_index, negation_operator_id], [variable_index, negation_operator_id]]
+                        if pairs_to_add[0] not in variable_to_operator_edges and pairs_to_add[1] not in variable_to_operator_edges:
+                            variable_to_operator_edges.extend(pairs_to_add)
+                            negation_operator_id += 1
+                variable_to_constraint_edges.append([variable_index, current_constraint_index])
+            constraint_to_constraint_edges.append([0, current_constraint_index])
+
+        data = HeteroData()
+        data["variable"].x = torch.Tensor([[1] if var > 0 else [-1] for var in self.variables])
+        data["variable"].y = torch.Tensor([[0, 1] if self.is_sat else [1, 0]])
+        data["value"].x = torch.Tensor([[0], [1]])
+        data["operator"].x = torch.ones((negation_operator_id, 1))
+        data["constraint"].x = torch.Tensor(constraints)
+        data["variable", "connected_to", "value"].edge_index = build_edge_index_tensor(variable_to_value_edges)
+        data["variable", "connected_to", "operator"].edge_index = build_edge_index_tensor(variable_to_operator_edges)
+        data["variable", "connected_to", "constraint"].edge_index = build_edge_index_tensor(variable_to_constraint_edges)
+        data["constraint", "connected_to", "constraint"].edge_index = build_edge_index_tensor(constraint_to_constraint_edges)
+        return T.ToUndirected()(data)
+
+    def build_generic_heterogeneous_graph(self):
+        constraints = []
+        operators = [[-1] for _ in self.base_variables]
+        meta = [[len(self.clauses), len(self.base_variables)]]
+        variable_to_value_edges = self.get_sat_variable_to_domain_edges(self.base_variables)
+        variable_to_operator_edges = []
+        variable_to_constraint_edges = []
+        operator_to_constraint_edges = []
+        meta_to_constraint_edges = []
+
+        for i, clause in enumerate(self.clauses):
+            constraints.append([1, len(clause)])
+            for variable in clause:
+                variable_index = abs(variable) - 1
+                if variable < 0:
+                    if [variable_index, variable_index] not in variable_to_operator_edges:
+                        variable_to_operator_edges.append([variable_index, variable_index])
+                    operator_to_constraint_edges.append([variable_index, i])
+                else:
+                    variable_to_constraint_edges.append([variable_index, i])
+            meta_to_constraint_edges.append([0, i])
+
+        data = HeteroData()
+        data["variable"].x = torch.Tensor([[1] for _ in self.base_variables])
+        data["variable"].y = torch.Tensor([[0, 1] if self.is_sat else [1, 0]])
+        data["value"].x = torch.Tensor([[0], [1]])
+        data["operator"].x = torch.Tensor(operators)
+        data["constraint"].x = torch.Tensor(constraints)
+        data["meta"].x = torch.Tensor(meta)
+        data["variable", "connected_to", "value"].edge_index = build_edge_index_tensor(variable_to_value_edges)
+        data["variable", "connected_to", "operator"].edge_index = build_edge_index_tensor(variable_to_operator_edges)
+        data["variable", "connected_to", "constraint"].edge_index = build_edge_index_tensor(variable_to_constraint_edges)
+        data["operator", "connected_to", "constraint"].edge_index = build_edge_index_tensor(operator_to_constraint_edges)
+        data["meta", "connected_to", "constraint"].edge_index = build_edge_index_tensor(meta_to_constraint_edges)
+        return T.ToUndirected()(data)
+
+    def get_sat_variable_to_domain_edges(self, variables, modified=False):
+        return [[i if modified else variable, value] for i, variable in enumerate(variables) for value in [0, 1]]
+
+
+def build_edge_index_tensor(edges:List) -> torch.Tensor:
+    return torch.Tensor(edges).long().reshape(-1, 2).t().contiguous()
@@ -0,0 +1,48 @@
+"""Raw SAT files for the dataset tests, named like the pairs written by gen_sr_dimacs.py"""
+import os
+import numpy as np
+
+
+def random_clauses(rng, num_variables, num_clauses):
+    return [
+        (rng.choice(num_variables, size=size, replace=False) + 1) * rng.choice([-1, 1], size=size)
+        for size in rng.randint(1, 4, size=num_clauses)
+    ]
+
+
+def write_dimacs(path, clauses, num_variables):
+    with open(path, "w") as f:
+        f.write("p cnf %d %d\n" % (num_variables, len(clauses)))
+        for clause in clauses:
+            f.write(" ".join(str(x) for x in clause) + " 0\n")
+
+
+def pair_path(raw_dir, pair, is_sat, num_variables=8):
+    return os.path.join(raw_dir, "sr_n=%.4d_pk2=0.30_pg=0.40_t=%d_sat=%d.dimacs" % (num_variables, pair, is_sat))
+
+
+def write_pair(raw_dir, pair, seed, num_variables=8, num_clauses=20):
+    """Write the UNSAT and SAT files of a pair: same clauses but for the first literal of the last one. Labels are not
+    checked by a solver."""
+    rng = np.random.RandomState(seed)
+    clauses = random_clauses(rng, num_variables, num_clauses)
+    last = clauses.pop()
+    paths = []
+    for is_sat, last_clause in ((0, last), (1, np.concatenate(([-last[0]], last[1:])))):
+        paths.append(pair_path(raw_dir, pair, is_sat, num_variables))
+        write_dimacs(paths[-1], clauses + [last_clause], num_variables)
+    return paths
+
+
+def make_raw_dir(root, num_pairs, seed=0):
+    """Dataset root whose raw directory holds num_pairs pairs
+
+    Returns:
+        paths of the raw files
+    """
+    raw_dir = os.path.join(str(root), "raw")
+    os.makedirs(raw_dir, exist_ok=True)
+    paths = []
+    for pair in range(num_pairs):
+        paths.extend(write_pair(raw_dir, pair, seed + pair))
+    return paths
@@ -0,0 +1,44 @@
+import numpy as np
+from sat_parser import CNF, Clause
+from reference_sat_parser import ReferenceCNF
+
+
+def random_clauses(seed, num_variables=12, num_clauses=40):
+    rng = np.random.RandomState(seed)
+    return [
+        (rng.randint(1, num_variables + 1, size=size) * rng.choice([-1, 1], size=size)).tolist()
+        for size in rng.randint(1, 6, size=num_clauses)
+    ]
+
+
+def test_arrays_match_clause_sets():
+    for seed in range(20):
+        clauses = random_clauses(seed)
+        cnf = CNF.from_clauses(clauses, 1)
+        reference = ReferenceCNF(clauses, 1)
+        assert cnf.literals.dtype == np.int32 and cnf.clause_offsets.dtype == np.int64
+        assert cnf.num_clauses == len(clauses)
+        # Literals repeated inside a clause are dropped, keeping the first occurrence
+        assert [list(dict.fromkeys(clause)) for clause in clauses] == [
+            cnf.literals[start:end].tolist() for start, end in zip(cnf.clause_offsets[:-1], cnf.clause_offsets[1:])]
+        assert [clause.variables for clause in cnf.clauses] == [set(clause) for clause in clauses]
+        assert cnf.variables == reference.variables
+        assert cnf.base_variables == reference.base_variables
+
+
+def test_from_clause_objects():
+    cnf = CNF.from_clauses([Clause(["1", "-2"]), Clause(["2", "3", "3"])], "0")
+    assert cnf.is_sat == 0
+    assert [clause.variables for clause in cnf.clauses] == [{1, -2}, {2, 3}]
+
+
+def test_common_prefix_and_suffix():
+    clauses = random_clauses(0)
+    cnf = CNF.from_clauses(clauses, 0)
+    other = CNF.from_clauses(clauses[:25] + [[1, 2]] + clauses[26:], 1)
+    assert cnf.common_prefix_length(other) == 25
+    assert cnf.common_prefix_length(cnf) == cnf.num_clauses
+    literals, offsets = other.suffix(25)
+    assert offsets[0] == 0
+    assert literals[:offsets[1]].tolist() == [1, 2]
+    assert len(offsets) - 1 == other.num_clauses - 25
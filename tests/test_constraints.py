@@ -0,0 +1,58 @@
+import ast
+import xml.etree.ElementTree as ET
+import numpy as np
+import pytest
+from constraints import WILDCARD, parse_extension_constraint, parse_negative_extension_constraint, parse_tuples
+
+
+def test_tuples_match_literal_eval():
+    rng = np.random.RandomState(0)
+    text = " ".join("({})".format(",".join(str(v) for v in row)) for row in rng.randint(-1000, 1000, size=(500, 3)))
+    expected = np.array(ast.literal_eval(text.replace(")", "),")))
+    assert np.array_equal(parse_tuples(text), expected)
+
+
+def test_wildcards():
+    assert parse_tuples("(1,*)(*,-2)( 3 , 4 )").tolist() == [[1, WILDCARD], [WILDCARD, -2], [3, 4]]
+
+
+def test_unary_ranges():
+    assert parse_tuples(" 1 3..5 -2 -4..-3 10 ").ravel().tolist() == [1, 3, 4, 5, -2, -4, -3, 10]
+    assert parse_tuples("(5)(6)").tolist() == [[5], [6]]
+
+
+def test_empty_tables():
+    assert parse_tuples(None).shape == (0, 0)
+    assert parse_tuples("  ").shape == (0, 0)
+    constraint = ET.fromstring("<extension><list> x y </list><conflicts/></extension>")
+    assert parse_negative_extension_constraint(constraint)["tuples"].shape == (0, 2)
+
+
+@pytest.mark.parametrize("text", [
+    "(1,2,3)(4)",
+    "(1)(2,3)",
+    "(1,2)(3)",
+    "(1,2",
+    "(,1 2)",
+    "(1,2,)(3,4)",
+    "((1,2))",
+    "(1,2)3(4,5)",
+    "()",
+    "(1,-,2)",
+    "(a,b)",
+    "1,2",
+    "1.5",
+    "1..",
+    "1..2..3",
+])
+def test_malformed_tables(text):
+    with pytest.raises(ValueError):
+        parse_tuples(text)
+
+
+def test_extension_constraint():
+    constraint = ET.fromstring("<extension><list> x y z </list><supports> (1,2,3)(*,1,123456789012) </supports></extension>")
+    parsed = parse_extension_constraint(constraint)
+    assert parsed["variables"] == ["x", "y", "z"]
+    assert parsed["tuples"].dtype == np.int64
+    assert parsed["tuples"].tolist() == [[1, 2, 3], [WILDCARD, 1, 123456789012]]
@@ -0,0 +1,78 @@
+import os
+import numpy as np
+import pytest
+import torch
+from corpus import CORPUS_SUFFIX, Corpus, CorpusWriter, flatten_clauses, read_corpus_labels
+from dataset import SatDataset
+from sat_files import random_clauses, write_dimacs, pair_path
+
+
+def make_pairs(num_pairs, seed=0, num_variables=8):
+    rng = np.random.RandomState(seed)
+    pairs = []
+    for _ in range(num_pairs):
+        clauses = [clause.tolist() for clause in random_clauses(rng, num_variables, rng.randint(5, 20))]
+        last = clauses[-1]
+        pairs.append((clauses, clauses[:-1] + [[-last[0]] + last[1:]]))
+    return pairs
+
+
+def write_corpus(path, pairs, num_variables=8):
+    writer = CorpusWriter(path)
+    for pair, (unsat_clauses, sat_clauses) in enumerate(pairs):
+        writer.add(num_variables, unsat_clauses, 0, pair)
+        writer.add(num_variables, sat_clauses, 1, pair)
+    writer.close()
+
+
+def test_round_trip(tmp_path):
+    pairs = make_pairs(4)
+    path = str(tmp_path / ("problems" + CORPUS_SUFFIX))
+    write_corpus(path, pairs)
+    assert not os.path.exists(path + ".tmp")
+
+    corpus = Corpus(path)
+    assert len(corpus) == 8
+    assert read_corpus_labels(path).tolist() == [0, 1] * 4
+    assert corpus.get_pairs() == [[0, 1], [2, 3], [4, 5], [6, 7]]
+    for pair, clauses in enumerate(pairs):
+        for is_sat in (0, 1):
+            literals, offsets, label = corpus.get_instance(2 * pair + is_sat)
+            expected_literals, expected_offsets = flatten_clauses(clauses[is_sat])
+            assert label == is_sat
+            assert np.array_equal(literals, expected_literals)
+            assert np.array_equal(offsets, expected_offsets)
+    assert corpus.arrays["num_variables"].tolist() == [8] * 8
+
+
+def test_empty_corpus(tmp_path):
+    path = str(tmp_path / ("empty" + CORPUS_SUFFIX))
+    CorpusWriter(path).close()
+    assert len(Corpus(path)) == 0 and Corpus(path).get_pairs() == []
+
+
+def test_corpus_suffix_is_required(tmp_path):
+    with pytest.raises(ValueError, match=CORPUS_SUFFIX):
+        CorpusWriter(str(tmp_path / "problems.npz"))
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_dataset_reads_corpora_like_dimacs_files(tmp_path, lazy):
+    pairs = make_pairs(5)
+    os.makedirs(str(tmp_path / "corpus" / "raw"))
+    os.makedirs(str(tmp_path / "dimacs" / "raw"))
+    write_corpus(str(tmp_path / "corpus" / "raw" / ("problems" + CORPUS_SUFFIX)), pairs)
+    for pair, clauses in enumerate(pairs):
+        for is_sat in (0, 1):
+            write_dimacs(pair_path(str(tmp_path / "dimacs" / "raw"), pair, is_sat), clauses[is_sat], 8)
+
+    corpus = SatDataset(str(tmp_path / "corpus"), graph_type="modified", lazy=lazy)
+    dimacs = SatDataset(str(tmp_path / "dimacs"), graph_type="modified")
+    assert len(corpus) == len(dimacs) == 10
+    assert corpus.labels.tolist() == dimacs.labels.tolist()
+    for i in range(len(dimacs)):
+        for node_type in dimacs[i].node_types:
+            assert torch.equal(corpus[i][node_type].x, dimacs[i][node_type].x)
+        assert torch.equal(corpus[i]["variable"].y, dimacs[i]["variable"].y)
+        for edge_type in dimacs[i].edge_types:
+            assert torch.equal(corpus[i][edge_type].edge_index, dimacs[i][edge_type].edge_index)
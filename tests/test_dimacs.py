@@ -0,0 +1,137 @@
+import gzip
+import lzma
+import numpy as np
+import pytest
+from sat_parser import parse_dimacs_cnf, read_dimacs_arrays
+from dataset import load_cnf
+
+
+def read_dimacs_lines(text):
+    """Line by line reader used as a reference: clauses end at 0, the last one may miss it"""
+    num_variables = 0
+    clauses, clause = [], []
+    for line in text.splitlines():
+        stripped = line.strip()
+        if stripped.startswith("c"):
+            continue
+        if stripped.startswith("p"):
+            num_variables = int(stripped.split()[2])
+            continue
+        if stripped.startswith("%"):
+            break
+        for token in stripped.split():
+            if int(token) == 0:
+                clauses.append(clause)
+                clause = []
+            else:
+                clause.append(int(token))
+    if clause:
+        clauses.append(clause)
+    return clauses, num_variables
+
+
+def to_clauses(literals, offsets):
+    return [literals[start:end].tolist() for start, end in zip(offsets[:-1], offsets[1:])]
+
+
+def random_dimacs(seed, num_variables=40, num_clauses=60):
+    """DIMACS text with comments and clauses spread over several lines or sharing one"""
+    rng = np.random.RandomState(seed)
+    lines = ["c random problem %d" % seed, "p cnf %d %d" % (num_variables, num_clauses)]
+    tokens = []
+    for _ in range(num_clauses):
+        size = rng.randint(1, 8)
+        tokens += [str(x) for x in rng.randint(1, num_variables + 1, size) * rng.choice([-1, 1], size)] + ["0"]
+    while tokens:
+        count = rng.randint(1, 12)
+        lines.append(" ".join(tokens[:count]))
+        tokens = tokens[count:]
+        if rng.rand() < 0.1:
+            lines.append("c comment between clauses")
+    return "\n".join(lines) + "\n"
+
+
+def write(tmp_path, name, text, opener=open):
+    path = str(tmp_path / name)
+    with opener(path, "wb") as f:
+        f.write(text.encode())
+    return path
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 16, 64, 1 << 20])
+@pytest.mark.parametrize("seed", range(5))
+def test_read_matches_line_reader(tmp_path, seed, chunk_size):
+    text = random_dimacs(seed)
+    literals, offsets, num_variables = read_dimacs_arrays(write(tmp_path, "problem.cnf", text), chunk_size)
+    clauses, expected_num_variables = read_dimacs_lines(text)
+    assert literals.dtype == np.int32 and offsets.dtype == np.int64
+    assert to_clauses(literals, offsets) == clauses
+    assert num_variables == expected_num_variables
+
+
+@pytest.mark.parametrize("chunk_size", [1, 4, 1 << 20])
+@pytest.mark.parametrize("text", [
+    "p cnf 3 2\n1 -2 0\n2 3",
+    "p cnf 3 2\n1 -2 0\n2 3\n",
+    "p cnf 3 2\n1 -2 0\n2 3   \n\n",
+])
+def test_missing_final_zero(tmp_path, text, chunk_size):
+    literals, offsets, _ = read_dimacs_arrays(write(tmp_path, "problem.cnf", text), chunk_size)
+    assert to_clauses(literals, offsets) == [[1, -2], [2, 3]]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 1 << 20])
+def test_end_marker(tmp_path, chunk_size):
+    text = "c SATLIB\np cnf 3 2\n 1 -2 0\n 2 3 0\n%\n0\n\n"
+    literals, offsets, num_variables = read_dimacs_arrays(write(tmp_path, "problem.cnf", text), chunk_size)
+    assert to_clauses(literals, offsets) == [[1, -2], [2, 3]]
+    assert num_variables == 3
+
+
+def test_without_header(tmp_path):
+    literals, offsets, num_variables = read_dimacs_arrays(write(tmp_path, "problem.cnf", "1 -5 0\n2 0\n"))
+    assert to_clauses(literals, offsets) == [[1, -5], [2]]
+    assert num_variables == 5
+
+
+@pytest.mark.parametrize("suffix, opener", [(".gz", gzip.open), (".xz", lzma.open), (".lzma", lzma.open)])
+def test_compressed(tmp_path, suffix, opener):
+    text = random_dimacs(0)
+    name = "sr_n=0040_t=0_sat=1.dimacs"
+    plain = parse_dimacs_cnf(write(tmp_path, name, text), 16)
+    compressed = parse_dimacs_cnf(write(tmp_path, name + suffix, text, opener), 16)
+    assert np.array_equal(compressed.literals, plain.literals)
+    assert np.array_equal(compressed.clause_offsets, plain.clause_offsets)
+    assert compressed.is_sat == plain.is_sat == 1
+
+
+def test_unlabelled_file(tmp_path):
+    path = write(tmp_path, "competition.cnf", "p cnf 3 2\n1 -2 0\n2 3 0\n")
+    cnf = parse_dimacs_cnf(path)
+    assert cnf.is_sat is None
+    assert to_clauses(cnf.literals, cnf.clause_offsets) == [[1, -2], [2, 3]]
+    assert "y" not in cnf.build_sat_specific_heterogeneous_graph()["variable"]
+    assert parse_dimacs_cnf(path, is_sat=1).is_sat == 1
+    # SatDataset needs labels
+    with pytest.raises(ValueError, match="No satisfiability label"):
+        load_cnf(path)
+
+
+def test_label_argument_overrides_file_name(tmp_path):
+    path = write(tmp_path, "sr_n=0003_t=0_sat=0.dimacs", "p cnf 3 1\n1 -2 0\n")
+    assert parse_dimacs_cnf(path).is_sat == 0
+    assert parse_dimacs_cnf(path, is_sat=1).is_sat == 1
+
+
+@pytest.mark.parametrize("chunk_size", [3, 1 << 20])
+@pytest.mark.parametrize("text, token", [("p cnf 3 2\n1 -2 0\n2 x3 0\n", "x3"), ("p cnf 3 2\n1 2.5 0\n", "2.5")])
+def test_malformed_literal(tmp_path, text, token, chunk_size):
+    path = write(tmp_path, "broken.cnf", text)
+    with pytest.raises(ValueError, match="broken.cnf is not a valid DIMACS CNF file: '%s'" % token):
+        read_dimacs_arrays(path, chunk_size)
+
+
+def test_malformed_header(tmp_path):
+    path = write(tmp_path, "broken.cnf", "p cnf three\n1 -2 0\n")
+    with pytest.raises(ValueError, match="broken.cnf is not a valid DIMACS CNF file: malformed header"):
+        read_dimacs_arrays(path)
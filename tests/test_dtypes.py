@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+import torch
+from torch_geometric.data import Batch
+from sat_parser import CNF
+from dataset import SatDataset
+from dtypes import INDEX_DTYPE, LABEL_DTYPE, NODE_FEATURE_DTYPES, compact_graph, upcast_graph
+from sat_files import make_raw_dir
+
+
+@pytest.mark.parametrize("storage", ["files", "shards"])
+@pytest.mark.parametrize("graph_type", list(NODE_FEATURE_DTYPES))
+def test_collate_and_upcast(tmp_path, graph_type, storage):
+    make_raw_dir(tmp_path, 6)
+    compact = SatDataset(str(tmp_path), graph_type=graph_type, storage=storage, upcast=False)
+    upcast = SatDataset(str(tmp_path), graph_type=graph_type, storage=storage)
+    graphs = [compact[i] for i in range(len(compact))]
+
+    # Every graph stores a node type with the same dtype, so collating never promotes features
+    for data in graphs:
+        for node_type in data.node_types:
+            assert data[node_type].x.dtype == NODE_FEATURE_DTYPES[graph_type][node_type]
+        assert data["variable"].y.dtype == LABEL_DTYPE
+        for edge_type in data.edge_types:
+            assert data[edge_type].edge_index.dtype == INDEX_DTYPE
+    batch = Batch.from_data_list(graphs)
+    for node_type in batch.node_types:
+        assert batch[node_type].x.dtype == NODE_FEATURE_DTYPES[graph_type][node_type]
+
+    expected = Batch.from_data_list([upcast[i] for i in range(len(upcast))])
+    actual = upcast_graph(batch)
+    for node_type in expected.node_types:
+        assert actual[node_type].x.dtype == torch.float
+        assert torch.equal(actual[node_type].x, expected[node_type].x)
+    assert torch.equal(actual["variable"].y, expected["variable"].y)
+    for edge_type in expected.edge_types:
+        assert actual[edge_type].edge_index.dtype == torch.long
+        assert torch.equal(actual[edge_type].edge_index, expected[edge_type].edge_index)
+
+
+def test_values_match_built_graph():
+    cnf = CNF.from_clauses([[1, -2, 3], [-1, 2], [2, 3, -4]], 1)
+    for graph_type, builder in [("base", cnf.build_heterogeneous_graph), ("modified", cnf.build_sat_specific_heterogeneous_graph),
+                                ("refactored", cnf.build_generic_heterogeneous_graph)]:
+        data = builder()
+        compact = compact_graph(builder(), graph_type)
+        for node_type in data.node_types:
+            assert torch.equal(compact[node_type].x.float(), data[node_type].x)
+        for edge_type in data.edge_types:
+            assert torch.equal(compact[edge_type].edge_index.long(), data[edge_type].edge_index)
+
+
+def test_random_values_keep_their_dtype():
+    data = CNF.from_clauses([[1, -2], [2, 3]], 0).build_sat_specific_heterogeneous_graph(random_values=True)
+    x = data["variable"].x
+    assert torch.equal(compact_graph(data, "modified")["variable"].x, x)
+
+
+def test_values_out_of_range():
+    data = CNF.from_clauses([[1, -2], [2, 3]], 0).build_heterogeneous_graph()
+    data["constraint"].x[0, 0] = 300
+    with pytest.raises(ValueError, match="constraint.x"):
+        compact_graph(data, "base")
@@ -0,0 +1,61 @@
+import os
+import shutil
+import pytest
+import torch
+import dataset as sat_dataset
+from dataset import GRAPH_BUILDERS, SatDataset
+from sat_files import make_raw_dir
+
+GRAPH_TYPES = list(GRAPH_BUILDERS)
+
+
+def processed_files(dataset):
+    return {
+        os.path.join(directory, name): os.stat(os.path.join(directory, name)).st_mtime_ns
+        for directory, _, names in os.walk(dataset.processed_dir) for name in names
+    }
+
+
+def fail_processing(*args):
+    raise AssertionError("the dataset was processed again")
+
+
+@pytest.mark.parametrize("storage", ["files", "shards"])
+def test_one_pass_for_all_graph_types(tmp_path, monkeypatch, storage):
+    make_raw_dir(tmp_path / "all", 3)
+    singles = {}
+    for graph_type in GRAPH_TYPES:
+        shutil.copytree(str(tmp_path / "all" / "raw"), str(tmp_path / graph_type / "raw"))
+        singles[graph_type] = SatDataset(str(tmp_path / graph_type), graph_type=graph_type, storage=storage)
+    all_types = SatDataset(str(tmp_path / "all"), graph_type="base", graph_types=GRAPH_TYPES, storage=storage)
+    files = processed_files(all_types)
+
+    # Every graph type loads without processing the raw files again
+    monkeypatch.setattr(sat_dataset, "process_part", fail_processing)
+    for graph_type, single in singles.items():
+        dataset = SatDataset(str(tmp_path / "all"), graph_type=graph_type, storage=storage)
+        assert len(dataset) == len(single)
+        for i in range(len(single)):
+            for node_type in single[i].node_types:
+                assert torch.equal(dataset[i][node_type].x, single[i][node_type].x)
+            for edge_type in single[i].edge_types:
+                assert torch.equal(dataset[i][edge_type].edge_index, single[i][edge_type].edge_index)
+    assert processed_files(all_types) == files
+
+
+def test_adding_a_graph_type_keeps_the_others(tmp_path):
+    make_raw_dir(tmp_path, 2)
+    base = SatDataset(str(tmp_path), graph_type="base")
+    base_paths = {base.manifest.get_path(i) for i in range(len(base))}
+    mtimes = {path: os.stat(os.path.join(base.processed_dir, path)).st_mtime_ns for path in base_paths}
+
+    both = SatDataset(str(tmp_path), graph_type="modified", graph_types=["base", "modified"])
+    assert len(both) == len(base)
+    base = SatDataset(str(tmp_path), graph_type="base")
+    assert {base.manifest.get_path(i) for i in range(len(base))} == base_paths
+    assert {path: os.stat(os.path.join(base.processed_dir, path)).st_mtime_ns for path in base_paths} == mtimes
+
+
+def test_graph_type_must_be_processed():
+    with pytest.raises(ValueError, match="must be one of the processed graph_types"):
+        SatDataset("unused", graph_type="base", graph_types=["modified"])
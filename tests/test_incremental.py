@@ -0,0 +1,124 @@
+import os
+import shutil
+import pytest
+import torch
+from manifest import Manifest
+from dataset import SatDataset, get_part_manifest_path
+from sat_files import make_raw_dir, pair_path, write_pair
+
+GRAPH_TYPE = "base"
+OPTIONS = {
+    "files": dict(storage="files"),
+    "shards": dict(storage="shards", shard_size=4),
+}
+
+
+def open_dataset(root, storage, **kwargs):
+    return SatDataset(str(root), graph_type=GRAPH_TYPE, **OPTIONS[storage], **kwargs)
+
+
+def graph_outputs(dataset):
+    """Graph files or shard directories of the processed directory"""
+    return {name for name in os.listdir(dataset.processed_dir) if name.startswith(("data_", "part_"))}
+
+
+def output_mtimes(dataset):
+    return {
+        dataset.manifest.get_source(i): os.stat(os.path.join(dataset.processed_dir, dataset.manifest.get_path(i))).st_mtime_ns
+        for i in range(len(dataset))
+    }
+
+
+def assert_no_stale_outputs(dataset):
+    parts_dir = os.path.join(dataset.processed_dir, "parts")
+    part_names = {name[:-len(f".{GRAPH_TYPE}.npz")] for name in os.listdir(parts_dir)}
+    assert part_names == set(dataset.manifest.columns["part"].astype(str).tolist())
+    assert graph_outputs(dataset) == {dataset.manifest.get_path(i) for i in range(len(dataset))}
+    # The part manifests hold exactly the entries of the merged manifest
+    parts = Manifest.concatenate([Manifest.load(get_part_manifest_path(dataset.processed_dir, part, GRAPH_TYPE)) for part in part_names])
+    assert sorted(parts.columns["source"].tolist()) == dataset.manifest.columns["source"].tolist()
+
+
+def assert_same_dataset(expected, actual):
+    assert [expected.manifest.get_source(i) for i in range(len(expected))] == [actual.manifest.get_source(i) for i in range(len(actual))]
+    assert actual.labels.tolist() == expected.labels.tolist()
+    for i in range(len(expected)):
+        for node_type in expected[i].node_types:
+            assert torch.equal(actual[i][node_type].x, expected[i][node_type].x)
+        for edge_type in expected[i].edge_types:
+            assert torch.equal(actual[i][edge_type].edge_index, expected[i][edge_type].edge_index)
+
+
+def fresh_build(tmp_path, root, storage, **kwargs):
+    fresh_root = tmp_path / "fresh"
+    shutil.copytree(os.path.join(str(root), "raw"), str(fresh_root / "raw"))
+    return open_dataset(fresh_root, storage, **kwargs)
+
+
+@pytest.mark.parametrize("storage", list(OPTIONS))
+def test_modify_delete_add(tmp_path, storage):
+    root = tmp_path / "dataset"
+    paths = make_raw_dir(root, 5)
+    dataset = open_dataset(root, storage)
+    assert len(dataset) == 10
+    mtimes = output_mtimes(dataset)
+
+    raw_dir = os.path.dirname(paths[0])
+    modified = write_pair(raw_dir, 1, seed=100)
+    os.remove(paths[4])
+    deleted = os.path.basename(paths[4])
+    added = write_pair(raw_dir, 7, seed=7)
+    changed = {os.path.basename(path) for path in modified + added} | {deleted}
+
+    dataset = open_dataset(root, storage)
+    assert len(dataset) == 11
+    sources = [dataset.manifest.get_source(i) for i in range(len(dataset))]
+    assert deleted not in sources
+    # Graphs of unchanged raw files are not rebuilt
+    for source, mtime in output_mtimes(dataset).items():
+        if source not in changed:
+            assert mtime == mtimes[source]
+    assert_no_stale_outputs(dataset)
+    assert_same_dataset(fresh_build(tmp_path, root, storage), dataset)
+
+
+@pytest.mark.parametrize("storage", list(OPTIONS))
+def test_touched_files_are_not_rebuilt(tmp_path, storage):
+    root = tmp_path / "dataset"
+    paths = make_raw_dir(root, 3)
+    dataset = open_dataset(root, storage)
+    outputs = graph_outputs(dataset)
+    mtimes = output_mtimes(dataset)
+
+    # Same content, new modification time: the content hash matches and only the manifest is refreshed
+    stat = os.stat(paths[0])
+    os.utime(paths[0], ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    dataset = open_dataset(root, storage)
+    assert graph_outputs(dataset) == outputs
+    assert output_mtimes(dataset) == mtimes
+    assert dataset.is_up_to_date(GRAPH_TYPE)
+    assert_no_stale_outputs(dataset)
+
+
+def test_remove_all_raw_files(tmp_path):
+    root = tmp_path / "dataset"
+    paths = make_raw_dir(root, 2)
+    open_dataset(root, "files")
+    for path in paths:
+        os.remove(path)
+    with open(pair_path(os.path.dirname(paths[0]), 9, 1), "w") as f:
+        f.write("p cnf 2 1\n1 -2 0\n")
+    dataset = open_dataset(root, "files")
+    assert len(dataset) == 1
+    assert_no_stale_outputs(dataset)
+
+
+@pytest.mark.parametrize("storage", list(OPTIONS))
+def test_parallel_matches_serial(tmp_path, storage):
+    root = tmp_path / "dataset"
+    make_raw_dir(root, 6)
+    parallel = open_dataset(root, storage, num_workers=2)
+    if storage == "shards":
+        assert len(os.listdir(os.path.join(parallel.processed_dir, "parts"))) > 1
+    assert_no_stale_outputs(parallel)
+    assert_same_dataset(fresh_build(tmp_path, root, storage), parallel)
@@ -0,0 +1,106 @@
+import filecmp
+import itertools
+import os
+import numpy as np
+import pytest
+from instance_generator import create_dataset, create_graph, metric_closure
+from instance_io import INSTANCE_SUFFIX, read_instance
+
+
+def floyd_warshall(Mw):
+    D = Mw.copy()
+    n = len(D)
+    np.fill_diagonal(D, 0)
+    for k, i, j in itertools.product(range(n), repeat=3):
+        D[i, j] = min(D[i, j], D[i, k] + D[k, j])
+    return D
+
+
+def test_metric_closure_matches_floyd_warshall():
+    rng = np.random.RandomState(0)
+    for n in (1, 2, 5, 12):
+        Mw = np.triu(rng.rand(n, n), 1)
+        Mw = Mw + Mw.T
+        assert np.allclose(metric_closure(Mw), floyd_warshall(Mw))
+        # The input is left untouched
+        assert (np.diag(Mw) == 0).all() and Mw[np.triu_indices(n, 1)].min(initial=1) > 0
+
+
+@pytest.mark.parametrize("distances, metric", [("euc_2D", True), ("random", True), ("random", False)])
+def test_create_graph(distances, metric):
+    np.random.seed(0)
+    n = 12
+    Ma, Mw, route, nodes, exact = create_graph(n, 0.3, distances=distances, metric=metric, solver="builtin")
+    assert exact
+    assert (np.tril(Ma) == 0).all() and set(np.unique(Ma)) <= {0, 1}
+    assert np.array_equal(Mw, Mw.T) and (np.diag(Mw) == 0).all()
+    Ma_full = Ma + Ma.T
+    assert sorted(route) == list(range(n))
+    assert all(Ma_full[i, j] for i, j in zip(route, np.roll(route, -1)))
+    if distances == "euc_2D":
+        assert nodes.shape == (n, 2)
+        assert np.allclose(Mw, np.linalg.norm(nodes[:, None] - nodes[None], axis=2))
+    else:
+        assert nodes is None
+    if metric:
+        # Triangle inequality: Mw[i,j] <= Mw[i,k] + Mw[k,j], indexed [i,k,j]
+        assert (Mw[:, None, :] <= Mw[:, :, None] + Mw[None, :, :] + 1e-12).all()
+
+
+def test_connectivity():
+    np.random.seed(1)
+    n = 60
+    fractions = []
+    for connectivity in (0.1, 0.5):
+        Ma = create_graph(n, connectivity, solver="local_search")[0]
+        fractions.append(Ma.sum() / (n * (n - 1) / 2))
+    # The planted tour adds at most n edges
+    assert abs(fractions[0] - 0.1) < 0.1 and abs(fractions[1] - 0.5) < 0.1
+    np.random.seed(2)
+    assert create_graph(n, 1, solver="local_search")[0].sum() == n * (n - 1) / 2
+
+
+def list_files(directory):
+    return sorted(os.path.relpath(os.path.join(root, name), directory) for root, _, names in os.walk(directory) for name in names)
+
+
+def create(path, **kwargs):
+    options = dict(samples=5, seed=3, shard_size=2, solver="builtin", output_format="both", sharded=True)
+    options.update(kwargs)
+    create_dataset(str(path), 5, 8, 0.3, 0.6, **options)
+
+
+def test_output_does_not_depend_on_the_number_of_workers(tmp_path):
+    create(tmp_path / "serial")
+    create(tmp_path / "parallel", num_workers=2)
+    files = list_files(str(tmp_path / "serial"))
+    assert files == list_files(str(tmp_path / "parallel"))
+    assert len(files) == 10
+    assert {os.path.dirname(path) for path in files} == {"shard_00000", "shard_00001", "shard_00002"}
+    for path in files:
+        serial, parallel = str(tmp_path / "serial" / path), str(tmp_path / "parallel" / path)
+        if path.endswith(INSTANCE_SUFFIX):
+            expected, actual = read_instance(serial), read_instance(parallel)
+            assert expected["exact"] and actual["exact"]
+            for key in ("edges", "weights", "route", "nodes", "target_costs"):
+                assert np.array_equal(expected[key], actual[key])
+        else:
+            assert filecmp.cmp(serial, parallel, shallow=False)
+
+
+def test_formats(tmp_path):
+    create(tmp_path / "binary", output_format="binary", sharded=False)
+    create(tmp_path / "tsplib", output_format="tsplib", sharded=False)
+    assert list_files(str(tmp_path / "binary")) == sorted("%d%s" % (i, INSTANCE_SUFFIX) for i in range(5))
+    assert list_files(str(tmp_path / "tsplib")) == sorted("%d.graph" % i for i in range(5))
+
+
+def test_inexact_solver_warns(tmp_path):
+    with pytest.warns(UserWarning, match="exact=False"):
+        create(tmp_path, samples=2, solver="local_search", output_format="binary")
+    assert not any(read_instance(str(tmp_path / path))["exact"] for path in list_files(str(tmp_path)))
+
+
+def test_default_format_is_tsplib(tmp_path):
+    create_dataset(str(tmp_path), 5, 6, samples=2, seed=0, solver="builtin")
+    assert list_files(str(tmp_path)) == ["0.graph", "1.graph"]
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+from instance_io import INSTANCE_SUFFIX, get_target_costs, read_instance, to_matrices, write_instance
+
+
+def random_instance(seed, n=12):
+    rng = np.random.RandomState(seed)
+    nodes = rng.rand(n, 2)
+    Ma = np.triu((rng.rand(n, n) < 0.4).astype(float), 1)
+    Mw = np.sqrt(((nodes[:, None] - nodes[None]) ** 2).sum(-1))
+    route = rng.permutation(n)
+    return Ma, Mw, route, nodes
+
+
+@pytest.mark.parametrize("exact", [True, False])
+def test_round_trip(tmp_path, exact):
+    Ma, Mw, route, nodes = random_instance(0)
+    path = str(tmp_path / ("instance" + INSTANCE_SUFFIX))
+    write_instance(path, Ma, Mw, route, nodes, deviation=0.02, exact=exact)
+    instance = read_instance(path)
+
+    assert instance["n"] == len(Ma)
+    assert instance["exact"] is exact
+    assert np.array_equal(instance["route"], route)
+    assert np.array_equal(instance["nodes"], nodes)
+    cost = Mw[route, np.roll(route, -1)].sum()
+    assert instance["cost"] == pytest.approx(cost)
+    assert np.allclose(instance["target_costs"], get_target_costs(cost, 0.02))
+    edges = instance["edges"]
+    assert (edges[:, 0] < edges[:, 1]).all()
+    assert len(edges) == Ma.sum()
+
+    Ma_read, Mw_read = to_matrices(instance)
+    assert np.array_equal(Ma_read, Ma)
+    assert np.array_equal(Mw_read, Mw)
+
+
+def test_arrays_are_read_only_views(tmp_path):
+    Ma, Mw, route, nodes = random_instance(1)
+    path = str(tmp_path / ("instance" + INSTANCE_SUFFIX))
+    write_instance(path, Ma, Mw, route, nodes)
+    instance = read_instance(path)
+    for key in ("edges", "weights", "route", "nodes"):
+        assert not instance[key].flags.writeable
+        assert not instance[key].flags.owndata
+    with pytest.raises(ValueError):
+        instance["weights"][0] = 1
+
+
+def test_optional_arrays(tmp_path):
+    Ma, Mw, _, _ = random_instance(2)
+    path = str(tmp_path / ("instance" + INSTANCE_SUFFIX))
+    write_instance(path, Ma, Mw)
+    instance = read_instance(path)
+    assert set(instance) == {"n", "edges", "weights"}
+    assert not (tmp_path / ("instance" + INSTANCE_SUFFIX + ".tmp")).exists()
+
+
+def test_compressed_files_are_rejected(tmp_path):
+    Ma, Mw, _, _ = random_instance(3)
+    path = str(tmp_path / ("instance" + INSTANCE_SUFFIX))
+    np.savez_compressed(path, n=np.array(len(Ma)), weights=Mw[np.triu_indices(len(Ma), 1)])
+    with pytest.raises(ValueError):
+        read_instance(path)
@@ -0,0 +1,57 @@
+import lzma
+import numpy as np
+from instance_parser import parse_instance
+
+INSTANCE = """<instance format="XCSP3" type="CSP">
+  <variables>
+    <array id="x" size="[4]"> 0..2 </array>
+    <var id="y"> 1 3 5 </var>
+  </variables>
+  <constraints>
+    <extension><list> x[0] x[1] </list><supports> (0,1)(1,*) </supports></extension>
+    <extension><list> x[1] x[2] </list><conflicts> (2,2) </conflicts></extension>
+    <group>
+      <extension><list> %0 %1 </list><conflicts> (0,0) </conflicts></extension>
+      <args> x[0] x[2] </args>
+      <args> x[1] x[3] </args>
+    </group>
+    <block>
+      <extension><list> y </list><supports> 1 3..5 </supports></extension>
+    </block>
+    <intension> le(x[0],x[1]) </intension>
+  </constraints>
+</instance>
+"""
+
+
+def write_instance(path, compress=False):
+    data = INSTANCE.encode()
+    with (lzma.open if compress else open)(path, "wb") as f:
+        f.write(data)
+
+
+def test_extension_kinds(tmp_path):
+    path = str(tmp_path / "instance.xml")
+    write_instance(path)
+    variables, constraints = parse_instance(path)
+    assert set(variables) == {"x", "y"}
+    tags = [tag for tag, _ in constraints]
+    assert tags == ["extension", "extension", "group", "block", "intension"]
+
+    supports, conflicts, group, block, _ = [item for _, item in constraints]
+    assert supports["kind"] == "supports" and conflicts["kind"] == "conflicts"
+    assert supports["tuples"].tolist()[0] == [0, 1]
+    assert [c["kind"] for c in group] == ["conflicts", "conflicts"]
+    assert [c["variables"] for c in group] == [["x[0]", "x[2]"], ["x[1]", "x[3]"]]
+    assert block[0]["kind"] == "supports"
+    assert block[0]["tuples"].ravel().tolist() == [1, 3, 4, 5]
+
+
+def test_lzma_instance(tmp_path):
+    plain, compressed = str(tmp_path / "instance.xml"), str(tmp_path / "instance.xml.lzma")
+    write_instance(plain)
+    write_instance(compressed, compress=True)
+    _, expected = parse_instance(plain)
+    _, constraints = parse_instance(compressed)
+    assert len(constraints) == len(expected)
+    assert np.array_equal(constraints[0][1]["tuples"], expected[0][1]["tuples"])
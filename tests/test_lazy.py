@@ -0,0 +1,64 @@
+import os
+import pickle
+import pytest
+import torch
+from sat_parser import CNF
+from cache import GraphCache, graph_nbytes
+from dataset import SatDataset
+from sat_files import make_raw_dir
+
+
+def make_graph(num_variables):
+    clauses = [[i + 1, -(i % num_variables + 2)] for i in range(num_variables)]
+    return CNF.from_clauses(clauses, 1).build_sat_specific_heterogeneous_graph()
+
+
+def test_cache_is_bounded_by_bytes():
+    graphs = [make_graph(8) for _ in range(4)]
+    nbytes = graph_nbytes(graphs[0])
+    cache = GraphCache(max_bytes=3 * nbytes)
+    for key in range(3):
+        cache.put(key, graphs[key])
+    assert cache.get(0) is graphs[0]
+    # 1 is the least recently used graph
+    cache.put(3, graphs[3])
+    assert len(cache) == 3 and cache.nbytes == 3 * nbytes
+    assert cache.get(1) is None
+    assert all(cache.get(key) is graphs[key] for key in (0, 2, 3))
+    assert cache.stats == {"hits": 4, "misses": 1, "hit_rate": 0.8, "entries": 3, "nbytes": 3 * nbytes}
+
+    # A graph larger than the cache is never cached and evicts nothing
+    cache.put(4, make_graph(64))
+    assert cache.get(4) is None and len(cache) == 3
+    # Replacing an entry does not count it twice
+    cache.put(0, graphs[0])
+    assert cache.nbytes == 3 * nbytes
+
+
+def test_pickled_cache_is_empty():
+    cache = GraphCache(max_bytes=1 << 20)
+    cache.put(0, make_graph(8))
+    copy = pickle.loads(pickle.dumps(cache))
+    assert len(copy) == 0 and copy.nbytes == 0 and copy.max_bytes == cache.max_bytes
+
+
+@pytest.mark.parametrize("graph_type", ["base", "modified", "refactored"])
+def test_lazy_graphs_match_processed_graphs(tmp_path, graph_type):
+    make_raw_dir(tmp_path, 3)
+    lazy = SatDataset(str(tmp_path), graph_type=graph_type, lazy=True)
+    assert not os.path.exists(lazy.processed_dir) or not os.listdir(lazy.processed_dir)
+    processed = SatDataset(str(tmp_path), graph_type=graph_type)
+    assert len(lazy) == len(processed)
+    assert lazy.labels.tolist() == processed.labels.tolist()
+    for _ in range(2):
+        for i in range(len(lazy)):
+            expected, actual = processed[i], lazy[i]
+            for node_type in expected.node_types:
+                assert torch.equal(actual[node_type].x, expected[node_type].x)
+            assert torch.equal(actual["variable"].y, expected["variable"].y)
+            for edge_type in expected.edge_types:
+                assert torch.equal(actual[edge_type].edge_index, expected[edge_type].edge_index)
+    stats = lazy.cache_stats
+    assert stats["misses"] == len(lazy) and stats["hits"] == len(lazy) and stats["entries"] == len(lazy)
+    with pytest.raises(RuntimeError):
+        lazy.num_nodes_per_graph()
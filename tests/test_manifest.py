@@ -0,0 +1,62 @@
+import os
+import numpy as np
+import torch
+from sat_parser import CNF
+from manifest import Manifest
+from dataset import SatDataset
+from sat_files import make_raw_dir
+
+
+def test_entries_round_trip(tmp_path):
+    data = CNF.from_clauses([[1, -2], [2, 3]], 1).build_sat_specific_heterogeneous_graph()
+    entry = Manifest.build_entry(data, "graph.pt", "problem_sat=1.dimacs", 1)
+    assert entry["num_nodes_variable"] == data["variable"].num_nodes
+    assert entry["num_edges_variable__connected_to__constraint"] == data["variable", "connected_to", "constraint"].num_edges
+
+    manifest = Manifest.from_entries([entry, dict(entry, path="other.pt", label=0)])
+    path = str(tmp_path / "manifest.npz")
+    manifest.save(path)
+    loaded = Manifest.load(path)
+    assert len(loaded) == 2
+    assert loaded.get_path(1) == "other.pt"
+    assert loaded.get_source(0) == "problem_sat=1.dimacs"
+    assert loaded.labels.tolist() == [1, 0]
+    assert set(loaded.node_types) == set(data.node_types)
+    assert set(loaded.edge_types) == set(data.edge_types)
+    assert loaded.num_nodes().tolist() == [sum(data[t].num_nodes for t in data.node_types)] * 2
+    assert not loaded.is_packed
+    assert not os.path.exists(path + ".tmp")
+
+
+def test_concatenate_and_select():
+    first = Manifest.from_entries([{"path": "a", "source": "a", "label": 1, "num_nodes_variable": 3}])
+    second = Manifest.from_entries([{"path": "b", "source": "b", "label": 0, "num_nodes_value": 2}])
+    manifest = Manifest.concatenate([first, Manifest(), second])
+    assert len(manifest) == 2
+    assert manifest.num_nodes("variable").tolist() == [3, 0]
+    assert manifest.num_nodes("value").tolist() == [0, 2]
+    assert manifest.select(np.array([1])).get_path(0) == "b"
+
+
+def test_dataset_reads_the_manifest(tmp_path):
+    paths = make_raw_dir(tmp_path, 5)
+    dataset = SatDataset(str(tmp_path), graph_type="refactored")
+    assert len(dataset) == len(paths)
+    sources = sorted(os.path.basename(path) for path in paths)
+    assert [dataset.manifest.get_source(i) for i in range(len(dataset))] == sources
+    assert dataset.labels.tolist() == [int("sat=1" in source) for source in sources]
+
+    num_nodes = dataset.num_nodes_per_graph()
+    num_edges = dataset.num_edges_per_graph(("variable", "connected_to", "constraint"))
+    for i in range(len(dataset)):
+        data = dataset[i]
+        assert num_nodes[i] == sum(data[t].num_nodes for t in data.node_types)
+        assert num_edges[i] == data["variable", "connected_to", "constraint"].num_edges
+        assert torch.equal(data["variable"].y, torch.tensor([[0., 1.] if dataset.labels[i] else [1., 0.]]))
+
+    # Sizes filter the dataset without loading any graph
+    subset = dataset[dataset.labels == 1]
+    assert np.array_equal(subset.num_nodes_per_graph(), num_nodes[dataset.labels == 1])
+    assert subset.labels.tolist() == [1] * len(subset)
+    empty = dataset[num_nodes > num_nodes.max()]
+    assert len(empty) == 0 and len(empty.num_nodes_per_graph()) == 0 and len(empty.labels) == 0
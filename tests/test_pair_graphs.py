@@ -0,0 +1,17 @@
+import numpy as np
+import pytest
+from sat_parser import CNF
+from dataset import build_pair_graphs
+from test_sat_builders import BUILDERS, assert_same_graph
+
+GRAPH_TYPES = {"base": BUILDERS[0], "modified": BUILDERS[1], "refactored": BUILDERS[2]}
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_pair_graphs_match_separate_builds(seed):
+    rng = np.random.RandomState(seed)
+    common = [[int(x) for x in rng.choice([-1, 1], size=3) * rng.randint(1, 20, size=3)] for _ in range(50)]
+    cnfs = [CNF.from_clauses(common + [[int(x) for x in rng.choice([-1, 1], size=2) * rng.randint(1, 25, size=2)]], is_sat) for is_sat in (0, 1)]
+    for cnf, graphs in zip(cnfs, build_pair_graphs(cnfs, list(GRAPH_TYPES))):
+        for graph_type, builder in GRAPH_TYPES.items():
+            assert_same_graph(getattr(cnf, builder)(), graphs[graph_type])
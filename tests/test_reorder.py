@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+import torch
+from sat_parser import CNF
+from reorder import REORDER_METHODS, build_adjacency, compute_node_order, reorder_graph, restore_node_order, HUB_DEGREE_FACTOR
+
+
+def random_cnf(seed, num_variables=30, num_clauses=120):
+    rng = np.random.RandomState(seed)
+    sizes = rng.randint(2, 5, size=num_clauses)
+    literals = rng.randint(1, num_variables + 1, size=sizes.sum()) * rng.choice([-1, 1], size=sizes.sum())
+    return CNF(literals, np.concatenate(([0], np.cumsum(sizes))), 1)
+
+
+def edge_set(data, edge_type, perms=None):
+    edge_index = data[edge_type].edge_index.long()
+    if perms is not None:
+        source_type, _, target_type = edge_type
+        edge_index = torch.stack((perms[source_type][edge_index[0]], perms[target_type][edge_index[1]]))
+    return set(map(tuple, edge_index.t().tolist()))
+
+
+@pytest.mark.parametrize("method", REORDER_METHODS)
+@pytest.mark.parametrize("builder", ["build_heterogeneous_graph", "build_sat_specific_heterogeneous_graph", "build_generic_heterogeneous_graph"])
+def test_restore_node_order_round_trip(method, builder):
+    original = getattr(random_cnf(0), builder)()
+    reordered = reorder_graph(getattr(random_cnf(0), builder)(), method)
+    perms = {node_type: reordered[node_type].perm for node_type in reordered.node_types}
+    for node_type in original.node_types:
+        assert torch.equal(restore_node_order(reordered[node_type].x, perms[node_type]), original[node_type].x)
+    for edge_type in original.edge_types:
+        assert edge_set(reordered, edge_type, perms) == edge_set(original, edge_type)
+
+
+def test_rcm_places_hubs_last():
+    data = random_cnf(1).build_sat_specific_heterogeneous_graph()
+    offsets, indptr, _ = build_adjacency(data)
+    degrees = np.diff(indptr)
+    hubs = degrees > HUB_DEGREE_FACTOR * degrees.mean()
+    assert hubs.any()
+    perms = compute_node_order(data, "rcm")
+    for node_type, offset in offsets.items():
+        type_hubs = np.flatnonzero(hubs[offset:offset + data[node_type].num_nodes])
+        if len(type_hubs):
+            positions = np.argsort(perms[node_type])[type_hubs]
+            assert sorted(positions.tolist()) == list(range(data[node_type].num_nodes - len(type_hubs), data[node_type].num_nodes))
+
+
+@pytest.mark.parametrize("method", REORDER_METHODS)
+@pytest.mark.parametrize("builder", ["build_heterogeneous_graph", "build_sat_specific_heterogeneous_graph", "build_generic_heterogeneous_graph"])
+def test_unused_variables(method, builder):
+    # Variables 2 and 5 never appear
+    cnf = CNF(np.array([1, 3, -3, 4, -1, 6, 4, -6]), np.array([0, 2, 4, 6, 8]), 1)
+    original = getattr(cnf, builder)()
+    reordered = reorder_graph(getattr(cnf, builder)(), method)
+    perms = {}
+    for node_type in original.node_types:
+        perm = reordered[node_type].perm
+        assert sorted(perm.tolist()) == list(range(original[node_type].num_nodes))
+        assert torch.equal(restore_node_order(reordered[node_type].x, perm), original[node_type].x)
+        # Edges may refer to ids past the last node, which keep their place
+        count = max([original[node_type].num_nodes] + [int(original[edge_type].edge_index[i].max()) + 1
+                     for edge_type in original.edge_types for i in (0, 1) if edge_type[2 * i] == node_type])
+        perms[node_type] = torch.cat((perm, torch.arange(len(perm), count)))
+    for edge_type in original.edge_types:
+        assert edge_set(reordered, edge_type, perms) == edge_set(original, edge_type)
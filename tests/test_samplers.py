@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+from torch.utils.data import DataLoader
+from samplers import BucketBatchSampler
+
+SIZES = np.random.RandomState(0).randint(1, 100, size=103)
+
+
+def epoch(sampler):
+    return list(sampler)
+
+
+@pytest.mark.parametrize("shuffle", [True, False])
+@pytest.mark.parametrize("mode", [dict(batch_size=8), dict(max_size=300)])
+def test_every_graph_once_per_epoch(mode, shuffle):
+    sampler = BucketBatchSampler(SIZES, num_buckets=4, shuffle=shuffle, **mode)
+    for _ in range(3):
+        assert len(sampler) == len(sampler.build_batches(sampler.epoch))
+        batches = epoch(sampler)
+        indices = np.concatenate(batches)
+        assert np.array_equal(np.sort(indices), np.arange(len(SIZES)))
+
+
+def test_fixed_mode_batch_sizes():
+    sampler = BucketBatchSampler(SIZES, batch_size=8, num_buckets=4)
+    sizes = sorted(len(batch) for batch in epoch(sampler))
+    # Buckets of 26, 26, 26 and 25 graphs: 3 full batches and one remainder each
+    assert sizes == [1, 2, 2, 2] + [8] * 12
+
+    sampler = BucketBatchSampler(SIZES, batch_size=8, num_buckets=4, drop_last=True)
+    batches = epoch(sampler)
+    assert len(sampler) == len(batches) == 12
+    assert all(len(batch) == 8 for batch in batches)
+
+
+def test_budget_mode():
+    sizes = np.append(SIZES, 500)
+    sampler = BucketBatchSampler(sizes, max_size=300, num_buckets=4)
+    batches = epoch(sampler)
+    for batch in batches:
+        assert sizes[batch].sum() <= 300 or len(batch) == 1
+    assert [len(batch) for batch in batches if sizes[batch].sum() > 300] == [1]
+
+
+def test_batches_group_similar_sizes():
+    sampler = BucketBatchSampler(np.arange(100), batch_size=5, num_buckets=10)
+    for batch in epoch(sampler):
+        assert len({index // 10 for index in batch}) == 1
+
+
+def test_shuffle_changes_every_epoch():
+    sampler = BucketBatchSampler(SIZES, batch_size=8, num_buckets=4, seed=1)
+    first, second = epoch(sampler), epoch(sampler)
+    assert first != second
+    # An epoch is reproducible from the seed and the epoch number
+    other = BucketBatchSampler(SIZES, batch_size=8, num_buckets=4, seed=1)
+    other.set_epoch(1)
+    assert epoch(other) == second
+
+    unshuffled = BucketBatchSampler(SIZES, batch_size=8, num_buckets=4, shuffle=False)
+    assert epoch(unshuffled) == epoch(unshuffled)
+
+
+def test_data_loader():
+    sampler = BucketBatchSampler(SIZES, batch_size=8, num_buckets=4)
+    loader = DataLoader(list(range(len(SIZES))), batch_sampler=sampler)
+    assert sorted(index for batch in loader for index in batch.tolist()) == list(range(len(SIZES)))
+
+
+def test_mode_is_required():
+    with pytest.raises(ValueError):
+        BucketBatchSampler(SIZES)
+    with pytest.raises(ValueError):
+        BucketBatchSampler(SIZES, batch_size=8, max_size=300)
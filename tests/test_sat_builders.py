@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+import torch
+from sat_parser import CNF
+from reference_sat_parser import ReferenceCNF
+
+BUILDERS = ["build_heterogeneous_graph", "build_sat_specific_heterogeneous_graph", "build_generic_heterogeneous_graph"]
+
+
+def make_problems(seed):
+    rng = np.random.RandomState(seed)
+    # Few variables, so that some never appear and clauses may repeat a literal
+    num_variables = rng.randint(3, 15)
+    clauses = [
+        (rng.randint(1, num_variables + 1, size=size) * rng.choice([-1, 1], size=size)).tolist()
+        for size in rng.randint(1, 5, size=rng.randint(1, 40))
+    ]
+    # Clauses were sets, so the previous implementation iterated their literals in set order
+    ordered = [list(set(clause)) for clause in clauses]
+    is_sat = int(rng.rand() < 0.5)
+    return ReferenceCNF(ordered, is_sat), CNF.from_clauses(ordered, is_sat)
+
+
+def assert_same_graph(expected, actual):
+    assert set(expected.node_types) == set(actual.node_types)
+    for node_type in expected.node_types:
+        assert torch.equal(expected[node_type].x.float(), actual[node_type].x.float()), node_type
+    assert torch.equal(expected["variable"].y.float(), actual["variable"].y.float())
+    assert set(expected.edge_types) == set(actual.edge_types)
+    for edge_type in expected.edge_types:
+        assert torch.equal(expected[edge_type].edge_index.long(), actual[edge_type].edge_index.long()), edge_type
+
+
+@pytest.mark.parametrize("builder", BUILDERS)
+@pytest.mark.parametrize("seed", range(30))
+def test_builders_match_previous_implementation(builder, seed):
+    reference, cnf = make_problems(seed)
+    assert_same_graph(getattr(reference, builder)(), getattr(cnf, builder)())
+
@@ -0,0 +1,58 @@
+import os
+import numpy as np
+import pytest
+import torch
+from sat_parser import CNF
+from manifest import Manifest
+from shards import ShardReader, ShardWriter
+from reorder import reorder_graph
+from dataset import SatDataset
+from sat_files import make_raw_dir
+
+
+def random_graph(seed, reorder=False):
+    rng = np.random.RandomState(seed)
+    clauses = [(rng.choice(10, size=3, replace=False) + 1) * rng.choice([-1, 1], size=3) for _ in range(rng.randint(5, 30))]
+    data = CNF.from_clauses(clauses, seed % 2).build_generic_heterogeneous_graph()
+    return reorder_graph(data, "rcm") if reorder else data
+
+
+def assert_same_arrays(expected, actual):
+    for node_type in expected.node_types:
+        assert torch.equal(actual[node_type].x, expected[node_type].x)
+        if "perm" in expected[node_type]:
+            assert torch.equal(actual[node_type].perm, expected[node_type].perm)
+    for edge_type in expected.edge_types:
+        assert torch.equal(actual[edge_type].edge_index, expected[edge_type].edge_index)
+
+
+@pytest.mark.parametrize("reorder", [False, True])
+def test_round_trip(tmp_path, reorder):
+    graphs = [random_graph(seed, reorder) for seed in range(10)]
+    writer = ShardWriter(str(tmp_path), shard_size=4)
+    entries = []
+    for data in graphs:
+        shard_name, offsets = writer.add(data)
+        entries.append(Manifest.build_entry(data, shard_name, "source", 0, offsets))
+    writer.close()
+    assert sorted(os.listdir(tmp_path)) == ["shard_00000", "shard_00001", "shard_00002"]
+
+    manifest = Manifest.from_entries(entries)
+    assert manifest.is_packed
+    reader = ShardReader(str(tmp_path))
+    for i, data in enumerate(graphs):
+        loaded = reader.get(manifest.get_path(i), *manifest.get_location(i))
+        assert_same_arrays(data, loaded)
+        # Graphs are read-only views of the memory-mapped shards
+        assert not loaded["variable"].x.numpy().flags.owndata
+
+
+def test_dataset_shards_match_files(tmp_path):
+    make_raw_dir(tmp_path, 6)
+    files = SatDataset(str(tmp_path), graph_type="base", storage="files")
+    shards = SatDataset(str(tmp_path), graph_type="base", storage="shards", shard_size=5)
+    assert len(os.listdir(os.path.join(str(tmp_path), "processed_shards"))) > 2
+    assert len(files) == len(shards)
+    for i in range(len(files)):
+        assert_same_arrays(files[i], shards[i])
+        assert torch.equal(files[i]["variable"].y, shards[i]["variable"].y)
@@ -0,0 +1,123 @@
+import itertools
+import os
+import numpy as np
+import pytest
+from sat_parser import CNF
+from simplify import Simplifier, simplify_cnf
+from dataset import SatDataset
+from sat_files import make_raw_dir, pair_path, write_dimacs
+
+
+def random_cnf(seed):
+    """Small random problem; few variables and short clauses give units, pure literals, duplicates and subsumptions"""
+    rng = np.random.RandomState(seed)
+    num_variables = rng.randint(3, 9)
+    sizes = rng.randint(1, 5, size=rng.randint(4, 5 * num_variables))
+    literals = rng.randint(1, num_variables + 1, size=sizes.sum()) * rng.choice([-1, 1], size=sizes.sum())
+    return CNF(literals, np.concatenate(([0], np.cumsum(sizes))), 0)
+
+
+def is_satisfiable(cnf):
+    clauses = [cnf.literals[start:end] for start, end in zip(cnf.clause_offsets[:-1], cnf.clause_offsets[1:])]
+    num_variables = int(np.abs(cnf.literals).max()) if len(cnf.literals) else 0
+    for values in itertools.product((False, True), repeat=num_variables):
+        values = np.array((False,) + values)
+        if all((values[np.abs(clause)] == (clause > 0)).any() for clause in clauses):
+            return True
+    return False
+
+
+@pytest.mark.parametrize("kwargs", [{}, {"max_subsuming_size": 0}, {"max_subsuming_size": 4, "pairs_per_literal": 1}])
+def test_simplification_preserves_satisfiability(kwargs):
+    num_solved = 0
+    for seed in range(200):
+        cnf = random_cnf(seed)
+        simplified, stats = simplify_cnf(cnf, **kwargs)
+        num_solved += stats["solved"]
+        assert simplified.num_clauses
+        assert is_satisfiable(simplified) == is_satisfiable(cnf), seed
+        assert stats["removed_clauses"] == cnf.num_clauses - simplified.num_clauses
+        assert stats["removed_literals"] == len(cnf.literals) - len(simplified.literals)
+        if len(simplified.literals):
+            assert np.array_equal(np.unique(np.abs(simplified.literals)), np.arange(1, np.abs(simplified.literals).max() + 1))
+    assert 0 < num_solved < 200
+
+
+def test_steps():
+    # (1 2) subsumes (1 2 3), (4 -4) is a tautology, (5 6) is repeated and -7 is a unit that removes 7 from (7 5 -6); no
+    # literal is pure
+    clauses = [
+        [1, 2], [1, 2, 3], [-3, 1, -2], [3, -1, 2], [4, -4], [5, 6], [6, 5], [-7], [7, 5, -6], [-1, -2], [-5, -6], [1, -2, 5], [-1, 2, -5],
+    ]
+    sizes = [len(clause) for clause in clauses]
+    cnf = CNF(np.concatenate(clauses), np.concatenate(([0], np.cumsum(sizes))), 1)
+    simplified, stats = Simplifier()(cnf)
+    assert stats["tautologies"] == 1
+    assert stats["units"] == 1
+    assert stats["duplicate_clauses"] == 1
+    assert stats["subsumed_clauses"] == 1
+    assert stats["pure_literals"] == 0
+    assert stats["removed_clauses"] == 4
+    assert stats["removed_variables"] == 2
+    assert not stats["solved"]
+    assert simplified.is_sat == 1
+    assert is_satisfiable(simplified)
+
+
+def make_cnf(clauses, is_sat):
+    sizes = [len(clause) for clause in clauses]
+    return CNF(np.concatenate(clauses), np.concatenate(([0], np.cumsum(sizes))), is_sat)
+
+
+def to_clauses(cnf):
+    return [cnf.literals[start:end].tolist() for start, end in zip(cnf.clause_offsets[:-1], cnf.clause_offsets[1:])]
+
+
+def test_simplified_up_to_the_conflict():
+    # 1 gives the units 2 and -3, which empty (-2 3): propagation stops after the first unit
+    cnf = make_cnf([[1], [-1, 2], [-2, 3], [-3, -1], [4, 5, 6], [-4, 5, 6]], 0)
+    simplified, stats = simplify_cnf(cnf)
+    assert stats["solved"] == 1
+    assert stats["units"] == 1
+    # 5 and 6 were pure but propagation stopped before them; variables are renumbered
+    assert to_clauses(simplified) == [[1], [-1, 2], [-2], [3, 4, 5], [-3, 4, 5]]
+    assert simplified.is_sat == 0
+    assert not is_satisfiable(simplified)
+
+    cnf = make_cnf([[1], [-1], [2]], 0)
+    simplified, stats = simplify_cnf(cnf)
+    assert stats["solved"] == 1 and stats["units"] == 0
+    assert to_clauses(simplified) == to_clauses(cnf)
+
+
+def test_simplified_up_to_the_last_satisfied_clause():
+    cnf = make_cnf([[1], [-1, 2], [2, 3], [2, -3, 4]], 1)
+    simplified, stats = simplify_cnf(cnf)
+    assert stats["solved"] == 1
+    assert to_clauses(simplified) == [[1], [1, 2], [1, -2, 3]]
+    assert is_satisfiable(simplified)
+
+
+def test_only_tautologies():
+    cnf = make_cnf([[1, -1], [2, -2, 3]], 1)
+    simplified, stats = simplify_cnf(cnf)
+    assert stats["solved"] == 1 and stats["tautologies"] == 0
+    assert to_clauses(simplified) == to_clauses(cnf)
+
+
+def test_dataset_flags_solved_problems(tmp_path):
+    paths = make_raw_dir(tmp_path, 3)
+    # Neither units nor pure literals: propagation cannot decide this one
+    write_dimacs(pair_path(os.path.dirname(paths[0]), 9, 1), [[1, 2, 3], [-1, -2, 3], [1, -2, -3], [-1, 2, -3]], 3)
+    dataset = SatDataset(str(tmp_path), graph_type="modified", simplify=True)
+    original = SatDataset(str(tmp_path), graph_type="modified")
+    solved = dataset.solved_by_simplification
+    assert solved.dtype == bool and len(solved) == len(dataset)
+    assert dataset.simplification_stats["solved"] == solved.sum()
+    assert 0 < solved.sum() < len(dataset)
+    assert not original.solved_by_simplification.any()
+    # Solved problems are simplified too
+    assert (dataset.num_nodes_per_graph() <= original.num_nodes_per_graph()).all()
+    unsolved = dataset[~solved]
+    assert len(unsolved) == len(dataset) - solved.sum()
+    assert not unsolved.solved_by_simplification.any()
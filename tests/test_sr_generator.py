@@ -0,0 +1,125 @@
+import filecmp
+import itertools
+import multiprocessing
+import os
+import random
+from argparse import Namespace
+from functools import partial
+import numpy as np
+import pytest
+
+pytest.importorskip("PyMiniSolvers.minisolvers")
+import PyMiniSolvers.minisolvers as minisolvers
+from gen_sr_dimacs import gen_iclause_pair, gen_shard, generate_k_iclause, get_shard_seeds, is_satisfied_by
+from corpus import CORPUS_SUFFIX, Corpus
+from sat_parser import parse_dimacs_cnf
+
+
+def make_opts(out_dir, **kwargs):
+    opts = dict(out_dir=str(out_dir), n_pairs=5, min_n=5, max_n=8, p_k_2=0.3, p_geo=0.4, py_seed=1, np_seed=2,
+                print_interval=100, num_workers=1, shard_size=2, format="dimacs", sharded=True)
+    opts.update(kwargs)
+    return Namespace(**opts)
+
+
+def list_files(directory):
+    return sorted(os.path.relpath(os.path.join(root, name), directory) for root, _, names in os.walk(directory) for name in names)
+
+
+def test_shard_seeds_are_disjoint():
+    opts = make_opts("unused")
+    seeds = [get_shard_seeds(opts, shard) for shard in range(100)]
+    assert len(set(seeds)) == len(seeds)
+    assert get_shard_seeds(opts, 3) == get_shard_seeds(make_opts("other", num_workers=8), 3)
+
+
+def test_output_does_not_depend_on_the_number_of_workers(tmp_path):
+    serial = make_opts(tmp_path / "serial")
+    results = [gen_shard(serial, shard) for shard in range(3)]
+    assert [num_pairs for num_pairs, _ in results] == [2, 2, 1]
+
+    parallel = make_opts(tmp_path / "parallel", num_workers=2)
+    with multiprocessing.Pool(2) as pool:
+        parallel_results = list(pool.imap_unordered(partial(gen_shard, parallel), range(3)))
+    assert sorted(num_pairs for num_pairs, _ in parallel_results) == [1, 2, 2]
+
+    files = list_files(serial.out_dir)
+    assert files == list_files(parallel.out_dir)
+    assert len(files) == 10
+    assert {os.path.dirname(path) for path in files} == {"shard_00000", "shard_00001", "shard_00002"}
+    _, mismatch, errors = filecmp.cmpfiles(serial.out_dir, parallel.out_dir, files, shallow=False)
+    assert not mismatch and not errors
+
+
+def test_unsharded_output(tmp_path):
+    opts = make_opts(tmp_path, sharded=False)
+    for shard in range(3):
+        gen_shard(opts, shard)
+    files = list_files(opts.out_dir)
+    assert len(files) == 10 and all(os.sep not in path for path in files)
+    assert sum("_t=4_" in path for path in files) == 2
+
+
+def test_corpus_matches_dimacs_files(tmp_path):
+    opts = make_opts(tmp_path, format="both", sharded=False)
+    gen_shard(opts, 0)
+    files = list_files(opts.out_dir)
+    corpus_files = [path for path in files if path.endswith(CORPUS_SUFFIX)]
+    # Corpus order: pair by pair, UNSAT first
+    dimacs_files = sorted((path for path in files if path.endswith(".dimacs")), key=lambda path: int(path.split("_t=")[1].split("_")[0]))
+    assert len(corpus_files) == 1 and len(dimacs_files) == 4
+    corpus = Corpus(os.path.join(opts.out_dir, corpus_files[0]))
+    assert corpus.pair_ids.tolist() == [0, 0, 1, 1]
+    for item, path in enumerate(dimacs_files):
+        cnf = parse_dimacs_cnf(os.path.join(opts.out_dir, path))
+        literals, offsets, label = corpus.get_instance(item)
+        assert label == cnf.is_sat
+        assert np.array_equal(literals, cnf.literals) and np.array_equal(offsets, cnf.clause_offsets)
+
+
+def is_satisfiable(n, iclauses):
+    for model in itertools.product((0, 1), repeat=n):
+        if all(is_satisfied_by(model, iclause) for iclause in iclauses):
+            return True
+    return False
+
+
+def gen_iclause_pair_reference(opts):
+    """gen_iclause_pair calling the solver after every clause"""
+    n = random.randint(opts.min_n, opts.max_n)
+    solver = minisolvers.MinisatSolver()
+    for _ in range(n):
+        solver.new_var(dvar=True)
+    iclauses = []
+    while True:
+        k_base = 1 if random.random() < opts.p_k_2 else 2
+        k = k_base + np.random.geometric(opts.p_geo)
+        iclause = generate_k_iclause(n, k)
+        solver.add_clause(iclause)
+        if not solver.solve():
+            break
+        iclauses.append(iclause)
+    return n, iclauses, iclause, [-iclause[0]] + iclause[1:]
+
+
+def test_is_satisfied_by():
+    assert is_satisfied_by([1, 0, 0], [-2, 3])
+    assert is_satisfied_by([1, 0, 0], [1])
+    assert not is_satisfied_by([1, 0, 0], [-1, 2, 3])
+
+
+def test_pairs_match_solving_every_clause():
+    opts = make_opts("unused", min_n=4, max_n=10)
+    stats = {}
+    for seed in range(20):
+        random.seed(seed)
+        np.random.seed(seed)
+        n, iclauses, iclause_unsat, iclause_sat = gen_iclause_pair(opts, stats)
+        random.seed(seed)
+        np.random.seed(seed)
+        assert gen_iclause_pair_reference(opts) == (n, iclauses, iclause_unsat, iclause_sat)
+        if n <= 8:
+            assert is_satisfiable(n, iclauses + [iclause_sat])
+            assert not is_satisfiable(n, iclauses + [iclause_unsat])
+    # Most clauses are satisfied by the last model
+    assert stats["solver_calls"] < stats["clauses"] / 2
@@ -0,0 +1,71 @@
+import pytest
+import torch
+from torch.utils.data import DataLoader
+from torch_geometric.loader import DataLoader as GraphDataLoader
+from dtypes import NODE_FEATURE_DTYPES
+from stream import SRStreamDataset
+
+
+def needs_solver():
+    pytest.importorskip("PyMiniSolvers.minisolvers")
+
+
+def labels(graphs):
+    return [int(data["variable"].y[0, 1]) for data in graphs]
+
+
+def fingerprint(data):
+    return tuple(data[edge_type].edge_index.sum().item() for edge_type in data.edge_types) + (data["variable"].num_nodes,)
+
+
+def test_pairs_are_balanced():
+    needs_solver()
+    stream = SRStreamDataset(min_n=4, max_n=8, num_pairs=6, seed=0)
+    graphs = list(stream)
+    assert len(graphs) == 12
+    # Both problems of a pair come one after the other, in random order
+    for first, second in zip(labels(graphs)[::2], labels(graphs)[1::2]):
+        assert first + second == 1
+    assert labels(graphs) != [0, 1] * 6
+    for data in graphs:
+        assert data["variable"].x.dtype == torch.float
+        assert all(data[edge_type].edge_index.dtype == torch.long for edge_type in data.edge_types)
+
+
+def test_seed_and_epochs():
+    needs_solver()
+    stream = SRStreamDataset(min_n=4, max_n=8, num_pairs=4, seed=0)
+    first = [fingerprint(data) for data in stream]
+    assert [fingerprint(data) for data in stream] == first
+    stream.set_epoch(1)
+    assert [fingerprint(data) for data in stream] != first
+    other = SRStreamDataset(min_n=4, max_n=8, num_pairs=4, seed=1)
+    assert [fingerprint(data) for data in other] != first
+
+
+def test_workers_split_the_pairs():
+    needs_solver()
+    stream = SRStreamDataset(graph_type="modified", min_n=4, max_n=8, num_pairs=5, seed=0, upcast=False)
+    loader = DataLoader(stream, batch_size=None, num_workers=2)
+    graphs = list(loader)
+    assert len(graphs) == 10
+    assert sorted(labels(graphs)) == [0] * 5 + [1] * 5
+    # Workers draw different problems
+    assert len({fingerprint(data) for data in graphs}) > 5
+    for data in graphs:
+        assert data["variable"].x.dtype == NODE_FEATURE_DTYPES["modified"]["variable"]
+    assert [fingerprint(data) for data in DataLoader(stream, batch_size=None, num_workers=2)] == [fingerprint(data) for data in graphs]
+
+
+def test_batches():
+    needs_solver()
+    stream = SRStreamDataset(min_n=4, max_n=8, num_pairs=4, seed=0, reorder="rcm")
+    batch = next(iter(GraphDataLoader(stream, batch_size=8)))
+    assert batch.num_graphs == 8
+    assert batch["variable"].y.shape == (8, 2)
+
+
+@pytest.mark.parametrize("kwargs", [dict(graph_type="other"), dict(reorder="other"), dict(min_n=10, max_n=5), dict(min_n=0)])
+def test_invalid_arguments(kwargs):
+    with pytest.raises(ValueError):
+        SRStreamDataset(**kwargs)
@@ -0,0 +1,106 @@
+import importlib.util
+import os
+import numpy as np
+import pytest
+import torch
+import instance_generator
+from instance_generator import create_graph
+from instance_io import INSTANCE_SUFFIX, read_instance, write_instance
+from tsp_graph import build_decision_graphs, get_optimal_cost
+
+# "dataset" is the SAT dataset on the test path (see conftest.py), so the decision TSP one is loaded by path
+_spec = importlib.util.spec_from_file_location(
+    "tsp_dataset", os.path.join(os.path.dirname(__file__), "..", "src", "models", "decision_tsp", "dataset.py"))
+tsp_dataset = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(tsp_dataset)
+DecisionTspDataset = tsp_dataset.DecisionTspDataset
+
+EXACT = [True, False, True, True, False]
+
+
+def make_raw_dir(root):
+    """Instances in raw and raw/shard_00001; their exact flags are EXACT, in path order"""
+    paths = []
+    np.random.seed(0)
+    for i, exact in enumerate(EXACT):
+        directory = os.path.join(str(root), "raw", "shard_%05d" % (i // 3))
+        os.makedirs(directory, exist_ok=True)
+        Ma, Mw, route, nodes, _ = create_graph(np.random.randint(5, 9), 0.5, solver="builtin")
+        paths.append(os.path.join(directory, "%d%s" % (i, INSTANCE_SUFFIX)))
+        write_instance(paths[-1], Ma, Mw, route, nodes, exact=exact)
+    return paths
+
+
+def assert_same_graph(expected, actual):
+    for node_type in expected.node_types:
+        assert torch.equal(actual[node_type].x, expected[node_type].x)
+    assert torch.equal(actual["variable"].y, expected["variable"].y)
+    assert set(actual.edge_types) == set(expected.edge_types)
+    for edge_type in expected.edge_types:
+        assert torch.equal(actual[edge_type].edge_index, expected[edge_type].edge_index)
+
+
+@pytest.mark.parametrize("shard_size", [2, 10000])
+def test_graphs_match_built_graphs(tmp_path, monkeypatch, shard_size):
+    monkeypatch.setattr(tsp_dataset, "SHARD_SIZE", shard_size)
+    paths = make_raw_dir(tmp_path)
+    dataset = DecisionTspDataset(str(tmp_path), exact_only=False)
+    num_shards = len([name for name in os.listdir(dataset.processed_dir) if name.startswith("pack_")])
+    assert num_shards == (3 if shard_size == 2 else 1)
+    assert len(dataset) == 2 * len(paths)
+    for i, path in enumerate(paths):
+        for label, expected in enumerate(build_decision_graphs(read_instance(path))):
+            assert_same_graph(expected, dataset[2 * i + label])
+    assert dataset.labels.tolist() == [0, 1] * len(paths)
+    assert np.allclose(dataset.costs, np.repeat([get_optimal_cost(read_instance(path)) for path in paths], 2))
+
+
+def test_exact_filtering(tmp_path):
+    paths = make_raw_dir(tmp_path)
+    exact_paths = [path for path, exact in zip(paths, EXACT) if exact]
+    dataset = DecisionTspDataset(str(tmp_path))
+    assert len(dataset) == 2 * len(exact_paths)
+    assert [dataset.index["sources"][i].decode() for i in dataset.instances] == [os.path.relpath(path, str(tmp_path / "raw")) for path in exact_paths]
+    for i, path in enumerate(exact_paths):
+        for label, expected in enumerate(build_decision_graphs(read_instance(path))):
+            assert_same_graph(expected, dataset[2 * i + label])
+    assert np.allclose(dataset.costs, np.repeat([get_optimal_cost(read_instance(path)) for path in exact_paths], 2))
+    # Filtering happens when loading: the processed instances are shared with exact_only=False
+    assert len(DecisionTspDataset(str(tmp_path), exact_only=False)) == 2 * len(paths)
+
+
+def test_deviation_and_subsets(tmp_path):
+    paths = make_raw_dir(tmp_path)
+    dataset = DecisionTspDataset(str(tmp_path), deviation=0.1)
+    cost = get_optimal_cost(read_instance(paths[0]))
+    assert dataset[0]["constant"].x[-2].item() == pytest.approx(cost * 0.9, rel=1e-6)
+    assert dataset[1]["constant"].x[-2].item() == pytest.approx(cost * 1.1, rel=1e-6)
+    yes = dataset[dataset.labels == 1]
+    assert yes.labels.tolist() == [1] * (len(dataset) // 2)
+    empty = dataset[dataset.costs < 0]
+    assert len(empty) == 0 and len(empty.labels) == 0 and len(empty.costs) == 0
+
+
+def test_no_exact_instance(tmp_path):
+    np.random.seed(0)
+    os.makedirs(str(tmp_path / "raw"))
+    for i in range(2):
+        Ma, Mw, route, nodes, _ = create_graph(6, 0.5, solver="builtin")
+        write_instance(str(tmp_path / "raw" / ("%d%s" % (i, INSTANCE_SUFFIX))), Ma, Mw, route, nodes, exact=False)
+    with pytest.raises(ValueError, match="None of the 2 instances"):
+        DecisionTspDataset(str(tmp_path))
+    assert len(DecisionTspDataset(str(tmp_path), exact_only=False)) == 4
+
+
+def test_generator_defaults_without_concorde(tmp_path, monkeypatch):
+    # Without Concorde, instances above HELD_KARP_MAX_N nodes are flagged as not exact
+    monkeypatch.setattr(instance_generator, "TSPSolver", None)
+    with pytest.warns(UserWarning):
+        instance_generator.create_dataset(str(tmp_path / "raw"), 20, 22, samples=2, seed=0, output_format="binary")
+    with pytest.raises(ValueError, match="exact_only=False"):
+        DecisionTspDataset(str(tmp_path))
+
+
+def test_empty_raw_directory(tmp_path):
+    os.makedirs(str(tmp_path / "raw"))
+    assert len(DecisionTspDataset(str(tmp_path))) == 0
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+from tsp_solvers import HELD_KARP_MAX_N, held_karp, local_search, penalized_weights, tour_length
+from instance_generator import create_graph
+
+
+def is_hamiltonian(Ma, tour):
+    Ma = np.maximum(Ma, Ma.T)
+    return sorted(tour) == list(range(len(Ma))) and all(Ma[i,j] == 1 for i, j in zip(tour, np.roll(tour, -1)))
+
+
+@pytest.mark.parametrize("n", [HELD_KARP_MAX_N+1, 30, 60])
+def test_sparse_graphs_are_solved(n):
+    # The local search alone often gets stuck on inexistent edges at this connectivity
+    for seed in range(20):
+        np.random.seed(seed)
+        Ma, Mw, route, _, _ = create_graph(n, 0.1, solver='builtin')
+        assert is_hamiltonian(Ma, route)
+
+
+def test_local_search_never_worse_than_initial_tour():
+    rng = np.random.RandomState(0)
+    n = 40
+    Ma = np.triu((rng.rand(n,n) < 0.05).astype(float), 1)
+    initial_tour = rng.permutation(n).tolist()
+    for i, j in zip(initial_tour, np.roll(initial_tour, -1)):
+        Ma[min(i,j), max(i,j)] = 1
+    Ma = np.maximum(Ma, Ma.T)
+    Mw = rng.rand(n,n)
+    Mw = (Mw + Mw.T) / 2
+    W = penalized_weights(Ma, Mw)
+    tour = local_search(W, initial_tour=initial_tour)
+    assert tour_length(W, tour) <= tour_length(W, initial_tour)
+    assert is_hamiltonian(Ma, tour)
+
+
+def test_held_karp_is_optimal():
+    rng = np.random.RandomState(1)
+    n = 8
+    nodes = rng.rand(n, 2)
+    W = np.sqrt(((nodes[:,None] - nodes[None])**2).sum(axis=2))
+    # Brute force over the tours starting at node 0
+    from itertools import permutations
+    best = min(tour_length(W, (0,) + p) for p in permutations(range(1, n)))
+    assert tour_length(W, held_karp(W)) == pytest.approx(best)
+
+
+def test_held_karp_size_limit():
+    W = np.ones((HELD_KARP_MAX_N+1, HELD_KARP_MAX_N+1))
+    with pytest.raises(ValueError, match="Held-Karp is limited"):
+        held_karp(W)
+    # The largest instance still gets a valid tour
+    rng = np.random.RandomState(2)
+    W = rng.rand(HELD_KARP_MAX_N, HELD_KARP_MAX_N)
+    W = (W + W.T) / 2
+    assert sorted(held_karp(W)) == list(range(HELD_KARP_MAX_N))
+
+
+def test_restarts_reach_the_optimum():
+    rng = np.random.RandomState(3)
+    n = 14
+    for _ in range(10):
+        nodes = rng.rand(n, 2)
+        W = np.sqrt(((nodes[:,None] - nodes[None])**2).sum(axis=2))
+        assert tour_length(W, local_search(W)) == pytest.approx(tour_length(W, held_karp(W)))
+    # Restarts never lengthen the tour and only depend on the seed
+    n = 50
+    nodes = rng.rand(n, 2)
+    W = np.sqrt(((nodes[:,None] - nodes[None])**2).sum(axis=2))
+    assert tour_length(W, local_search(W)) <= tour_length(W, local_search(W, num_restarts=0))
+    assert local_search(W, seed=1) == local_search(W, seed=1)